@@ -23,6 +23,9 @@ on_session_creation = [
 update_website_context = [
     "webshop.webshop.shopping_cart.utils.update_website_context",
 ]
+after_request = [
+    "webshop.webshop.product_data_engine.profiler.add_server_timing_header",
+]
 
 website_generators = ["Website Item", "Item Group"]
 
@@ -43,12 +46,17 @@ doc_events = {
             "webshop.webshop.crud_events.item.update_website_item.execute",
             "webshop.webshop.crud_events.item.invalidate_item_variants_cache.execute",
             "webshop.webshop.crud_events.item.sync_kitchen_item.execute",
+            "webshop.webshop.crud_events.item.invalidate_attribute_index.execute",
         ],
         "before_rename": [
             "webshop.webshop.crud_events.item.validate_duplicate_website_item.execute",
         ],
         "after_rename": [
             "webshop.webshop.crud_events.item.invalidate_item_variants_cache.execute",
+            "webshop.webshop.crud_events.item.invalidate_attribute_index.execute",
+        ],
+        "after_delete": [
+            "webshop.webshop.crud_events.item.invalidate_attribute_index.execute",
         ],
     },
     "Sales Taxes and Charges Template": {
@@ -66,6 +74,56 @@ doc_events = {
             "webshop.webshop.crud_events.price_list.check_impact_on_cart.execute"
         ],
     },
+    "Item Price": {
+        "on_update": [
+            "webshop.webshop.product_data_engine.price_index.on_item_price_change",
+            "webshop.webshop.product_data_engine.listing_cache.on_item_price_change",
+        ],
+        "after_delete": [
+            "webshop.webshop.product_data_engine.price_index.on_item_price_change",
+            "webshop.webshop.product_data_engine.listing_cache.on_item_price_change",
+        ],
+    },
+    "Bin": {
+        "on_change": [
+            "webshop.webshop.product_data_engine.listing_cache.on_bin_change",
+            "webshop.webshop.redisearch_utils.on_bin_change",
+        ],
+    },
+    "Item Group": {
+        "on_update": [
+            "webshop.webshop.product_data_engine.item_group_tree.on_item_group_change",
+            "webshop.webshop.product_data_engine.listing_cache.on_item_group_change",
+            "webshop.webshop.redisearch_utils.update_item_group_ac",
+            "webshop.webshop.redisearch_utils.ensure_filter_fields_indexed",
+        ],
+        "after_rename": [
+            "webshop.webshop.product_data_engine.item_group_tree.on_item_group_change",
+            "webshop.webshop.product_data_engine.listing_cache.on_item_group_change",
+            "webshop.webshop.redisearch_utils.update_item_group_ac",
+        ],
+        "on_trash": [
+            "webshop.webshop.product_data_engine.item_group_tree.on_item_group_change",
+            "webshop.webshop.product_data_engine.listing_cache.on_item_group_change",
+            "webshop.webshop.redisearch_utils.update_item_group_ac",
+        ],
+    },
+    "Item Attribute": {
+        "on_update": [
+            "webshop.webshop.crud_events.item_attribute.invalidate_attribute_filters.execute",
+        ],
+        "on_trash": [
+            "webshop.webshop.crud_events.item_attribute.invalidate_attribute_filters.execute",
+        ],
+    },
+    "Pricing Rule": {
+        "on_update": [
+            "webshop.webshop.product_data_engine.price_index.on_pricing_rule_change",
+        ],
+        "after_delete": [
+            "webshop.webshop.product_data_engine.price_index.on_pricing_rule_change",
+        ],
+    },
     "Tax Rule": {
         "validate": [
             "webshop.webshop.crud_events.tax_rule.validate_use_for_cart.execute",
@@ -73,6 +131,12 @@ doc_events = {
     },
 }
 
+scheduler_events = {
+    "daily": [
+        "webshop.webshop.product_data_engine.price_index.rebuild_price_index",
+    ],
+}
+
 has_website_permission = {
     "Website Item": "webshop.webshop.doctype.website_item.website_item.has_website_permission_for_website_item",
     "Item Group": "webshop.webshop.doctype.website_item.website_item.has_website_permission_for_item_group"
@@ -0,0 +1,5 @@
+from webshop.webshop.product_data_engine.query import add_search_index
+
+
+def execute():
+	add_search_index()
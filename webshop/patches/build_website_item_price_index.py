@@ -0,0 +1,8 @@
+import frappe
+
+
+def execute():
+	frappe.reload_doc("webshop", "doctype", "website_item_price")
+	frappe.enqueue(
+		"webshop.webshop.product_data_engine.price_index.rebuild_price_index", queue="long"
+	)
@@ -0,0 +1,6 @@
+from webshop.webshop.redisearch_utils import create_website_items_index
+
+
+def execute():
+	# new index version with sortable and tag fields, swapped in once filled
+	create_website_items_index()
@@ -418,6 +418,30 @@ webshop.ProductView = class {
 			me.change_route_with_filters();
 		});
 
+		// numeric attributes are filtered on a {min, max} range
+		$('.attribute-range-filter').on('change', (e) => {
+			me.from_filters = true;
+
+			const $input = $(e.target);
+			const { attributeName: attribute_name, bound } = $input.data();
+			const current = this.attribute_filters[attribute_name];
+			const range = $.isPlainObject(current) ? current : {};
+
+			if ($input.val() === '') {
+				delete range[bound];
+			} else {
+				range[bound] = flt($input.val());
+			}
+
+			if (Object.keys(range).length) {
+				this.attribute_filters[attribute_name] = range;
+			} else {
+				delete this.attribute_filters[attribute_name];
+			}
+
+			me.change_route_with_filters();
+		});
+
 		// bind filter lookup input box
 		$('.filter-lookup-input').on('keydown', frappe.utils.debounce((e) => {
 			const $input = $(e.target);
@@ -471,6 +495,13 @@ webshop.ProductView = class {
 			attribute_filters = JSON.parse(attribute_filters);
 			for (let attribute in attribute_filters) {
 				const values = attribute_filters[attribute];
+				if ($.isPlainObject(values)) {
+					for (let bound in values) {
+						$(`input[data-attribute-name="${attribute}"][data-bound="${bound}"]`).val(values[bound]);
+					}
+					continue;
+				}
+
 				const selector = values.map(value => {
 					return `input[data-attribute-name="${attribute}"][data-attribute-value="${value}"]`;
 				}).join(',');
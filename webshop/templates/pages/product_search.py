@@ -4,13 +4,15 @@
 import json
 
 import frappe
-from frappe.utils import cint, cstr
-from redis.commands.search.query import Query
+from frappe.utils import cint
 
+from webshop.webshop.product_data_engine.search_backends import (
+	SQLSearchBackend,
+	get_product_data,
+	get_search_backend,
+)
 from webshop.webshop.redisearch_utils import (
 	WEBSITE_ITEM_CATEGORY_AUTOCOMPLETE,
-	WEBSITE_ITEM_INDEX,
-	WEBSITE_ITEM_NAME_AUTOCOMPLETE,
 	is_redisearch_enabled,
 )
 from webshop.webshop.shopping_cart.product_info import set_product_info_for_website
@@ -33,44 +35,6 @@ def get_product_list(search=None, start=0, limit=12):
 	return [get_item_for_list_in_html(r) for r in data]
 
 
-def get_product_data(search=None, start=0, limit=12):
-	"""Fetch product data with thumbnail fallback"""
-	query = """
-		SELECT
-			web_item_name, item_name, item_code, brand, route,
-			website_image, thumbnail, item_group,
-			description, web_long_description as website_description,
-			website_warehouse, ranking
-		FROM `tabWebsite Item`
-		WHERE published = 1
-		"""
-
-	if search:
-		query += """ and (item_name like %(search)s
-				or web_item_name like %(search)s
-				or brand like %(search)s
-				or web_long_description like %(search)s)"""
-		search = "%" + cstr(search) + "%"
-
-	query += """ ORDER BY ranking desc, modified desc limit %s offset %s""" % (
-		cint(limit),
-		cint(start),
-	)
-
-	results = frappe.db.sql(query, {"search": search}, as_dict=1)  # nosemgrep
-	
-	for item in results:
-		if not item.get("thumbnail") and item.get("website_image"):
-			item["thumbnail"] = item["website_image"]
-		
-		if item.get("thumbnail"):
-			thumbnail = item["thumbnail"]
-			if thumbnail and not thumbnail.startswith("http"):
-				item["thumbnail"] = frappe.utils.get_url(thumbnail)
-	
-	return results
-
-
 @frappe.whitelist(allow_guest=True)
 def search(query):
 	product_results = product_search(query)
@@ -83,66 +47,51 @@ def search(query):
 
 
 @frappe.whitelist(allow_guest=True)
-def product_search(query, limit=8, fuzzy_search=True):
-	"""Search products using RediSearch with SQL fallback"""
-	search_results = {"from_redisearch": True, "results": []}
+def product_search(query, limit=8, fuzzy_search=True, start=0, sort_by=None, filters=None):
+	"""
+	Search products with the site's search backend (see `get_search_backend`),
+	falling back to SQL if it fails.
+
+	Results are filtered, sorted by `sort_by` (see `SEARCH_SORT_OPTIONS`, the
+	backend's own order by default) and paged within the backend, `total` is the
+	number of matches. `filters` may have item_group, brand, supplier (a value or
+	a list of values), in_stock, price_min and price_max.
+	"""
+	search_results = {"from_redisearch": False, "backend": SQLSearchBackend.name, "results": []}
+	limit, start = cint(limit), cint(start)
 
 	if not query or len(query) < 3:
 		return search_results
 
-	if not is_redisearch_enabled():
-		search_results["from_redisearch"] = False
-		search_results["results"] = get_product_data(query, 0, limit)
-		return search_results
+	if isinstance(filters, str):
+		filters = json.loads(filters)
 
 	try:
-		redis = frappe.cache()
-		cleaned_query = clean_up_query(query)
-
-		redisearch = redis.ft(WEBSITE_ITEM_INDEX)
-		suggestions = redisearch.sugget(
-			WEBSITE_ITEM_NAME_AUTOCOMPLETE,
-			cleaned_query,
-			num=limit,
-			fuzzy=fuzzy_search and len(query) > 3,
-		)
-
-		query_string = cleaned_query
-		for s in suggestions:
-			query_string += f"|('{clean_up_query(s.string)}')"
-
-		q = Query(query_string)
-		results = redisearch.search(q)
-
-		search_results["results"] = list(map(convert_to_dict, results.docs))
-		search_results["results"] = sorted(
-			search_results["results"], key=lambda k: frappe.utils.cint(k["ranking"]), reverse=True
+		# resolving the backend may fail too, e.g. with Redis or a search hook down
+		backend = get_search_backend()
+		search_results.update(from_redisearch=backend.name == "redisearch", backend=backend.name)
+		search_results.update(
+			backend.search(query, start, limit, sort_by=sort_by, filters=filters or {}, fuzzy_search=fuzzy_search)
 		)
 	except Exception as e:
 		frappe.log_error(f"Search error: {str(e)}", "Product Search")
-		search_results["from_redisearch"] = False
-		search_results["results"] = get_product_data(query, 0, limit)
+		search_results.update(from_redisearch=False, backend=SQLSearchBackend.name)
+		search_results.update(SQLSearchBackend().search(query, start, limit))
 
 	return search_results
 
 
-def clean_up_query(query):
-	return "".join(c for c in query if c.isalnum() or c.isspace())
-
+@frappe.whitelist(allow_guest=True)
+def get_product_suggestions(query, limit=8):
+	"Complete `query` to names of Website Items, for search as you type."
+	if not query:
+		return []
 
-def convert_to_dict(redis_search_doc):
-	"""Convert Redis result to dict with thumbnail URL normalization"""
-	doc_dict = redis_search_doc.__dict__
-	
-	if not doc_dict.get("thumbnail") and doc_dict.get("website_image"):
-		doc_dict["thumbnail"] = doc_dict["website_image"]
-	
-	if doc_dict.get("thumbnail"):
-		thumbnail = doc_dict["thumbnail"]
-		if thumbnail and not thumbnail.startswith("http"):
-			doc_dict["thumbnail"] = frappe.utils.get_url(thumbnail)
-	
-	return doc_dict
+	try:
+		return get_search_backend().suggest(query, cint(limit))
+	except Exception as e:
+		frappe.log_error(f"Suggestion error: {str(e)}", "Product Search")
+		return []
 
 
 @frappe.whitelist(allow_guest=True)
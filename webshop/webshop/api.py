@@ -9,81 +9,258 @@ import frappe
 from frappe.utils import cint, flt
 
 from webshop.webshop.product_data_engine.filters import ProductFiltersBuilder
-from webshop.webshop.product_data_engine.query import ProductQuery
+from webshop.webshop.product_data_engine.hydration import ProductHydrator
+from webshop.webshop.product_data_engine.listing_cache import (
+	LISTING_CACHE_PREFIX,
+	get_listing_tags,
+	get_or_build_listing,
+	release_lock,
+	set_cached_listing,
+)
+from webshop.webshop.product_data_engine.profiler import get_listing_timer
+from webshop.webshop.product_data_engine.price_index import get_indexed_customer_group
+from webshop.webshop.product_data_engine.query import (
+	get_session_customer_group,
+	get_session_price_list,
+)
+from webshop.webshop.product_data_engine.redisearch_query import get_facet_counter, get_product_query
 from webshop.webshop.doctype.override_doctype.item_group import get_child_groups_for_website
 
-SORT_OPTIONS = {
-	"price_asc": ("price_list_rate", False),
-	"price_desc": ("price_list_rate", True),
-	"name_asc": ("web_item_name", False),
-	"name_desc": ("web_item_name", True),
-	"new": ("creation", True)
-}
-
-
-def _apply_price_filter_and_sort(items, price_min=None, price_max=None, sort_by=None):
-	"""Apply price filtering and sorting in single pass"""
-	if not items:
-		return []
-	
-	min_price = flt(price_min) if price_min else None
-	max_price = flt(price_max) if price_max else None
-	price_sort = sort_by in ["price_asc", "price_desc"]
-	
-	if not (price_min or price_max or price_sort):
-		return items
-	
-	processed_items = []
-	for item in items:
-		price_val = flt(item.get("price_list_rate", 0))
-		
-		if min_price and price_val > 0 and price_val < min_price:
-			continue
-		if max_price and price_val > 0 and price_val > max_price:
-			continue
-		if (min_price or max_price) and price_val == 0:
+MAX_BATCH_SIZE = 10  # queries per `get_product_filter_data_batch` request
+
+
+def _canonicalize_filters(filters):
+	"""Drop empty filters and sort filter values, so that equal selections share a key"""
+	canonical = {}
+	for field, values in (filters or {}).items():
+		if isinstance(values, dict):
+			# range of a numeric attribute
+			bounds = {bound: flt(values[bound]) for bound in ("min", "max") if values.get(bound) not in (None, "")}
+			if bounds:
+				canonical[field] = bounds
 			continue
-		
-		if price_sort:
-			processed_items.append((price_val, item))
-		else:
-			processed_items.append(item)
-	
-	if price_sort:
-		sort_key, reverse = SORT_OPTIONS[sort_by]
-		processed_items.sort(key=lambda x: x[0], reverse=reverse)
-		return [item for _, item in processed_items]
-	
-	return processed_items
-
-
-def _generate_cache_key(query_args):
-	"""Generate MD5 cache key from query arguments"""
-	key_parts = []
-	for k in sorted(query_args.keys()):
-		val = query_args[k]
-		if isinstance(val, dict):
-			val = json.dumps(val, sort_keys=True)
-		key_parts.append(f"{k}:{val}")
-	
-	cache_string = "|".join(key_parts)
+
+		if not isinstance(values, list):
+			values = [values]
+
+		values = sorted({str(value) for value in values if value not in (None, "")})
+		if values:
+			canonical[field] = values
+
+	return canonical
+
+
+def _generate_cache_key(query_args, engine):
+	"""
+	Generate the cache key of the shared catalog page, per filters, price list and customer group.
+	No-op arguments are dropped and filter values sorted to raise hit rates.
+	"""
+	start = 0 if query_args.get("from_filters") else cint(query_args.get("start"))
+	key_args = {
+		"search": (query_args.get("search") or "").strip(),
+		"field_filters": _canonicalize_filters(query_args.get("field_filters")),
+		"attribute_filters": _canonicalize_filters(query_args.get("attribute_filters")),
+		"start": start,
+		"item_group": query_args.get("item_group"),
+		"sort_by": query_args.get("sort_by"),
+		"items_per_page": cint(query_args.get("items_per_page")),
+		"price_min": flt(query_args.get("price_min")),
+		"price_max": flt(query_args.get("price_max")),
+		"cursor": query_args.get("cursor"),
+		"profile": engine.profile,
+		"price_list": engine.get_price_list() if engine.settings.show_price else None,
+		# the session's indexed group, groups without Pricing Rules of their own share pages
+		"customer_group": engine.get_customer_group() if engine.settings.show_price else None,
+		"hide_price": engine.settings.hide_price_for_guest and frappe.session.user == "Guest",
+	}
+	key_args = {key: value for key, value in key_args.items() if value not in (None, "", 0, {})}
+
+	cache_string = json.dumps(key_args, sort_keys=True, default=str)
 	cache_hash = hashlib.md5(cache_string.encode()).hexdigest()
-	return f"product_filter:{cache_hash}"
+	return f"{LISTING_CACHE_PREFIX}{cache_hash}"
 
 
 @frappe.whitelist(allow_guest=True)
 def get_product_filter_data(query_args=None):
-	"""Returns filtered products with caching and sorting support"""
+	"""
+	Returns filtered products with caching and sorting support.
+
+	Pages are addressed by `start` (offset), or by `cursor`: the `next_cursor`
+	of the previous response, which seeks past its last item instead.
+
+	`facet_counts` holds the number of matching items per field and attribute
+	filter value, see `ProductFacetCounter`.
+
+	Per stage timings are sent as a `Server-Timing` header for sampled and
+	`debug` requests, `debug` requests of System Managers also get them as
+	`timings` in the response and bypass the cache.
+
+	Pages are cached per filters and price list, see `listing_cache`. Stale
+	pages are served while they are rebuilt in the background.
+
+	`profile` ("card", "list" or "full") selects the item fields and settings
+	sent, see `LISTING_PROFILES`. The default "card" profile has what product
+	cards render, without long descriptions or the whole Webshop Settings.
+
+	Listings are queried with the "Product Listing Backend" of Webshop
+	Settings, see `get_product_query`.
+	"""
 	if isinstance(query_args, str):
 		query_args = json.loads(query_args)
 
 	query_args = frappe._dict(query_args or {})
-	cache_key = _generate_cache_key(query_args)
-	
-	cached_result = frappe.cache().get_value(cache_key)
-	if cached_result and not frappe.conf.developer_mode:
-		return json.loads(cached_result)
+	timer = get_listing_timer(debug=query_args.pop("debug", None))
+	timer.start()
+	try:
+		with timer.stage("total"):
+			response = _get_product_filter_data(query_args, timer)
+	finally:
+		timer.stop()
+
+	timer.set_response_header()
+	if timer.sampled:
+		timer.record_histogram()
+	if timer.debug and isinstance(response, dict):
+		response = dict(response, timings=timer.as_dict())
+
+	return response
+
+
+def _get_product_filter_data(query_args, timer):
+	engine = get_product_query(profile=query_args.get("profile"))
+	engine.timer = timer
+	response = _get_shared_catalog_page(query_args, engine, timer)
+
+	with timer.stage("user_state"):
+		_apply_user_state([response], engine.settings)
+
+	return response
 
+
+@frappe.whitelist(allow_guest=True)
+def get_product_filter_data_batch(queries=None):
+	"""
+	Returns listing pages of several `get_product_filter_data` queries, in their order.
+
+	Webshop Settings, the session user's price list and their cart & wishlist
+	are looked up once for the whole batch. Pages are served from the listing
+	cache like single queries.
+	"""
+	if isinstance(queries, str):
+		queries = json.loads(queries)
+
+	queries = queries or []
+	if len(queries) > MAX_BATCH_SIZE:
+		frappe.throw(
+			frappe._("At most {0} listing queries can be batched.").format(MAX_BATCH_SIZE),
+			title=frappe._("Too Many Queries"),
+		)
+
+	settings = frappe.get_doc("Webshop Settings")
+	price_list = get_session_price_list(settings)
+	customer_group = get_indexed_customer_group(get_session_customer_group(settings))
+
+	timer = get_listing_timer()
+	timer.start()
+	try:
+		with timer.stage("total"):
+			responses = []
+			for query_args in queries:
+				query_args = frappe._dict(query_args or {})
+				query_args.pop("debug", None)
+				engine = get_product_query(
+					profile=query_args.get("profile"),
+					settings=settings,
+					price_list=price_list,
+					customer_group=customer_group,
+				)
+				engine.timer = timer
+				responses.append(_get_shared_catalog_page(query_args, engine, timer))
+
+			with timer.stage("user_state"):
+				_apply_user_state(responses, settings)
+	finally:
+		timer.stop()
+
+	timer.set_response_header()
+	if timer.sampled:
+		timer.record_histogram()
+
+	return responses
+
+
+def _apply_user_state(responses, settings):
+	"""Overlay the session user's cart & wishlist state on the items of all pages, in one lookup"""
+	items = []
+	for response in responses:
+		if "exc" in response:
+			continue
+
+		response["items"] = [frappe._dict(item) for item in response["items"]]
+		items.extend(response["items"])
+
+	ProductHydrator(items, settings).apply_user_state(with_cart=settings.enabled)
+
+
+def _get_shared_catalog_page(query_args, engine, timer):
+	"""Get a listing page shared by users of a price list, from the cache if possible"""
+	engine.user_state = False
+
+	cache_key = _generate_cache_key(query_args, engine)
+	if frappe.conf.developer_mode or timer.debug:
+		response = _get_catalog_page(query_args, engine, timer)
+	else:
+		with timer.stage("cache"):
+			response = get_or_build_listing(
+				cache_key,
+				build=lambda: _build_cached_catalog_page(query_args, engine, timer, cache_key),
+				refresh=lambda: frappe.enqueue(
+					"webshop.webshop.api.refresh_cached_catalog_page",
+					query_args=dict(query_args),
+					cache_key=cache_key,
+					price_list=engine.get_price_list(),
+					customer_group=engine.get_customer_group(),
+					queue="short",
+				),
+			)
+
+	return response
+
+
+def _build_cached_catalog_page(query_args, engine, timer, cache_key):
+	"""Query a listing page and cache it, tagged with what it depends on"""
+	response = _get_catalog_page(query_args, engine, timer)
+	if "exc" in response:
+		return response
+
+	tags = get_listing_tags(
+		item_group=query_args.get("item_group"),
+		price_list=engine.get_price_list(),
+		field_filters=_canonicalize_filters(query_args.get("field_filters")),
+	)
+	# round trip through json, so that fresh and cached pages look the same
+	response = json.loads(json.dumps(response, default=str))
+	set_cached_listing(cache_key, response, tags)
+
+	return response
+
+
+def refresh_cached_catalog_page(query_args, cache_key, price_list=None, customer_group=None):
+	"""Rebuild a stale listing page in the background, for the price list and group of its key"""
+	from webshop.webshop.product_data_engine.profiler import StageTimer
+
+	try:
+		engine = get_product_query(
+			profile=query_args.get("profile"), price_list=price_list, customer_group=customer_group
+		)
+		engine.user_state = False
+		_build_cached_catalog_page(frappe._dict(query_args), engine, StageTimer(), cache_key)
+	finally:
+		release_lock(cache_key)
+
+
+def _get_catalog_page(query_args, engine, timer):
+	"""Query a listing page without any state of the session user"""
 	search = query_args.get("search")
 	field_filters = query_args.get("field_filters", {})
 	attribute_filters = query_args.get("attribute_filters", {})
@@ -93,17 +270,14 @@ def get_product_filter_data(query_args=None):
 	items_per_page = cint(query_args.get("items_per_page", 0))
 	price_min = query_args.get("price_min")
 	price_max = query_args.get("price_max")
+	cursor = query_args.get("cursor")
 
 	sub_categories = []
 	if item_group:
 		sub_categories = get_child_groups_for_website(item_group, immediate=True)
 
-	engine = ProductQuery()
-	
-	if sort_by and sort_by not in ["price_asc", "price_desc"]:
-		sort_field, reverse = SORT_OPTIONS.get(sort_by, ("ranking", True))
-		engine.order_by = f"{sort_field} {'desc' if reverse else 'asc'}"
-	
+	engine.set_sort(sort_by)
+
 	if items_per_page:
 		engine.page_length = items_per_page
 
@@ -114,38 +288,41 @@ def get_product_filter_data(query_args=None):
 			search_term=search,
 			start=start,
 			item_group=item_group,
+			cursor=cursor,
+			price_min=price_min,
+			price_max=price_max,
 		)
 	except Exception as e:
 		frappe.log_error(f"Product Query Error: {str(e)}", "Product Query Failed")
 		return {"exc": frappe._("Unable to load products. Please try again.")}
 
-	items = _apply_price_filter_and_sort(
-		result.get("items", []),
-		price_min=price_min,
-		price_max=price_max,
-		sort_by=sort_by
-	)
-	
-	items_count = len(items) if (price_min or price_max) else result.get("items_count", 0)
-
 	filters = {}
 	discounts = result.get("discounts", [])
 	if discounts:
 		filter_engine = ProductFiltersBuilder()
 		filters["discount_filters"] = filter_engine.get_discount_filters(discounts)
 
-	response = {
-		"items": items,
+	with timer.stage("facets"):
+		facet_counts = get_facet_counter(
+			engine,
+			item_group=item_group,
+			search_term=search,
+			field_filters=field_filters,
+			attribute_filters=attribute_filters,
+			price_min=price_min,
+			price_max=price_max,
+		).get_facet_counts()
+
+	return {
+		"items": engine.serialize_items(result.get("items", [])),
 		"filters": filters,
-		"settings": engine.settings,
+		"settings": engine.serialize_settings(),
 		"sub_categories": sub_categories,
-		"items_count": items_count,
+		"items_count": result.get("items_count", 0),
+		"items_count_approximate": result.get("items_count_approximate", False),
+		"next_cursor": result.get("next_cursor"),
+		"facet_counts": facet_counts,
 	}
-	
-	if not frappe.conf.developer_mode:
-		frappe.cache().set_value(cache_key, json.dumps(response, default=str), expires_in_sec=300)
-	
-	return response
 
 
 @frappe.whitelist(allow_guest=True)
@@ -0,0 +1,33 @@
+from webshop.webshop.product_data_engine.attribute_index import (
+    bump_attribute_index_version,
+)
+
+
+def execute(doc, method=None, old_name=None, new_name=None, merge=False):
+    """
+    Mark the attribute index stale if variant attributes or publishing changed,
+    or the item was renamed or deleted. Other Item saves keep the index, every
+    worker rebuilds it after a bump.
+    """
+    if method == "on_update" and not has_attribute_changes(doc):
+        return
+
+    bump_attribute_index_version()
+
+
+def has_attribute_changes(doc):
+    doc_before_save = doc.get_doc_before_save()
+    if not doc_before_save:
+        return bool(get_attribute_values(doc))
+
+    return doc.has_value_changed("published_in_website") or (
+        get_attribute_values(doc_before_save) != get_attribute_values(doc)
+    )
+
+
+def get_attribute_values(doc):
+    return [
+        (row.attribute, row.attribute_value)
+        for row in doc.get("attributes") or []
+        if row.attribute_value
+    ]
@@ -0,0 +1 @@
+# Item Attribute CRUD Events
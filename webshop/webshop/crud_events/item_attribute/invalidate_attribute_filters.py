@@ -0,0 +1,10 @@
+from webshop.webshop.product_data_engine.attribute_index import (
+    bump_attribute_index_version,
+)
+
+
+def execute(doc, method=None):
+    """
+    Mark attribute filters stale, as the order of values or numeric ranges may have changed.
+    """
+    bump_attribute_index_version()
@@ -13,6 +13,7 @@ from frappe.utils import cint, flt
 from webshop.webshop.doctype.webshop_settings.webshop_settings import (
 	get_shopping_cart_settings,
 )
+from webshop.webshop.utils import cache_codec
 
 
 class UnverifiedReviewer(frappe.ValidationError):
@@ -45,7 +46,7 @@ def get_item_reviews(web_item, start=0, end=10, data=None):
 		data = frappe._dict()
 
 	if settings and settings.get("enable_reviews"):
-		reviews_cache = frappe.cache().hget("item_reviews", web_item)
+		reviews_cache = cache_codec.hget("item_reviews", web_item)
 		if from_cache and reviews_cache:
 			data = reviews_cache
 		else:
@@ -100,7 +101,7 @@ def get_queried_reviews(web_item, start=0, end=10, data=None):
 
 
 def set_reviews_in_cache(web_item, reviews_dict):
-	frappe.cache().hset("item_reviews", web_item, reviews_dict)
+	cache_codec.hset("item_reviews", web_item, reviews_dict)
 
 
 @frappe.whitelist()
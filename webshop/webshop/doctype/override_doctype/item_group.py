@@ -6,6 +6,7 @@ from frappe.website.website_generator import WebsiteGenerator
 from erpnext.setup.doctype.item_group.item_group import ItemGroup
 from frappe.website.utils import clear_cache
 from webshop.webshop.product_data_engine.filters import ProductFiltersBuilder
+from webshop.webshop.product_data_engine.item_group_tree import get_item_group_tree
 
 class WebshopItemGroup(ItemGroup, WebsiteGenerator):
 	nsm_parent_field = "parent_item_group"
@@ -119,15 +120,11 @@ def get_parent_item_groups(item_group_name, from_item=False):
 	if not item_group_name:
 		return base_parents
 
-	item_group = frappe.db.get_value("Item Group", item_group_name, ["lft", "rgt"], as_dict=1)
-	parent_groups = frappe.db.sql(
-		"""select name, route from `tabItem Group`
-		where lft <= %s and rgt >= %s
-		and show_in_website=1
-		order by lft asc""",
-		(item_group.lft, item_group.rgt),
-		as_dict=True,
-	)
+	parent_groups = [
+		frappe._dict(name=group.name, route=group.route)
+		for group in get_item_group_tree(item_group_name).get_ancestors(item_group_name, include_self=True)
+		if group.show_in_website
+	]
 
 	return base_parents + parent_groups
 
@@ -136,20 +133,21 @@ def invalidate_cache_for(doc, item_group=None):
 	if not item_group:
 		item_group = doc.name
 
+	tree = get_item_group_tree(item_group)
 	for d in get_parent_item_groups(item_group):
-		item_group_name = frappe.db.get_value("Item Group", d.get("name"))
-		if item_group_name:
-			clear_cache(frappe.db.get_value("Item Group", item_group_name, "route"))
+		group = tree.groups.get(d.get("name"))
+		if group:
+			clear_cache(group.route)
 
 def get_child_groups_for_website(item_group_name, immediate=False, include_self=False):
 	"""Returns child item groups *excluding* passed group."""
-	item_group = frappe.get_cached_value("Item Group", item_group_name, ["lft", "rgt"], as_dict=1)
-	filters = {"lft": [">", item_group.lft], "rgt": ["<", item_group.rgt], "show_in_website": 1}
-
+	tree = get_item_group_tree(item_group_name)
 	if immediate:
-		filters["parent_item_group"] = item_group_name
-
-	if include_self:
-		filters.update({"lft": [">=", item_group.lft], "rgt": ["<=", item_group.rgt]})
+		groups = tree.get_children(item_group_name)
+	else:
+		groups = tree.get_descendants(item_group_name, include_self=include_self)
 
-	return frappe.get_all("Item Group", filters=filters, fields=["name", "route"], order_by="name")
\ No newline at end of file
+	return sorted(
+		(frappe._dict(name=group.name, route=group.route) for group in groups if group.show_in_website),
+		key=lambda group: group.name,
+	)
@@ -7,9 +7,10 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import comma_and, flt, unique
 
+from webshop.webshop.product_data_engine.listing_cache import clear_listing_cache
 from webshop.webshop.redisearch_utils import (
 	create_website_items_index,
-	define_autocomplete_dictionary,
+	ensure_filter_fields_indexed,
 	get_indexable_web_fields,
 	is_search_module_loaded,
 )
@@ -43,12 +44,12 @@ class WebshopSettings(Document):
 
 	def after_save(self):
 		self.create_redisearch_indexes()
+		clear_listing_cache()
 
 	def create_redisearch_indexes(self):
 		# if redisearch is enabled (value changed) create indexes and dictionary
 		value_changed = self.is_redisearch_enabled != self.is_redisearch_enabled_pre_save
 		if self.is_redisearch_loaded and self.is_redisearch_enabled and value_changed:
-			define_autocomplete_dictionary()
 			create_website_items_index()
 
 	@staticmethod
@@ -157,6 +158,9 @@ class WebshopSettings(Document):
 			# if search index fields get changed
 			if not (new_fields == old_fields):
 				create_website_items_index()
+			else:
+				# listings are filtered within RediSearch on indexed filter fields
+				ensure_filter_fields_indexed()
 
 
 def validate_cart_settings(doc=None, method=None):
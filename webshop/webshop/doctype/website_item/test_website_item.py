@@ -535,6 +535,7 @@ def make_web_pricing_rule(**kwargs):
 				"for_price_list": kwargs.get("price_list") or "_Test Price List India",
 				"applicable_for": kwargs.get("applicable_for") or "",
 				"customer": kwargs.get("customer") or "",
+				"customer_group": kwargs.get("customer_group") or "",
 			}
 		)
 		pricing_rule.insert()
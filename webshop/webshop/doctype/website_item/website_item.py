@@ -15,6 +15,11 @@ from frappe.website.doctype.website_slideshow.website_slideshow import get_slide
 from frappe.website.website_generator import WebsiteGenerator
 
 from webshop.webshop.doctype.item_review.item_review import get_item_reviews
+from webshop.webshop.product_data_engine.attribute_index import bump_attribute_index_version
+from webshop.webshop.product_data_engine.listing_cache import invalidate_website_item_listings
+from webshop.webshop.product_data_engine.price_index import enqueue_price_index_update
+from webshop.webshop.product_data_engine.query import add_search_index, clear_product_count_cache
+from webshop.webshop.product_data_engine.search_backends import record_local_search_change
 from webshop.webshop.redisearch_utils import (
     delete_item_from_index,
     insert_item_to_index,
@@ -87,6 +92,13 @@ class WebsiteItem(WebsiteGenerator):
 		super(WebsiteItem, self).on_trash()
 		delete_item_from_index(self)
 		self.publish_unpublish_desk_item(publish=False)
+		frappe.db.delete("Website Item Price", {"website_item": self.name})
+		clear_product_count_cache()
+		invalidate_website_item_listings(
+			self, [self.item_group] + [d.item_group for d in self.get("website_item_groups") or []]
+		)
+		bump_attribute_index_version()
+		record_local_search_change(self.name)
 
 	def validate_duplicate_website_item(self):
 		existing_web_item = frappe.db.exists(
@@ -482,12 +494,22 @@ def invalidate_cache_for_web_item(doc):
 	# Update Search Cache
 	update_index_for_item(doc)
 
+	# Listing counts may change on publish/unpublish or filter field edits
+	clear_product_count_cache()
+	invalidate_website_item_listings(doc, [doc.item_group] + website_item_groups)
+	enqueue_price_index_update(item_codes=[doc.item_code])
+	if doc.has_value_changed("published"):
+		# publishing sets published_in_website of the Item, which the attribute index filters on
+		bump_attribute_index_version()
+	record_local_search_change(doc.name)
+
 	invalidate_item_variants_cache_for_website(doc)
 
 
 def on_doctype_update():
 	# since route is a Text column, it needs a length for indexing
 	frappe.db.add_index("Website Item", ["route(500)"])
+	add_search_index()
 
 
 def check_if_user_is_customer(user=None):
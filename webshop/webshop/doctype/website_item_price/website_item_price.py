@@ -0,0 +1,14 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+
+class WebsiteItemPrice(Document):
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_index("Website Item Price", ["price_list", "customer_group", "website_item"])
+	frappe.db.add_index("Website Item Price", ["price_list", "customer_group", "discount_percent"])
@@ -0,0 +1,150 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and Contributors
+# License: GNU General Public License v3. See license.txt
+
+import frappe
+from frappe.utils import flt
+
+ATTRIBUTE_INDEX_VERSION_KEY = "webshop_attribute_index_version"
+
+# site -> ItemAttributeIndex, kept for the lifetime of the worker process
+_attribute_indexes = {}
+
+
+class ItemAttributeIndex:
+	"""Inverted index of published items by Item Variant Attribute value.
+
+	Every published item gets an ordinal, every (attribute, value) pair maps to
+	a bitset (a Python int) of the ordinals having it. Filtering by several
+	attributes is a bitwise AND of the value bitsets.
+
+	The index lives in the worker process and is rebuilt when the version
+	stamp in Redis changes (see `bump_attribute_index_version`).
+	"""
+
+	def __init__(self):
+		self.version = None
+		self.item_codes = []
+		self.postings = {}
+		self.attribute_values = {}
+
+	def ensure_fresh(self):
+		version = frappe.cache().get_value(ATTRIBUTE_INDEX_VERSION_KEY)
+		if version is None:
+			version = bump_attribute_index_version()
+
+		if version != self.version:
+			self.build()
+			self.version = version
+
+	def build(self):
+		rows = frappe.db.sql(
+			"""
+			select iva.parent, iva.attribute, iva.attribute_value
+			from `tabItem Variant Attribute` iva
+			inner join `tabItem` item on item.name = iva.parent
+			where item.published_in_website = 1
+				and ifnull(iva.attribute_value, '') != ''
+			order by iva.parent
+			"""
+		)
+
+		item_codes, ordinals, value_ordinals, attribute_values = [], {}, {}, {}
+		for item_code, attribute, attribute_value in rows:
+			if item_code not in ordinals:
+				ordinals[item_code] = len(item_codes)
+				item_codes.append(item_code)
+
+			key = (attribute, attribute_value)
+			if key not in value_ordinals:
+				value_ordinals[key] = []
+				attribute_values.setdefault(attribute, []).append(attribute_value)
+			value_ordinals[key].append(ordinals[item_code])
+
+		postings = {key: make_bitset(item_ordinals) for key, item_ordinals in value_ordinals.items()}
+		self.item_codes, self.postings, self.attribute_values = item_codes, postings, attribute_values
+
+	def get_values(self, attribute, values):
+		"""
+		Args:
+		        attribute (str): Item Attribute
+		        values: Value, list of values, or {"min", "max"} range of a numeric attribute
+
+		Returns:
+		        list: Values of the attribute matching the filter
+		"""
+		if isinstance(values, dict):
+			low, high = values.get("min"), values.get("max")
+			return [
+				value
+				for value in self.attribute_values.get(attribute, [])
+				if (low in (None, "") or flt(value) >= flt(low))
+				and (high in (None, "") or flt(value) <= flt(high))
+			]
+
+		return values if isinstance(values, list) else [values]
+
+	def get_matching_bitset(self, attributes):
+		"""
+		Args:
+		        attributes (dict): {attribute: value, list of values or range}
+
+		Returns:
+		        int: Bitset of items having any of the values for every attribute
+		"""
+		matches = None
+		for attribute, values in attributes.items():
+			bitset = 0
+			for value in self.get_values(attribute, values):
+				bitset |= self.postings.get((attribute, value), 0)
+
+			matches = bitset if matches is None else matches & bitset
+			if not matches:
+				return 0
+
+		return matches or 0
+
+	def get_item_codes(self, attributes):
+		"""
+		Args:
+		        attributes (dict): {attribute: value, list of values or range}
+
+		Returns:
+		        list: Item codes of published items matching all attribute filters
+		"""
+		bitset = self.get_matching_bitset(attributes)
+		item_codes = []
+		while bitset:
+			lowest_bit = bitset & -bitset
+			item_codes.append(self.item_codes[lowest_bit.bit_length() - 1])
+			bitset ^= lowest_bit
+
+		return item_codes
+
+
+def make_bitset(ordinals):
+	"""
+	Build the bitset of `ordinals` in one go. Or-ing bits into an int one by one copies
+	the growing int every time, which is quadratic in the number of items.
+	"""
+	if not ordinals:
+		return 0
+
+	bits = bytearray(max(ordinals) // 8 + 1)
+	for ordinal in ordinals:
+		bits[ordinal >> 3] |= 1 << (ordinal & 7)
+
+	return int.from_bytes(bits, "little")
+
+
+def get_attribute_index():
+	"Get the up to date attribute index of the current site."
+	index = _attribute_indexes.setdefault(frappe.local.site, ItemAttributeIndex())
+	index.ensure_fresh()
+	return index
+
+
+def bump_attribute_index_version():
+	"Mark attribute indexes of all workers as stale."
+	version = frappe.generate_hash(length=10)
+	frappe.cache().set_value(ATTRIBUTE_INDEX_VERSION_KEY, version)
+	return version
@@ -0,0 +1,290 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and Contributors
+# License: GNU General Public License v3. See license.txt
+
+import hashlib
+import json
+
+import frappe
+
+from webshop.webshop.product_data_engine.attribute_index import get_attribute_index, make_bitset
+from webshop.webshop.product_data_engine.query import (
+	COUNT_CACHE_TTL,
+	ProductQuery,
+	get_count_cache_prefix,
+)
+from webshop.webshop.utils import cache_codec
+
+# keyed after the count cache prefix, cleared along with listing counts
+FACET_CACHE_PREFIX = "facets:"
+
+
+class ProductFacetCounter:
+	"""Count matching items per filter value, for the current filter state.
+
+	Counts are disjunctive: a value is counted over items matching the
+	selection of all *other* facets, so values of a facet that is already
+	filtered on keep their counts and can be added to the selection.
+
+	Candidate items (matching item group, search and non facet filters) are
+	read with all their facet values in one query, then counted in one pass
+	using bitsets of candidate ordinals, each built once from its ordinals.
+
+	Attributes:
+	        item_group (str): Item Group of the listing, Webshop Settings facets if not set
+	        search_term (str): Search term of the listing
+	        field_filters (dict): Selected field values, {fieldname: value or list of values}
+	        attribute_filters (dict): Selected attribute values, {attribute: value or list of values}
+	        price_min (float): Lowest price list rate of the listing
+	        price_max (float): Highest price list rate of the listing
+	        price_list (str): Price List of the listing, the session's if not set
+	        customer_group (str): Indexed Customer Group of the listing, the session's if not set
+	"""
+
+	def __init__(
+		self,
+		item_group=None,
+		search_term=None,
+		field_filters=None,
+		attribute_filters=None,
+		price_min=None,
+		price_max=None,
+		price_list=None,
+		customer_group=None,
+	):
+		self.item_group = item_group
+		self.search_term = search_term
+		self.field_filters = field_filters or {}
+		self.attribute_filters = attribute_filters or {}
+		self.price_min = price_min
+		self.price_max = price_max
+		self.price_list = price_list
+		self.customer_group = customer_group
+
+		self.doc = (
+			frappe.get_cached_doc("Item Group", item_group)
+			if item_group
+			else frappe.get_cached_doc("Webshop Settings")
+		)
+		self.facet_fields = self.get_facet_fields()
+		self.facet_attributes = self.get_facet_attributes()
+
+	def get_facet_fields(self):
+		"Link and Table MultiSelect filter fields of the Website Item."
+		if not self.item_group and not self.doc.enable_field_filters:
+			return []
+
+		meta = frappe.get_meta("Website Item", cached=True)
+		fields = [meta.get_field(row.fieldname) for row in self.doc.filter_fields]
+		return [df for df in fields if df and df.fieldtype in ("Link", "Table MultiSelect")]
+
+	def get_facet_attributes(self):
+		if not self.item_group and not self.doc.enable_attribute_filters:
+			return []
+
+		return [row.attribute for row in self.doc.filter_attributes]
+
+	def get_facet_counts(self):
+		"""
+		Returns:
+		        dict: {"fields": {fieldname: {value: count}}, "attributes": {attribute: {value: count}}}
+		"""
+		counts = {"fields": {}, "attributes": {}}
+		if not (self.facet_fields or self.facet_attributes):
+			return counts
+
+		engine = self.get_candidate_engine()
+		if engine is None:
+			return counts
+
+		cache_key = self.get_cache_key(engine)
+		cached_counts = cache_codec.get_value(cache_key)
+		if cached_counts is not None:
+			return cached_counts
+
+		counts = self.count(self.get_facet_values(engine))
+		cache_codec.set_value(cache_key, counts, expires_in_sec=COUNT_CACHE_TTL)
+		return counts
+
+	def get_candidate_engine(self):
+		"""
+		Get a ProductQuery filtered on everything but the facet selections.
+
+		Returns:
+		        ProductQuery: None if non facet attribute filters match no items
+		"""
+		facet_fieldnames = {df.fieldname for df in self.facet_fields}
+		other_fields = {
+			field: values
+			for field, values in self.field_filters.items()
+			if field not in facet_fieldnames
+		}
+		other_attributes = {
+			attribute: values
+			for attribute, values in self.attribute_filters.items()
+			if attribute not in self.facet_attributes and values
+		}
+
+		# counts are cached for everyone priced like the listing, as the page is
+		engine = ProductQuery(price_list=self.price_list, customer_group=self.customer_group)
+		engine.user_state = False
+		engine.build_filters(
+			fields=other_fields,
+			search_term=self.search_term,
+			item_group=self.item_group,
+			price_min=self.price_min,
+			price_max=self.price_max,
+		)
+
+		if other_attributes:
+			item_codes = get_attribute_index().get_item_codes(other_attributes)
+			if not item_codes:
+				return None
+
+			engine.join_item_codes(item_codes)
+
+		return engine
+
+	def get_cache_key(self, engine):
+		signature = json.dumps(
+			[
+				engine.filters,
+				engine.or_filters,
+				engine.joins,
+				engine.conditions,
+				self.get_selection(),
+				[df.fieldname for df in self.facet_fields],
+				self.facet_attributes,
+			],
+			sort_keys=True,
+			default=str,
+		)
+		return get_count_cache_prefix() + FACET_CACHE_PREFIX + hashlib.md5(signature.encode()).hexdigest()
+
+	def get_facet_values(self, engine):
+		"""
+		Get the facet values of all candidate items in one query.
+
+		Returns:
+		        list: (item name, facet key, value) rows
+		"""
+		link_fields = [
+			df.fieldname
+			for df in self.facet_fields
+			if df.fieldtype == "Link" and df.fieldname != "primary_supplier"
+		]
+		candidate_fields = ", ".join(f"wi.`{field}`" for field in ["name", "item_code"] + link_fields)
+		# a CTE, so every branch reads the same candidates without repeating the query
+		candidates_query = (
+			f"select {candidate_fields} from ({engine.get_base_query(['name', 'item_code'] + link_fields)}) wi"
+			f" {engine.get_join_clause()}"
+		)
+
+		branches = []
+		for df in self.facet_fields:
+			facet = frappe.db.escape(self.get_facet_key("fields", df.fieldname))
+			if df.fieldname == "primary_supplier":
+				# suppliers are filtered on the child table, see `ProductQuery.build_supplier_filters`
+				branches.append(
+					f"""select candidates.name, {facet}, wis.supplier from candidates
+					inner join `tabWebsite Item Supplier` wis on wis.parent = candidates.name
+						and wis.parenttype = 'Website Item'"""
+				)
+			elif df.fieldtype == "Link":
+				branches.append(
+					f"""select candidates.name, {facet}, candidates.`{df.fieldname}` from candidates
+					where ifnull(candidates.`{df.fieldname}`, '') != ''"""
+				)
+			else:
+				child_fields = frappe.get_meta(df.options, cached=True).get("fields")
+				if not child_fields:
+					continue
+
+				branches.append(
+					f"""select candidates.name, {facet}, child.`{child_fields[0].fieldname}` from candidates
+					inner join `tab{df.options}` child on child.parent = candidates.name
+						and child.parenttype = 'Website Item'
+						and child.parentfield = {frappe.db.escape(df.fieldname)}"""
+				)
+
+		if self.facet_attributes:
+			branches.append(
+				f"""select candidates.name, concat('attributes:', iva.attribute), iva.attribute_value
+				from candidates
+				inner join `tabItem Variant Attribute` iva on iva.parent = candidates.item_code
+				where iva.attribute in ({", ".join(frappe.db.escape(a) for a in self.facet_attributes)})
+					and ifnull(iva.attribute_value, '') != ''"""
+			)
+
+		if not branches:
+			return []
+
+		query = f"with candidates as ({candidates_query}) " + " union all ".join(branches)
+		return frappe.db.sql(query)  # nosemgrep
+
+	def count(self, rows):
+		"""
+		Count items per facet value, over items matching the selection of the other facets.
+
+		Args:
+		        rows (list): (item name, facet key, value) rows of candidate items
+
+		Returns:
+		        dict: {"fields": {fieldname: {value: count}}, "attributes": {attribute: {value: count}}}
+		"""
+		ordinals, value_ordinals = {}, {}
+		for name, facet, value in rows:
+			ordinal = ordinals.setdefault(name, len(ordinals))
+			value_ordinals.setdefault(facet, {}).setdefault(value, []).append(ordinal)
+
+		postings = {
+			facet: {value: make_bitset(item_ordinals) for value, item_ordinals in values.items()}
+			for facet, values in value_ordinals.items()
+		}
+
+		selection_masks = {}
+		for facet, selected in self.get_selection().items():
+			values = postings.get(facet, {})
+			mask = 0
+			for value in selected:
+				mask |= values.get(value, 0)
+			selection_masks[facet] = mask
+
+		all_items = (1 << len(ordinals)) - 1
+		counts = {"fields": {}, "attributes": {}}
+		for facet, values in postings.items():
+			mask = all_items
+			for other_facet, selection_mask in selection_masks.items():
+				if other_facet != facet:
+					mask &= selection_mask
+
+			group, key = facet.split(":", 1)
+			counts[group][key] = {value: bin(bitset & mask).count("1") for value, bitset in values.items()}
+
+		return counts
+
+	def get_selection(self):
+		"""
+		Returns:
+		        dict: {facet key: list of selected values} for facets with a selection
+		"""
+		selection = {}
+		for df in self.facet_fields:
+			values = self.field_filters.get(df.fieldname)
+			if values:
+				selection[self.get_facet_key("fields", df.fieldname)] = (
+					values if isinstance(values, list) else [values]
+				)
+
+		for attribute in self.facet_attributes:
+			values = self.attribute_filters.get(attribute)
+			if values:
+				# ranges of numeric attributes select the values within
+				selection[self.get_facet_key("attributes", attribute)] = (
+					get_attribute_index().get_values(attribute, values)
+				)
+
+		return selection
+
+	@staticmethod
+	def get_facet_key(group, name):
+		return f"{group}:{name}"
@@ -1,8 +1,23 @@
 # Copyright (c) 2021, Frappe Technologies Pvt. Ltd. and Contributors
 # License: GNU General Public License v3. See license.txt
+import hashlib
+import json
+
 import frappe
 from frappe import _
-from frappe.utils import floor
+from frappe.utils import cint, cstr, floor, flt
+
+from webshop.webshop.product_data_engine.attribute_index import ATTRIBUTE_INDEX_VERSION_KEY
+from webshop.webshop.product_data_engine.listing_cache import (
+	get_cached_listing,
+	get_listing_tags,
+	set_cached_listing,
+)
+from webshop.webshop.product_data_engine.query import ProductQuery
+
+# cached with listing pages, see `listing_cache`
+FIELD_FILTER_CACHE_PREFIX = "product_filter:field_values:"
+ATTRIBUTE_FILTER_CACHE_PREFIX = "product_filter:attribute_values:"
 
 
 class ProductFiltersBuilder:
@@ -15,12 +30,19 @@ class ProductFiltersBuilder:
 		self.item_group = item_group
 
 	def get_field_filters(self):
-		from webshop.webshop.doctype.override_doctype.item_group import get_child_groups_for_website
+		"""
+		Get the values to filter listings of the item group (or all products) on, per filter field.
 
+		Values of Link, Select and Check fields are read from the Website Items in scope
+		with one query, cached until Website Items of the scope change.
+
+		Returns:
+		        list: [docfield, values] per filter field with values
+		"""
 		if not self.item_group and not self.doc.enable_field_filters:
 			return
 
-		fields, filter_data = [], []
+		filter_data = []
 		filter_fields = [row.fieldname for row in self.doc.filter_fields]  # fields in settings
 
 		# filter valid field filters i.e. those that exist in Website Item
@@ -29,76 +51,27 @@ class ProductFiltersBuilder:
 			web_item_meta.get_field(field) for field in filter_fields if web_item_meta.has_field(field)
 		]
 
-		for df in fields:
-			item_filters, item_or_filters = {"published": 1}, []
-			link_doctype_values = self.get_filtered_link_doctype_records(df)
+		scoped_values = self.get_scoped_field_values(
+			[df for df in fields if df.fieldtype in ("Link", "Select", "Check")]
+		)
+		link_values = self.get_valid_link_values(
+			[df for df in fields if df.fieldtype == "Link"], scoped_values
+		)
 
+		for df in fields:
 			if df.fieldtype == "Link":
-				# Special handling for primary_supplier - get from child table
-				if df.fieldname == "primary_supplier":
-					values = self.get_supplier_filter_values(item_filters, item_or_filters, link_doctype_values)
-				else:
-					if self.item_group:
-						include_child = frappe.db.get_value("Item Group", self.item_group, "include_descendants")
-						if include_child:
-							include_groups = get_child_groups_for_website(self.item_group, include_self=True)
-							include_groups = [x.name for x in include_groups]
-							item_or_filters.extend(
-								[
-									["item_group", "in", include_groups],
-									["Website Item Group", "item_group", "=", self.item_group],  # consider website item groups
-								]
-							)
-						else:
-							item_or_filters.extend(
-								[
-									["item_group", "=", self.item_group],
-									["Website Item Group", "item_group", "=", self.item_group],  # consider website item groups
-								]
-							)
-
-					# exclude variants if mentioned in settings
-					if frappe.db.get_single_value("Webshop Settings", "hide_variants"):
-						item_filters["variant_of"] = ["is", "not set"]
-
-					# Get link field values attached to published items
-					item_values = frappe.get_all(
-						"Website Item",
-						fields=[df.fieldname],
-						filters=item_filters,
-						or_filters=item_or_filters,
-						distinct="True",
-						pluck=df.fieldname,
-					)
-
-					values = list(set(item_values) & link_doctype_values)  # intersection of both
-			elif df.fieldtype in ["Check", "Select"]:
-				# Check and Select field types - special handling
-				if df.fieldtype == "Check":
-					# For Check fields, check if any items have it set to "Evet"
-					# Template will show single checkbox with field label
-					# Values list intentionally empty - template doesn't need values for Check
-					check_count = frappe.db.count(
-						"Website Item",
-						filters={"published": 1, df.fieldname: "Evet"}
-					)
-					# Empty list - template will show only checkbox + label without iterating values
-					values = [] if check_count > 0 else None
-				else:
-					# For Select fields, get all distinct non-null values
-					# Skip "Hayır" to show only positive selections
-					item_values = frappe.get_all(
-						"Website Item",
-						fields=[df.fieldname],
-						filters=item_filters,
-						or_filters=item_or_filters,
-						distinct="True",
-						pluck=df.fieldname,
-					)
-					values = [v for v in item_values if v and v != "Hayır"]
+				values = link_values.get(df.fieldname, [])
+			elif df.fieldtype == "Check":
+				# Template shows a single checkbox with the field label, without values
+				# None means no items have this check enabled
+				checked = any(cstr(v) in ("1", "Evet") for v in scoped_values.get(df.fieldname, []))
+				values = [] if checked else None
+			elif df.fieldtype == "Select":
+				# Skip "Hayır" to show only positive selections
+				values = [v for v in scoped_values.get(df.fieldname, []) if v and v != "Hayır"]
 			else:
 				# table multiselect
-				values = list(link_doctype_values)
+				values = list(self.get_filtered_link_doctype_records(df))
 
 			# Remove None
 			if values and None in values:
@@ -107,66 +80,94 @@ class ProductFiltersBuilder:
 			# For Check fields, add even if values is empty list
 			# For other fields, only add if values exist
 			if df.fieldtype == "Check":
-				if values is not None:  # None means no items have this check enabled
+				if values is not None:
 					filter_data.append([df, values])
 			elif values:
 				filter_data.append([df, values])
 
 		return filter_data
 
-	def get_supplier_filter_values(self, item_filters, item_or_filters, link_doctype_values):
+	def get_scoped_field_values(self, fields):
 		"""
-		Get all unique suppliers from Website Item Supplier child table.
-		This allows filtering by ALL suppliers, not just primary_supplier.
-		
-		Args:
-			item_filters: Filters for Website Item
-			item_or_filters: OR filters for Website Item
-			link_doctype_values: Valid Supplier records
-			
+		Get distinct values of `fields` over published Website Items of the item group
+		(including its Website Item Groups and, if set, descendants), in one query.
+		Suppliers are read from the Website Item Supplier table, not `primary_supplier`.
+
 		Returns:
-			list: List of unique supplier names
+		        dict: {fieldname: sorted list of distinct values}
 		"""
-		from webshop.webshop.doctype.override_doctype.item_group import get_child_groups_for_website
-		
-		# Build parent filters for Website Item
-		parent_filters = [["published", "=", 1]]
-		
-		if self.item_group:
-			include_child = frappe.db.get_value("Item Group", self.item_group, "include_descendants")
-			if include_child:
-				include_groups = get_child_groups_for_website(self.item_group, include_self=True)
-				include_groups = [x.name for x in include_groups]
-				parent_filters.append(["item_group", "in", include_groups])
+		if not fields:
+			return {}
+
+		fieldnames = [df.fieldname for df in fields]
+		cache_key = FIELD_FILTER_CACHE_PREFIX + hashlib.md5(
+			json.dumps([self.item_group, fieldnames]).encode()
+		).hexdigest()
+		field_values = get_cached_listing(cache_key)[0]
+		if field_values is not None:
+			return field_values
+
+		engine = ProductQuery(settings=None if self.item_group else self.doc)
+		engine.build_filters(item_group=self.item_group)
+		scope = engine.get_base_query(["name"] + [f for f in fieldnames if f != "primary_supplier"])
+
+		branches = []
+		for fieldname in fieldnames:
+			if fieldname == "primary_supplier":
+				branches.append(
+					f"""select {frappe.db.escape(fieldname)}, wis.supplier from ({scope}) wi
+					inner join `tabWebsite Item Supplier` wis on wis.parent = wi.name
+						and wis.parenttype = 'Website Item'
+					group by wis.supplier"""
+				)
 			else:
-				parent_filters.append(["item_group", "=", self.item_group])
-		
-		# exclude variants if mentioned in settings
-		if frappe.db.get_single_value("Webshop Settings", "hide_variants"):
-			parent_filters.append(["variant_of", "is", "not set"])
-		
-		# Get all Website Items that match filters
-		website_items = frappe.get_all(
-			"Website Item",
-			filters=parent_filters,
-			pluck="name"
-		)
-		
-		if not website_items:
-			return []
-		
-		# Get all unique suppliers from child table
-		suppliers = frappe.get_all(
-			"Website Item Supplier",
-			filters={"parent": ["in", website_items]},
-			pluck="supplier",
-			distinct=True
-		)
-		
-		# Intersection with valid link doctype values
-		values = list(set(suppliers) & link_doctype_values)
-		return values
-	
+				branches.append(
+					f"select {frappe.db.escape(fieldname)}, wi.`{fieldname}` from ({scope}) wi"
+					f" where ifnull(wi.`{fieldname}`, '') != '' group by wi.`{fieldname}`"
+				)
+
+		field_values = {fieldname: [] for fieldname in fieldnames}
+		for fieldname, value in frappe.db.sql(" union all ".join(branches)):  # nosemgrep
+			field_values[fieldname].append(value)
+
+		for values in field_values.values():
+			values.sort(key=str)
+
+		set_cached_listing(cache_key, field_values, get_listing_tags(item_group=self.item_group))
+		return field_values
+
+	def get_valid_link_values(self, fields, scoped_values):
+		"""
+		Keep values of Link fields that are valid records of the linked doctype
+		(e.g. enabled, shown in website), checked for all fields in one query.
+
+		Returns:
+		        dict: {fieldname: list of valid values}
+		"""
+		branches = []
+		for df in fields:
+			values = scoped_values.get(df.fieldname)
+			link_doctype = df.get_link_doctype()
+			if not (values and link_doctype):
+				continue
+
+			meta = frappe.get_meta(link_doctype, cached=True)
+			conditions = [f"name in ({', '.join(frappe.db.escape(v) for v in values)})"]
+			conditions += [
+				f"`{field}` = {cint(value)}" for field, value in self.get_link_doctype_filters(meta).items()
+			]
+			branches.append(
+				f"select {frappe.db.escape(df.fieldname)}, name from `tab{link_doctype}`"
+				f" where {' and '.join(conditions)}"
+			)
+
+		link_values = {}
+		if branches:
+			for fieldname, name in frappe.db.sql(" union all ".join(branches)):  # nosemgrep
+				link_values.setdefault(fieldname, []).append(name)
+
+		return link_values
+
 	def get_filtered_link_doctype_records(self, field):
 		"""
 		Get valid link doctype records depending on filters.
@@ -206,6 +207,16 @@ class ProductFiltersBuilder:
 		return filters
 
 	def get_attribute_filters(self):
+		"""
+		Get the attribute values to filter listings of the item group (or all products) on.
+
+		Values are those of published items in scope, in the order of the Item Attribute's
+		values. Numeric attributes get their `min_value` and `max_value` instead. They are
+		cached until items, Website Items of the scope or Item Attributes change.
+
+		Returns:
+		        list: frappe._dict(name, item_attribute_values) per attribute with values
+		"""
 		if not self.item_group and not self.doc.enable_attribute_filters:
 			return
 
@@ -214,16 +225,50 @@ class ProductFiltersBuilder:
 		if not attributes:
 			return []
 
-		result = frappe.get_all(
-			"Item Variant Attribute",
-			filters={"attribute": ["in", attributes], "attribute_value": ["is", "set"]},
-			fields=["attribute", "attribute_value"],
-			distinct=True,
+		# the attribute index version changes with items and Item Attributes
+		signature = [self.item_group, attributes, frappe.cache().get_value(ATTRIBUTE_INDEX_VERSION_KEY)]
+		cache_key = ATTRIBUTE_FILTER_CACHE_PREFIX + hashlib.md5(
+			json.dumps(signature).encode()
+		).hexdigest()
+
+		out = get_cached_listing(cache_key)[0]
+		if out is None:
+			out = self.get_scoped_attribute_values(attributes)
+			set_cached_listing(cache_key, out, get_listing_tags(item_group=self.item_group))
+
+		return [frappe._dict(attribute) for attribute in out]
+
+	def get_scoped_attribute_values(self, attributes):
+		"""
+		Returns:
+		        list: {"name", "item_attribute_values"} per attribute with values in scope,
+		                with "numeric_values", "min_value" & "max_value" for numeric attributes
+		"""
+		numeric_attributes = set(
+			frappe.get_all(
+				"Item Attribute", filters={"name": ["in", attributes], "numeric_values": 1}, pluck="name"
+			)
+		)
+
+		engine = ProductQuery(settings=None if self.item_group else self.doc)
+		engine.build_filters(item_group=self.item_group)
+		rows = frappe.db.sql(
+			f"""
+			select iva.attribute, iva.attribute_value
+			from `tabItem Variant Attribute` iva
+			inner join ({engine.get_base_query(["item_code"])}) wi on wi.item_code = iva.parent
+			left join `tabItem Attribute Value` iav
+				on iav.parent = iva.attribute and iav.attribute_value = iva.attribute_value
+			where iva.attribute in ({", ".join(frappe.db.escape(a) for a in attributes)})
+				and ifnull(iva.attribute_value, '') != ''
+			group by iva.attribute, iva.attribute_value
+			order by min(ifnull(iav.idx, 999999)), iva.attribute_value
+			"""  # nosemgrep
 		)
 
 		attribute_value_map = {}
-		for d in result:
-			attribute_value_map.setdefault(d.attribute, []).append(d.attribute_value)
+		for attribute, attribute_value in rows:
+			attribute_value_map.setdefault(attribute, []).append(attribute_value)
 
 		out = []
 		for attribute in attributes:
@@ -231,7 +276,19 @@ class ProductFiltersBuilder:
 				continue
 
 			values = attribute_value_map[attribute]
-			out.append(frappe._dict(name=attribute, item_attribute_values=values))
+			if attribute in numeric_attributes:
+				numbers = [flt(value) for value in values]
+				out.append(
+					{
+						"name": attribute,
+						"item_attribute_values": [],
+						"numeric_values": 1,
+						"min_value": min(numbers),
+						"max_value": max(numbers),
+					}
+				)
+			else:
+				out.append({"name": attribute, "item_attribute_values": values})
 
 		return out
 
@@ -0,0 +1,365 @@
+# Copyright (c) 2021, Frappe Technologies Pvt. Ltd. and Contributors
+# License: GNU General Public License v3. See license.txt
+
+import frappe
+from frappe.utils import cint, flt, fmt_money, nowdate
+
+from webshop.webshop.product_data_engine.item_group_tree import get_item_group_tree
+
+
+class ProductHydrator:
+	"""Resolve display details for a whole page of Website Items at once.
+
+	Each detail (item master data, prices, stock, wishlist) is fetched with
+	one set-based query for all items on the page, so the cost of a page
+	does not grow with the number of items on it.
+
+	Attributes:
+	        items (list): Website Item rows of the page
+	        settings (Document): Webshop Settings DocType
+	"""
+
+	def __init__(self, items, settings):
+		self.items = items
+		self.settings = settings
+		self.item_codes = [item.item_code for item in items]
+		self._item_details = None
+
+	@property
+	def item_details(self):
+		"Item master data (template, uoms, stock item, grouping) for the page."
+		if self._item_details is None:
+			self._item_details = {}
+			if self.item_codes:
+				rows = frappe.get_all(
+					"Item",
+					fields=[
+						"name",
+						"variant_of",
+						"stock_uom",
+						"sales_uom",
+						"is_stock_item",
+						"item_group",
+						"brand",
+					],
+					filters={"name": ["in", self.item_codes]},
+				)
+				self._item_details = {row.name: row for row in rows}
+
+		return self._item_details
+
+	def get_prices(self, price_list=None, for_party=True, customer_group=None):
+		"""
+		Get prices for the session user, if prices are to be shown on the website.
+
+		Args:
+		        price_list (str, optional): Selling Price List, resolved from the party if not set
+		        for_party (bool, optional): Apply Pricing Rules of the session's party, off for pages
+		                shared between users of a price list
+		        customer_group (str, optional): Customer Group to apply Pricing Rules of, the default
+		                one of Webshop Settings if not set
+
+		Returns:
+		        dict: {item_code: price object} in the shape of `erpnext.utilities.product.get_price`
+		"""
+		from webshop.webshop.shopping_cart.cart import _set_price_list, get_party
+
+		if not (self.item_codes and self.settings.enabled and self.settings.show_price):
+			return {}
+
+		is_guest = frappe.session.user == "Guest"
+		if is_guest and self.settings.hide_price_for_guest:
+			return {}
+
+		# resolve party and price list once for the whole page
+		party = get_party() if for_party else None
+		price_list = price_list or _set_price_list(self.settings, None)
+		if not price_list:
+			return {}
+
+		return self.resolve_prices(price_list, party=party, customer_group=customer_group)
+
+	def resolve_prices(self, price_list, party=None, customer_group=None):
+		"""
+		Args:
+		        price_list (str): Selling Price List
+		        party (Document, optional): Customer to resolve party specific Pricing Rules for
+		        customer_group (str, optional): Customer Group to resolve Pricing Rules for, the
+		                default one of Webshop Settings if not set
+
+		Returns:
+		        dict: {item_code: price object} for items that have a price in `price_list`
+		"""
+		from erpnext.utilities.product import get_price
+
+		item_prices = self.get_item_prices(price_list)
+		rule_candidates = self.get_pricing_rule_candidates()
+
+		prices = {}
+		for item_code in self.item_codes:
+			if item_code not in item_prices:
+				continue
+
+			if item_code in rule_candidates:
+				# rules may apply, let ERPNext resolve them for this item only
+				price = get_price(
+					item_code,
+					price_list,
+					customer_group or self.settings.default_customer_group,
+					self.settings.company,
+					party=party,
+				)
+				if price:
+					price.mrp = item_prices[item_code].price_list_rate
+					prices[item_code] = price
+				continue
+
+			price = item_prices[item_code]
+			prices[item_code] = frappe._dict(
+				price_list_rate=price.price_list_rate,
+				mrp=price.price_list_rate,
+				currency=price.currency,
+				formatted_price=fmt_money(price.price_list_rate, currency=price.currency),
+			)
+
+		return prices
+
+	def get_item_prices(self, price_list):
+		"""
+		Get Item Prices of the page in one query, variants fall back to their template's price.
+
+		Returns:
+		        dict: {item_code: Item Price row}
+		"""
+		templates = {
+			code: details.variant_of
+			for code, details in self.item_details.items()
+			if details.variant_of and details.variant_of != code
+		}
+
+		rows = frappe.get_all(
+			"Item Price",
+			fields=["item_code", "price_list_rate", "currency"],
+			filters={
+				"price_list": price_list,
+				"item_code": ["in", list(set(self.item_codes) | set(templates.values()))],
+			},
+		)
+
+		price_map = {}
+		for row in rows:
+			price_map.setdefault(row.item_code, row)
+
+		item_prices = {}
+		for item_code in self.item_codes:
+			price = price_map.get(item_code) or price_map.get(templates.get(item_code))
+			if price:
+				item_prices[item_code] = price
+
+		return item_prices
+
+	def get_pricing_rule_candidates(self):
+		"""
+		Get items of the page that an active selling Pricing Rule may apply to.
+		Over-approximates: candidates are re-checked by ERPNext's pricing rule engine.
+
+		Returns:
+		        set: Item codes
+		"""
+		today = nowdate()
+		rules = frappe.db.sql(
+			"""
+			select pr.apply_on, pric.item_code, prig.item_group, prb.brand
+			from `tabPricing Rule` pr
+			left join `tabPricing Rule Item Code` pric on pric.parent = pr.name
+			left join `tabPricing Rule Item Group` prig on prig.parent = pr.name
+			left join `tabPricing Rule Brand` prb on prb.parent = pr.name
+			where pr.disable = 0 and pr.selling = 1
+				and ifnull(pr.valid_from, %(today)s) <= %(today)s
+				and ifnull(pr.valid_upto, %(today)s) >= %(today)s
+			""",
+			{"today": today},
+			as_dict=True,
+		)
+
+		if not rules:
+			return set()
+
+		if any(rule.apply_on == "Transaction" for rule in rules):
+			return set(self.item_codes)
+
+		rule_items = {rule.item_code for rule in rules if rule.item_code}
+		rule_brands = {rule.brand for rule in rules if rule.brand}
+		rule_groups = {rule.item_group for rule in rules if rule.item_group}
+		group_bounds = self.get_item_group_bounds(
+			rule_groups | {d.item_group for d in self.item_details.values() if d.item_group}
+		)
+
+		candidates = set()
+		for item_code in self.item_codes:
+			details = self.item_details.get(item_code) or frappe._dict()
+			if item_code in rule_items or (details.variant_of and details.variant_of in rule_items):
+				candidates.add(item_code)
+			elif details.brand and details.brand in rule_brands:
+				candidates.add(item_code)
+			elif details.item_group and self.is_in_any_group(
+				details.item_group, rule_groups, group_bounds
+			):
+				candidates.add(item_code)
+
+		return candidates
+
+	@staticmethod
+	def get_item_group_bounds(item_groups):
+		if not item_groups:
+			return {}
+
+		groups = get_item_group_tree().groups
+		return {
+			name: (groups[name].lft, groups[name].rgt) for name in item_groups if name in groups
+		}
+
+	@staticmethod
+	def is_in_any_group(item_group, groups, group_bounds):
+		"Check if `item_group` is one of `groups` or their descendants."
+		if item_group not in group_bounds:
+			return item_group in groups
+
+		lft, rgt = group_bounds[item_group]
+		for group in groups:
+			bounds = group_bounds.get(group)
+			if bounds and bounds[0] <= lft and bounds[1] >= rgt:
+				return True
+
+		return False
+
+	def get_stock_availability(self):
+		"""
+		Returns:
+		        dict: {item_code: in stock (bool)} for the page
+		"""
+		from erpnext.stock.doctype.warehouse.warehouse import get_child_warehouses
+
+		from webshop.webshop.utils.product import get_non_stock_item_status
+
+		availability = {}
+		item_warehouses, bundle_candidates = {}, []
+
+		for item in self.items:
+			availability[item.item_code] = False
+			is_stock_item = cint((self.item_details.get(item.item_code) or {}).get("is_stock_item"))
+			warehouse = item.get("website_warehouse")
+
+			if item.get("on_backorder"):
+				continue
+
+			if not is_stock_item:
+				if warehouse:
+					bundle_candidates.append(item.item_code)
+				else:
+					availability[item.item_code] = True
+			elif warehouse:
+				item_warehouses[item.item_code] = warehouse
+
+		if bundle_candidates:
+			bundles = set(
+				frappe.get_all(
+					"Product Bundle",
+					filters={"new_item_code": ["in", bundle_candidates]},
+					pluck="new_item_code",
+				)
+			)
+			for item_code in bundle_candidates:
+				# product bundle case
+				availability[item_code] = (
+					bool(get_non_stock_item_status(item_code, "website_warehouse"))
+					if item_code in bundles
+					else True
+				)
+
+		if not item_warehouses:
+			return availability
+
+		# expand group warehouses once per distinct warehouse
+		warehouse_map = {}
+		for warehouse in set(item_warehouses.values()):
+			if frappe.get_cached_value("Warehouse", warehouse, "is_group") == 1:
+				warehouse_map[warehouse] = get_child_warehouses(warehouse)
+			else:
+				warehouse_map[warehouse] = [warehouse]
+
+		all_warehouses = {wh for warehouses in warehouse_map.values() for wh in warehouses}
+		bins = frappe.get_all(
+			"Bin",
+			fields=["item_code", "warehouse", "actual_qty"],
+			filters={
+				"item_code": ["in", list(item_warehouses)],
+				"warehouse": ["in", list(all_warehouses)],
+			},
+		)
+
+		stock_qty = {}
+		for row in bins:
+			stock_qty[(row.item_code, row.warehouse)] = flt(row.actual_qty)
+
+		for item_code, warehouse in item_warehouses.items():
+			qty = sum(stock_qty.get((item_code, wh), 0.0) for wh in warehouse_map[warehouse])
+			availability[item_code] = bool(qty)
+
+		return availability
+
+	def get_user_state(self, with_cart=True):
+		"""
+		Get cart quantities and wishlist flags of the session user for the page, in one query.
+
+		Args:
+		        with_cart (bool, optional): Look up the shopping cart
+
+		Returns:
+		        tuple: ({item_code: qty in cart}, set of item codes in the wishlist)
+		"""
+		from webshop.webshop.doctype.item_review.item_review import get_customer
+
+		cart_items, wishlist_items = {}, set()
+		if not self.item_codes or frappe.session.user == "Guest":
+			return cart_items, wishlist_items
+
+		customer = get_customer(silent=True) if with_cart else None
+		rows = frappe.db.sql(
+			"""
+			select 'wishlist', item_code, 0
+			from `tabWishlist Item`
+			where parent = %(user)s and item_code in %(item_codes)s
+			union all
+			select 'cart', qi.item_code, qi.qty
+			from `tabQuotation Item` qi
+			where qi.item_code in %(item_codes)s
+				and qi.parent = (
+					select q.name from `tabQuotation` q
+					where q.party_name = %(customer)s
+						and q.contact_email = %(user)s
+						and q.order_type = 'Shopping Cart'
+						and q.docstatus = 0
+					order by q.modified desc
+					limit 1
+				)
+			""",
+			{"user": frappe.session.user, "item_codes": self.item_codes, "customer": customer},
+		)
+
+		for source, item_code, qty in rows:
+			if source == "cart":
+				cart_items[item_code] = qty
+			else:
+				wishlist_items.add(item_code)
+
+		return cart_items, wishlist_items
+
+	def apply_user_state(self, with_cart=True):
+		"Set the session user's cart quantities and wishlist flags on the page items."
+		cart_items, wishlist_items = self.get_user_state(with_cart=with_cart)
+
+		for item in self.items:
+			item.in_cart = item.item_code in cart_items
+			item.qty = cart_items.get(item.item_code, 0)
+			item.wished = item.item_code in wishlist_items
@@ -0,0 +1,137 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and Contributors
+# License: GNU General Public License v3. See license.txt
+
+from bisect import bisect_left, bisect_right
+
+import frappe
+
+ITEM_GROUP_TREE_VERSION_KEY = "webshop_item_group_tree_version"
+
+# site -> ItemGroupTree, kept for the lifetime of the worker process
+_item_group_trees = {}
+
+
+class ItemGroupTree:
+	"""Snapshot of the Item Group nested set.
+
+	Groups are sorted by lft, so the descendants of a group are the
+	contiguous run of groups with lft between its lft and rgt, found with
+	bisect. Ancestors are walked up the parent map.
+
+	The snapshot lives in the worker process and is reloaded when the
+	version stamp in Redis changes (see `bump_item_group_tree_version`).
+
+	Attributes:
+	        groups (dict): {name: group}, with lft, rgt, parent_item_group, route & show_in_website
+	        names (list): Group names sorted by lft
+	        lfts (list): lft of `names`, for bisect
+	        children (dict): {name: names of immediate child groups, sorted by lft}
+	        missing (set): Looked up names that are no Item Group, forgotten on reload
+	"""
+
+	def __init__(self):
+		self.version = None
+		self.groups = {}
+		self.names = []
+		self.lfts = []
+		self.children = {}
+		self.missing = set()
+
+	def ensure_fresh(self):
+		version = frappe.cache().get_value(ITEM_GROUP_TREE_VERSION_KEY)
+		if version is None:
+			version = bump_item_group_tree_version()
+
+		if version != self.version:
+			self.build()
+			self.version = version
+
+	def build(self):
+		rows = frappe.get_all(
+			"Item Group",
+			fields=["name", "lft", "rgt", "parent_item_group", "route", "show_in_website"],
+			order_by="lft asc",
+		)
+
+		groups, children = {}, {}
+		for row in rows:
+			groups[row.name] = row
+			if row.parent_item_group:
+				children.setdefault(row.parent_item_group, []).append(row.name)
+
+		# groups being inserted have no bounds yet
+		nested = [row for row in rows if row.lft is not None]
+		self.groups, self.children = groups, children
+		self.missing = set()
+		self.names = [row.name for row in nested]
+		self.lfts = [row.lft for row in nested]
+
+	def get_descendants(self, item_group, include_self=False):
+		"""
+		Returns:
+		        list: Groups under `item_group`, in lft order
+		"""
+		group = self.groups.get(item_group)
+		if not (group and group.lft is not None):
+			return []
+
+		start = (bisect_left if include_self else bisect_right)(self.lfts, group.lft)
+		end = bisect_left(self.lfts, group.rgt, lo=start)
+		return [self.groups[name] for name in self.names[start:end]]
+
+	def get_children(self, item_group):
+		"""
+		Returns:
+		        list: Immediate child groups of `item_group`, in lft order
+		"""
+		return [self.groups[name] for name in self.children.get(item_group, [])]
+
+	def get_ancestors(self, item_group, include_self=False):
+		"""
+		Returns:
+		        list: Groups above `item_group` from the root down, in lft order
+		"""
+		ancestors = []
+		group = self.groups.get(item_group)
+		if group and include_self:
+			ancestors.append(group)
+
+		while group and group.parent_item_group:
+			group = self.groups.get(group.parent_item_group)
+			if group:
+				ancestors.append(group)
+
+		return ancestors[::-1]
+
+
+def get_item_group_tree(item_group=None):
+	"""
+	Get the up to date Item Group tree of the current site.
+
+	Args:
+	        item_group (str, optional): Group to be looked up, reloads the tree if it is missing
+	                but exists, e.g. when it is looked up while being inserted. Unknown names
+	                are remembered until the next reload, so they do not reload the tree again.
+	"""
+	tree = _item_group_trees.setdefault(frappe.local.site, ItemGroupTree())
+	tree.ensure_fresh()
+	if item_group and item_group not in tree.groups and item_group not in tree.missing:
+		if frappe.db.exists("Item Group", item_group):
+			tree.build()
+		else:
+			tree.missing.add(item_group)
+
+	return tree
+
+
+def bump_item_group_tree_version():
+	"Mark Item Group trees of all workers as stale."
+	version = frappe.generate_hash(length=10)
+	frappe.cache().set_value(ITEM_GROUP_TREE_VERSION_KEY, version)
+	return version
+
+
+def on_item_group_change(doc, method=None, *args, **kwargs):
+	"Reload the tree for the rest of this request, and for other workers once the change is committed."
+	bump_item_group_tree_version()
+	frappe.db.after_commit.add(bump_item_group_tree_version)
@@ -0,0 +1,255 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and Contributors
+# License: GNU General Public License v3. See license.txt
+
+"""
+Cache of listing pages served by `get_product_filter_data`, and of the
+filter values they are rendered with.
+
+Every entry is tagged with what it depends on: its item group (or the
+whole catalog), its price list and its filter fields. Each tag has a
+version counter in Redis, and an entry stores the versions it was built
+with. Bumping a tag version invalidates all entries carrying the tag at
+once, so entries can live long.
+
+Entries are fresh for `LISTING_CACHE_SOFT_TTL`. Until `LISTING_CACHE_TTL`
+they are still served, while one background job rebuilds them. Misses are
+single-flight: one worker builds a page, concurrent requests for it wait.
+"""
+
+import time
+
+import frappe
+from frappe.utils import cint, flt
+from redis import Redis
+
+from webshop.webshop.product_data_engine.hydration import ProductHydrator
+from webshop.webshop.product_data_engine.item_group_tree import get_item_group_tree
+from webshop.webshop.utils import cache_codec
+
+LISTING_CACHE_PREFIX = "product_filter:"
+LISTING_CACHE_TTL = 60 * 60  # seconds, entries are dropped after
+LISTING_CACHE_SOFT_TTL = 10 * 60  # seconds, entries are rebuilt in the background after
+TAG_VERSION_PREFIX = "product_filter_tag:"
+LOCK_PREFIX = "product_filter_lock:"
+LOCK_TTL = 30  # seconds, upper bound of building a page
+LOCK_WAIT = 2  # seconds, waited for a page another worker builds
+LOCK_POLL_INTERVAL = 0.05  # seconds
+# hash of {website item: 1 if in stock}, as last seen by `on_bin_change`
+STOCK_STATE_KEY = "product_filter_in_stock"
+
+# tag of every entry, bumped when listings change as a whole
+ALL_TAG = "all"
+# tag of listings across item groups (all products, search)
+CATALOG_TAG = "catalog"
+
+
+def get_listing_tags(item_group=None, price_list=None, field_filters=None):
+	"""
+	Returns:
+	        list: Tags of a listing page
+	"""
+	tags = [ALL_TAG, f"item_group:{item_group}" if item_group else CATALOG_TAG]
+	if price_list:
+		tags.append(f"price_list:{price_list}")
+	for field in sorted(field_filters or {}):
+		tags.append(f"field:{field}")
+
+	return tags
+
+
+def get_tag_versions(tags):
+	"""
+	Returns:
+	        dict: {tag: current version}, in one round trip
+	"""
+	if not tags:
+		return {}
+
+	cache = frappe.cache()
+	# plain redis mget, versions are counters, not pickled values
+	versions = Redis.mget(cache, [cache.make_key(TAG_VERSION_PREFIX + tag) for tag in tags])
+	return {tag: cint(version) for tag, version in zip(tags, versions)}
+
+
+def bump_tags(tags):
+	"Invalidate all listing pages carrying any of `tags`."
+	if not tags:
+		return
+
+	cache = frappe.cache()
+	pipeline = cache.pipeline()
+	for tag in set(tags):
+		pipeline.incr(cache.make_key(TAG_VERSION_PREFIX + tag))
+	pipeline.execute()
+
+
+def get_cached_listing(key):
+	"""
+	Returns:
+	        tuple: (cached listing page, is stale), page is None if missing or any of its tags
+	                was bumped since
+	"""
+	entry = cache_codec.get_value(key)
+	if not entry:
+		return None, False
+
+	if get_tag_versions(list(entry["tags"])) != entry["tags"]:
+		return None, False
+
+	return entry["response"], time.time() > flt(entry.get("fresh_until"))
+
+
+def set_cached_listing(key, response, tags):
+	# versions are read before the page is stored, a concurrent bump leaves it stale
+	entry = {
+		"tags": get_tag_versions(tags),
+		"fresh_until": time.time() + LISTING_CACHE_SOFT_TTL,
+		"response": response,
+	}
+	cache_codec.set_value(key, entry, expires_in_sec=LISTING_CACHE_TTL)
+
+
+def get_or_build_listing(key, build, refresh):
+	"""
+	Get a listing page from the cache, building it at most once at a time.
+
+	Args:
+	        key (str): Cache key of the page
+	        build (callable): Builds, caches and returns the page
+	        refresh (callable): Enqueues a rebuild of a stale page, which calls `release_lock(key)`
+
+	Returns:
+	        dict: Listing page
+	"""
+	response, stale = get_cached_listing(key)
+	if response is not None:
+		if stale and acquire_lock(key):
+			refresh()
+		return response
+
+	if not acquire_lock(key):
+		response = wait_for_listing(key)
+		if response is not None:
+			return response
+
+	try:
+		return build()
+	finally:
+		release_lock(key)
+
+
+def wait_for_listing(key):
+	"""
+	Wait for a page another worker is building.
+
+	Returns:
+	        dict: Listing page, None if it is not built within `LOCK_WAIT`
+	"""
+	deadline = time.monotonic() + LOCK_WAIT
+	while time.monotonic() < deadline:
+		time.sleep(LOCK_POLL_INTERVAL)
+		response, stale = get_cached_listing(key)
+		if response is not None:
+			return response
+
+	return None
+
+
+def acquire_lock(key):
+	"Returns True if this worker is now the only one building the page."
+	cache = frappe.cache()
+	# plain redis set, lock values are not pickled
+	return bool(Redis.set(cache, cache.make_key(LOCK_PREFIX + key), 1, nx=True, ex=LOCK_TTL))
+
+
+def release_lock(key):
+	cache = frappe.cache()
+	Redis.delete(cache, cache.make_key(LOCK_PREFIX + key))
+
+
+def get_item_group_tags(item_groups, catalog=True):
+	"Tags of listings that show items of `item_groups`: the groups, their ancestors and the catalog."
+	tags = {CATALOG_TAG} if catalog else set()
+	for item_group in item_groups:
+		if not item_group:
+			continue
+
+		tree = get_item_group_tree(item_group)
+		tags.add(f"item_group:{item_group}")
+		tags.update(f"item_group:{ancestor.name}" for ancestor in tree.get_ancestors(item_group))
+
+	return tags
+
+
+def invalidate_website_item_listings(doc, item_groups):
+	"""
+	Invalidate listings a Website Item appears (or appeared) in.
+
+	Args:
+	        doc (Document): Website Item
+	        item_groups (list): Item Groups the item is listed under, before and after the change
+	"""
+	before = doc.get_doc_before_save()
+	tags = get_item_group_tags(item_groups + ([before.item_group] if before else []))
+
+	if before:
+		meta = frappe.get_meta("Website Item", cached=True)
+		tags.update(
+			f"field:{df.fieldname}"
+			for df in meta.fields
+			if df.fieldtype in ("Link", "Select", "Check") and doc.has_value_changed(df.fieldname)
+		)
+
+	bump_tags(tags)
+
+
+def on_item_price_change(doc, method=None):
+	"Listing prices are resolved from Item Prices, invalidate listings of the price list."
+	if doc.selling:
+		bump_tags([f"price_list:{doc.price_list}"])
+
+
+def on_bin_change(doc, method=None):
+	"""
+	Invalidate listings of the item's groups (including its Website Item Groups) when it
+	goes in or out of stock. Quantity changes that keep its availability invalidate
+	nothing, catalog wide listings pick up availability changes after their soft TTL.
+	"""
+	settings = frappe.get_cached_doc("Webshop Settings")
+	if not settings.show_stock_availability:
+		return
+
+	web_item = frappe.db.get_value(
+		"Website Item",
+		{"item_code": doc.item_code},
+		["name", "item_code", "item_group", "website_warehouse", "on_backorder"],
+		as_dict=True,
+	)
+	if not web_item:
+		return
+
+	in_stock = cint(ProductHydrator([web_item], settings).get_stock_availability().get(web_item.item_code))
+	cache = frappe.cache()
+	key = cache.make_key(STOCK_STATE_KEY)
+	# plain redis hash, states are integers, not pickled values
+	previous = Redis.hget(cache, key, web_item.name)
+	Redis.hset(cache, key, web_item.name, in_stock)
+	if previous is not None and cint(previous) == in_stock:
+		return
+
+	item_groups = [web_item.item_group] + frappe.get_all(
+		"Website Item Group",
+		filters={"parent": web_item.name, "parenttype": "Website Item"},
+		pluck="item_group",
+	)
+	bump_tags(get_item_group_tags(item_groups, catalog=False))
+
+
+def on_item_group_change(doc, method=None, *args, **kwargs):
+	"Item Group listings show the group and its sub groups, invalidate the group and its parent."
+	bump_tags(get_item_group_tags([doc.name, doc.get("parent_item_group")]))
+
+
+def clear_listing_cache():
+	"Invalidate all listing pages, e.g. after Webshop Settings change."
+	bump_tags([ALL_TAG])
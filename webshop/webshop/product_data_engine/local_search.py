@@ -0,0 +1,314 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and Contributors
+# License: GNU General Public License v3. See license.txt
+
+"""
+In-process full text search, the product search backend of sites without
+RediSearch (see `search_backends`). Pure Python, without frappe, so that it
+can be tested on its own.
+
+Documents are tokenized into an inverted index of {term: {doc: frequency}},
+frequencies weighted per field. Queries match documents having every query
+word, the last word also as a prefix (search as you type), and are ranked
+with BM25. Document titles are kept sorted for prefix completion. An index
+can be saved to and loaded from a snapshot file.
+"""
+
+import json
+import math
+import os
+import re
+import unicodedata
+from bisect import bisect_left
+
+TOKEN_PATTERN = re.compile(r"\w+")
+BM25_K1 = 1.2
+BM25_B = 0.75
+MIN_PREFIX_LENGTH = 2  # shortest last query word expanded as a prefix
+MAX_PREFIX_EXPANSIONS = 50  # terms a prefix expands to, most frequent first
+SNAPSHOT_VERSION = 1
+# letters without a decomposition to a base letter
+FOLDED_LETTERS = str.maketrans({"ı": "i", "ø": "o", "ł": "l", "đ": "d", "ß": "ss", "æ": "ae", "œ": "oe"})
+
+
+def normalize(text):
+	"Lower case `text` without accents, so that e.g. `Çay` and `cay` match."
+	text = str(text or "")
+	if text.isascii():
+		return text.lower()
+
+	text = unicodedata.normalize("NFKD", text).lower()
+	return "".join(c for c in text if not unicodedata.combining(c)).translate(FOLDED_LETTERS)
+
+
+def tokenize(text):
+	"""
+	Returns:
+	        list: Normalized words of `text`
+	"""
+	return TOKEN_PATTERN.findall(normalize(text))
+
+
+class LocalSearchIndex:
+	"""Inverted index of documents, searched with BM25.
+
+	Attributes:
+	        field_weights (dict): {field: weight} of searched fields, fields missing are not searched
+	        documents (dict): {doc id: stored fields}, returned with search results
+	        postings (dict): {term: {doc id: weighted term frequency}}
+	        doc_lengths (dict): {doc id: weighted number of terms}
+	        boosts (dict): {doc id: boost}, breaks ties between equally relevant documents
+	        titles (list): Sorted (normalized title, doc id), for prefix completion
+	"""
+
+	def __init__(self, field_weights):
+		self.field_weights = dict(field_weights)
+		self.documents = {}
+		self.postings = {}
+		self.doc_terms = {}
+		self.doc_lengths = {}
+		self.total_length = 0.0
+		self.boosts = {}
+		self.titles = []
+		self._sorted_terms = None
+		self._titles_sorted = True
+
+	def __len__(self):
+		return len(self.documents)
+
+	def add(self, doc_id, fields, stored=None, title=None, boost=0):
+		"""
+		Index a document, replacing it if it is indexed.
+
+		Args:
+		        doc_id (str): Document ID
+		        fields (dict): {field: text}
+		        stored (dict, optional): Fields returned with results
+		        title (str, optional): Text the document is completed by
+		        boost (float, optional): Tie breaker, e.g. ranking
+		"""
+		if doc_id in self.documents:
+			self.remove(doc_id)
+
+		terms, length = {}, 0.0
+		for field, weight in self.field_weights.items():
+			tokens = tokenize(fields.get(field))
+			for token in tokens:
+				terms[token] = terms.get(token, 0.0) + weight
+			length += weight * len(tokens)
+
+		for term, frequency in terms.items():
+			if term not in self.postings:
+				self.postings[term] = {}
+				self._sorted_terms = None
+			self.postings[term][doc_id] = frequency
+
+		self.documents[doc_id] = stored if stored is not None else dict(fields)
+		self.doc_terms[doc_id] = list(terms)
+		self.doc_lengths[doc_id] = length
+		self.total_length += length
+		self.boosts[doc_id] = boost or 0
+
+		if title:
+			self.titles.append((normalize(title), doc_id))
+			self._titles_sorted = False
+
+	def remove(self, doc_id):
+		"Drop a document from the index, if it is indexed."
+		if doc_id not in self.documents:
+			return
+
+		for term in self.doc_terms.pop(doc_id):
+			postings = self.postings[term]
+			postings.pop(doc_id, None)
+			if not postings:
+				del self.postings[term]
+				self._sorted_terms = None
+
+		self.total_length -= self.doc_lengths.pop(doc_id)
+		self.boosts.pop(doc_id, None)
+		self.titles = [key for key in self.titles if key[1] != doc_id]
+		del self.documents[doc_id]
+
+	def search(self, query, start=0, limit=10, filters=None, sort=None):
+		"""
+		Args:
+		        query (str): Words all matched documents have, the last one as a prefix too
+		        start (int, optional): Results to skip
+		        limit (int, optional): Results to return
+		        filters (dict, optional): {stored field: value or list of values} results must have
+		        sort (callable, optional): Sort key of stored fields, by relevance if not set
+
+		Returns:
+		        tuple: (number of matches, list of (doc id, score) of the page)
+		"""
+		words = tokenize(query)
+		if not words:
+			return 0, []
+
+		scores = None
+		for position, word in enumerate(words):
+			is_last = position == len(words) - 1
+			terms = self.expand(word) if is_last else [word]
+
+			word_scores = {}
+			for term in terms:
+				for doc_id, score in self.score_term(term).items():
+					# a word matching several terms counts once, as its best match
+					if score > word_scores.get(doc_id, 0):
+						word_scores[doc_id] = score
+
+			if scores is None:
+				scores = word_scores
+			else:
+				scores = {
+					doc_id: scores[doc_id] + score for doc_id, score in word_scores.items() if doc_id in scores
+				}
+
+			if not scores:
+				return 0, []
+
+		if filters:
+			documents = self.documents
+			scores = {
+				doc_id: score for doc_id, score in scores.items() if self.matches(documents[doc_id], filters)
+			}
+
+		if sort:
+			ranked = sorted(scores, key=lambda doc_id: (sort(self.documents[doc_id]), doc_id))
+		else:
+			ranked = sorted(scores, key=lambda doc_id: (-scores[doc_id], -self.boosts[doc_id], doc_id))
+
+		return len(ranked), [(doc_id, scores[doc_id]) for doc_id in ranked[start : start + limit]]
+
+	def expand(self, word):
+		"Terms `word` matches as a prefix, the word itself first."
+		if len(word) < MIN_PREFIX_LENGTH:
+			return [word]
+
+		terms = self.get_sorted_terms()
+		matches = []
+		for i in range(bisect_left(terms, word), len(terms)):
+			if not terms[i].startswith(word):
+				break
+			if terms[i] != word:
+				matches.append(terms[i])
+
+		matches.sort(key=lambda term: -len(self.postings[term]))
+		return [word] + matches[:MAX_PREFIX_EXPANSIONS]
+
+	def score_term(self, term):
+		"""
+		Returns:
+		        dict: {doc id: BM25 score of `term`}
+		"""
+		postings = self.postings.get(term)
+		if not postings:
+			return {}
+
+		count = len(self.documents)
+		average_length = (self.total_length / count) or 1.0
+		idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+
+		scores = {}
+		for doc_id, frequency in postings.items():
+			norm = 1 - BM25_B + BM25_B * self.doc_lengths[doc_id] / average_length
+			scores[doc_id] = idf * frequency * (BM25_K1 + 1) / (frequency + BM25_K1 * norm)
+
+		return scores
+
+	def complete(self, prefix, limit=8):
+		"""
+		Returns:
+		        list: IDs of documents whose title starts with `prefix`, most boosted first
+		"""
+		prefix = normalize(prefix).strip()
+		if not prefix:
+			return []
+
+		titles = self.get_sorted_titles()
+		matches = []
+		for i in range(bisect_left(titles, (prefix,)), len(titles)):
+			title, doc_id = titles[i]
+			if not title.startswith(prefix):
+				break
+			matches.append(doc_id)
+
+		matches.sort(key=lambda doc_id: -self.boosts[doc_id])
+		return matches[:limit]
+
+	def get_sorted_terms(self):
+		if self._sorted_terms is None:
+			self._sorted_terms = sorted(self.postings)
+
+		return self._sorted_terms
+
+	def get_sorted_titles(self):
+		if not self._titles_sorted:
+			self.titles.sort()
+			self._titles_sorted = True
+
+		return self.titles
+
+	@staticmethod
+	def matches(document, filters):
+		for field, values in filters.items():
+			if not isinstance(values, (list, tuple, set)):
+				values = [values]
+			if document.get(field) not in values:
+				return False
+
+		return True
+
+	def save(self, path, stamp=None):
+		"""
+		Write the index to `path`, replacing it atomically.
+
+		Args:
+		        stamp (str, optional): Version the snapshot is loaded for, see `load`
+		"""
+		snapshot = {
+			"version": SNAPSHOT_VERSION,
+			"stamp": stamp,
+			"field_weights": self.field_weights,
+			"documents": self.documents,
+			"postings": self.postings,
+			"doc_lengths": self.doc_lengths,
+			"boosts": self.boosts,
+			"titles": self.get_sorted_titles(),
+		}
+
+		temp_path = f"{path}.{os.getpid()}.tmp"  # workers may save at the same time
+		with open(temp_path, "w") as f:
+			json.dump(snapshot, f, separators=(",", ":"), default=str)
+		os.replace(temp_path, path)
+
+	@classmethod
+	def load(cls, path, stamp=None):
+		"""
+		Returns:
+		        LocalSearchIndex: Index saved at `path`, None if it is missing, unreadable, of
+		                another snapshot version or not saved with `stamp`
+		"""
+		try:
+			with open(path) as f:
+				snapshot = json.load(f)
+		except (OSError, ValueError):
+			return None
+
+		if snapshot.get("version") != SNAPSHOT_VERSION or snapshot.get("stamp") != stamp:
+			return None
+
+		index = cls(snapshot["field_weights"])
+		index.documents = snapshot["documents"]
+		index.postings = snapshot["postings"]
+		index.doc_lengths = snapshot["doc_lengths"]
+		index.total_length = sum(index.doc_lengths.values())
+		index.boosts = snapshot["boosts"]
+		index.titles = [tuple(key) for key in snapshot["titles"]]
+
+		index.doc_terms = {doc_id: [] for doc_id in index.documents}
+		for term, postings in index.postings.items():
+			for doc_id in postings:
+				index.doc_terms[doc_id].append(term)
+
+		return index
@@ -0,0 +1,361 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and Contributors
+# License: GNU General Public License v3. See license.txt
+
+"""
+Maintains `Website Item Price`: the price and discount of every published
+Website Item per (Price List, Customer Group), with Pricing Rules applied.
+Product listings filter on these rows in SQL instead of pricing the
+whole catalog per request.
+
+Customer Groups are indexed if selling Pricing Rules apply to them (see
+`get_price_index_customer_groups`), all others share the prices of the root
+group. Updates upsert rows in place, so the index is never seen empty.
+"""
+
+import frappe
+from frappe.utils import flt, now
+
+from webshop.webshop.product_data_engine.hydration import ProductHydrator
+from webshop.webshop.product_data_engine.listing_cache import bump_tags
+from webshop.webshop.redisearch_utils import update_search_attributes
+
+PRICE_INDEX_CHUNK_SIZE = 500
+PRICE_INDEX_GROUPS_KEY = "webshop_price_index_customer_groups"
+PRICE_INDEX_GROUPS_TTL = 60 * 60  # seconds, also cleared on Pricing Rule changes
+
+
+def get_price_index_keys(price_lists=None):
+	"""
+	Args:
+	        price_lists (list, optional): Limit keys to these Price Lists
+
+	Returns:
+	        list: (price list, customer group) pairs that prices are maintained for
+	"""
+	if not price_lists:
+		price_lists = frappe.get_all(
+			"Price List", filters={"selling": 1, "enabled": 1}, pluck="name"
+		)
+
+	customer_groups = get_price_index_customer_groups()
+	return [
+		(price_list, customer_group) for price_list in price_lists for customer_group in customer_groups
+	]
+
+
+def get_price_index_customer_groups():
+	"""
+	Returns:
+	        list: Customer Groups prices are indexed for: the groups selling Pricing Rules
+	                apply to with their sub groups (rules apply to sub groups too), and the root
+	                group, whose prices are those of every other group
+	"""
+	customer_groups = frappe.cache().get_value(PRICE_INDEX_GROUPS_KEY)
+	if customer_groups is not None:
+		return customer_groups
+
+	from frappe.utils.nestedset import get_descendants_of, get_root_of
+
+	customer_groups = {get_root_of("Customer Group")}
+	for customer_group in frappe.get_all(
+		"Pricing Rule",
+		filters={"selling": 1, "disable": 0, "applicable_for": "Customer Group"},
+		pluck="customer_group",
+		distinct=True,
+	):
+		if customer_group:
+			customer_groups.add(customer_group)
+			customer_groups.update(get_descendants_of("Customer Group", customer_group))
+
+	customer_groups = sorted(customer_groups)
+	frappe.cache().set_value(
+		PRICE_INDEX_GROUPS_KEY, customer_groups, expires_in_sec=PRICE_INDEX_GROUPS_TTL
+	)
+	return customer_groups
+
+
+def get_indexed_customer_group(customer_group):
+	"""
+	Returns:
+	        str: Customer Group whose indexed prices are those of `customer_group`
+	"""
+	from frappe.utils.nestedset import get_root_of
+
+	if customer_group in get_price_index_customer_groups():
+		return customer_group
+
+	# no Pricing Rule applies to the group or its ancestors, it is priced like the root
+	return get_root_of("Customer Group")
+
+
+def update_price_index(item_codes=None, price_lists=None):
+	"""
+	Recompute indexed prices of published Website Items.
+
+	Args:
+	        item_codes (list, optional): Items to refresh, all published items if not set
+	        price_lists (list, optional): Price Lists to refresh, all selling Price Lists if not set
+	"""
+	settings = frappe.get_cached_doc("Webshop Settings")
+	keys = get_price_index_keys(price_lists)
+	if not keys:
+		return
+
+	filters = {"published": 1}
+	if item_codes is not None:
+		if not item_codes:
+			return
+
+		filters["item_code"] = ["in", item_codes]
+
+	web_items = frappe.get_all(
+		"Website Item", fields=["name", "item_code"], filters=filters, order_by="name"
+	)
+
+	# rows are updated in place, readers never see items missing from the index
+	for start in range(0, len(web_items), PRICE_INDEX_CHUNK_SIZE):
+		chunk = web_items[start : start + PRICE_INDEX_CHUNK_SIZE]
+		upsert_price_index_rows(chunk, keys, settings)
+		# search sorts and filters on the price of the default price list
+		update_search_attributes([web_item.name for web_item in chunk])
+
+	delete_unpublished_price_index_rows(
+		item_codes=item_codes, price_lists=list({key[0] for key in keys})
+	)
+
+	# counts of discount filtered listings and listed prices depend on the index
+	from webshop.webshop.product_data_engine.query import clear_product_count_cache
+
+	clear_product_count_cache()
+	bump_tags([f"price_list:{price_list}" for price_list, customer_group in keys])
+
+
+def upsert_price_index_rows(web_items, keys, settings):
+	"Insert, update and delete indexed prices of `web_items` so that they match the resolved ones."
+	price_lists = list({price_list for price_list, customer_group in keys})
+	existing = {
+		(row.website_item, row.price_list, row.customer_group): row
+		for row in frappe.get_all(
+			"Website Item Price",
+			filters={
+				"website_item": ["in", [web_item.name for web_item in web_items]],
+				"price_list": ["in", price_lists],
+			},
+			fields=[
+				"name",
+				"website_item",
+				"price_list",
+				"customer_group",
+				"currency",
+				"mrp",
+				"price_list_rate",
+				"discount_percent",
+			],
+		)
+	}
+
+	hydrator = ProductHydrator(web_items, settings)
+	timestamp, values = now(), []
+
+	for price_list, customer_group in keys:
+		prices = hydrator.resolve_prices(price_list, customer_group=customer_group)
+		for web_item in web_items:
+			price = prices.get(web_item.item_code)
+			if not price:
+				continue
+
+			fields = {
+				"currency": price.currency,
+				"mrp": flt(price.mrp, 9),
+				"price_list_rate": flt(price.price_list_rate, 9),
+				"discount_percent": flt(price.get("discount_percent"), 9),
+			}
+			row = existing.pop((web_item.name, price_list, customer_group), None)
+			if row:
+				if any(row[field] != value for field, value in fields.items()):
+					fields["modified"] = timestamp
+					frappe.db.set_value("Website Item Price", row.name, fields, update_modified=False)
+				continue
+
+			values.append(
+				(
+					frappe.generate_hash(length=10),
+					timestamp,
+					timestamp,
+					"Administrator",
+					"Administrator",
+					web_item.name,
+					web_item.item_code,
+					price_list,
+					customer_group,
+					fields["currency"],
+					fields["mrp"],
+					fields["price_list_rate"],
+					fields["discount_percent"],
+				)
+			)
+
+	if values:
+		frappe.db.bulk_insert(
+			"Website Item Price",
+			fields=[
+				"name",
+				"creation",
+				"modified",
+				"owner",
+				"modified_by",
+				"website_item",
+				"item_code",
+				"price_list",
+				"customer_group",
+				"currency",
+				"mrp",
+				"price_list_rate",
+				"discount_percent",
+			],
+			values=values,
+		)
+
+	# prices gone, e.g. a dropped Item Price or a customer group no longer indexed
+	if existing:
+		frappe.db.delete("Website Item Price", {"name": ["in", [row.name for row in existing.values()]]})
+
+
+def delete_unpublished_price_index_rows(item_codes=None, price_lists=None):
+	"Delete indexed prices of Website Items that are unpublished or deleted."
+	conditions = ["wi.name is null"]
+	if item_codes:
+		conditions.append(f"wip.item_code in ({', '.join(frappe.db.escape(code) for code in item_codes)})")
+	if price_lists:
+		conditions.append(
+			f"wip.price_list in ({', '.join(frappe.db.escape(price_list) for price_list in price_lists)})"
+		)
+
+	frappe.db.sql(
+		f"""
+		delete wip from `tabWebsite Item Price` wip
+		left join `tabWebsite Item` wi on wi.name = wip.website_item and wi.published = 1
+		where {" and ".join(conditions)}
+		"""
+	)
+
+
+def rebuild_price_index():
+	"Rebuild the whole index. Runs daily, as Pricing Rules start and expire by date."
+	update_price_index()
+
+
+def enqueue_price_index_update(item_codes=None, price_lists=None):
+	frappe.enqueue(
+		"webshop.webshop.product_data_engine.price_index.update_price_index",
+		item_codes=item_codes,
+		price_lists=price_lists,
+		queue="long",
+		enqueue_after_commit=True,
+		now=frappe.flags.in_test,
+	)
+
+
+def on_item_price_change(doc, method=None):
+	"Refresh indexed prices of the Item and of variants that fall back to its price."
+	if not doc.selling:
+		return
+
+	item_codes = [doc.item_code] + frappe.get_all(
+		"Item", filters={"variant_of": doc.item_code}, pluck="name"
+	)
+	enqueue_price_index_update(item_codes=item_codes, price_lists=[doc.price_list])
+
+
+def on_pricing_rule_change(doc, method=None):
+	"Refresh indexed prices of the items the rule applies to, before and after the change."
+	rules = [doc]
+	previous = doc.get_doc_before_save()
+	if previous:
+		rules.append(previous)
+
+	rules = [rule for rule in rules if rule.selling]
+	if not rules:
+		return
+
+	customer_groups = get_price_index_customer_groups()
+	frappe.cache().delete_value(PRICE_INDEX_GROUPS_KEY)
+	if get_price_index_customer_groups() != customer_groups:
+		# prices of every item are indexed for another set of groups
+		enqueue_price_index_update()
+		return
+
+	item_codes = set()
+	for rule in rules:
+		rule_items = get_pricing_rule_items(rule)
+		if rule_items is None:
+			# applies to whole transactions, any item may be affected
+			enqueue_price_index_update()
+			return
+
+		item_codes |= rule_items
+
+	enqueue_price_index_update(item_codes=list(item_codes))
+
+
+def get_pricing_rule_items(rule):
+	"""
+	Args:
+	        rule (Document): Pricing Rule
+
+	Returns:
+	        set: Item codes the rule may apply to, None if it can apply to any item
+	"""
+	from frappe.utils.nestedset import get_descendants_of
+
+	if rule.apply_on == "Item Code":
+		item_codes = [d.item_code for d in rule.items if d.item_code]
+		if not item_codes:
+			return set()
+
+		# variants are priced by their template's rules too
+		variants = frappe.get_all("Item", filters={"variant_of": ["in", item_codes]}, pluck="name")
+		return set(item_codes) | set(variants)
+
+	if rule.apply_on == "Item Group":
+		fieldname, values = "item_group", set()
+		for d in rule.item_groups:
+			if d.item_group:
+				values.add(d.item_group)
+				values.update(get_descendants_of("Item Group", d.item_group))
+	elif rule.apply_on == "Brand":
+		fieldname, values = "brand", {d.brand for d in rule.brands if d.brand}
+	else:
+		return None
+
+	if not values:
+		return set()
+
+	return set(frappe.get_all("Item", filters={fieldname: ["in", list(values)]}, pluck="name"))
+
+
+def get_discount_range(price_list, customer_group, base_query):
+	"""
+	Args:
+	        price_list (str): Price List the session is priced with
+	        customer_group (str): Customer Group the session is priced with
+	        base_query (str): SQL selecting the `name` of matching Website Items
+
+	Returns:
+	        list: [min, max] discount percent across matching items, empty if none is discounted
+	"""
+	result = frappe.db.sql(
+		f"""
+		select min(wip.discount_percent), max(wip.discount_percent)
+		from ({base_query}) wi
+		inner join `tabWebsite Item Price` wip on wip.website_item = wi.name
+		where wip.price_list = {frappe.db.escape(price_list)}
+			and wip.customer_group = {frappe.db.escape(customer_group or "")}
+			and wip.discount_percent > 0
+		"""  # nosemgrep
+	)
+
+	if not result or result[0][0] is None:
+		return []
+
+	return [flt(result[0][0]), flt(result[0][1])]
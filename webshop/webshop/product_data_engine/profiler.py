@@ -0,0 +1,159 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and Contributors
+# License: GNU General Public License v3. See license.txt
+
+import random
+from contextlib import contextmanager
+from time import perf_counter
+
+import frappe
+from frappe.utils import cint, flt
+from redis import Redis
+
+TIMING_HISTOGRAM_KEY = "webshop_listing_timings"
+# upper bounds of histogram buckets, in milliseconds
+TIMING_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+class StageTimer:
+	"""Record wall time and DB query count per stage of a listing request.
+
+	When disabled, `stage` is a no-op, so instrumented code pays next to
+	nothing. Stages entered more than once accumulate.
+
+	Attributes:
+	        enabled (bool): Record timings
+	        debug (bool): Timings are returned with the response
+	        sampled (bool): Timings are added to the Redis histogram
+	        stages (dict): {stage: {"ms": wall time, "queries": DB query count}}
+	"""
+
+	def __init__(self, debug=False, sampled=False):
+		self.debug = debug
+		self.sampled = sampled
+		self.enabled = debug or sampled
+		self.stages = {}
+		self.query_count = 0
+		self._sql = None
+
+	@contextmanager
+	def stage(self, name):
+		if not self.enabled:
+			yield
+			return
+
+		start, queries = perf_counter(), self.query_count
+		try:
+			yield
+		finally:
+			stage = self.stages.setdefault(name, {"ms": 0.0, "queries": 0})
+			stage["ms"] += (perf_counter() - start) * 1000
+			stage["queries"] += self.query_count - queries
+
+	def start(self):
+		"Count DB queries until `stop`, by wrapping `frappe.db.sql` like the recorder does."
+		if not self.enabled or self._sql:
+			return
+
+		self._sql = frappe.db.sql
+
+		def sql(*args, **kwargs):
+			self.query_count += 1
+			return self._sql(*args, **kwargs)
+
+		frappe.db.sql = sql
+
+	def stop(self):
+		if self._sql:
+			frappe.db.sql = self._sql
+			self._sql = None
+
+	def get_server_timing(self):
+		"""
+		Returns:
+		        str: Value of a `Server-Timing` header
+		"""
+		return ", ".join(
+			f'{name};dur={stage["ms"]:.1f};desc="{stage["queries"]} queries"'
+			for name, stage in self.stages.items()
+		)
+
+	def set_response_header(self):
+		"Send the timings as a `Server-Timing` header, see `add_server_timing_header`."
+		if self.stages:
+			frappe.local.webshop_server_timing = self.get_server_timing()
+
+	def as_dict(self):
+		return {
+			name: {"ms": round(stage["ms"], 2), "queries": stage["queries"]}
+			for name, stage in self.stages.items()
+		}
+
+	def record_histogram(self):
+		"Add the stage timings to the Redis histogram, in one round trip."
+		if not self.stages:
+			return
+
+		cache = frappe.cache()
+		key = cache.make_key(TIMING_HISTOGRAM_KEY)
+		pipeline = cache.pipeline()
+		for name, stage in self.stages.items():
+			bucket = next((str(b) for b in TIMING_BUCKETS if stage["ms"] <= b), "inf")
+			pipeline.hincrby(key, f"{name}:{bucket}", 1)
+			pipeline.hincrby(key, f"{name}:count", 1)
+			pipeline.hincrbyfloat(key, f"{name}:ms", stage["ms"])
+			pipeline.hincrby(key, f"{name}:queries", stage["queries"])
+		pipeline.execute()
+
+
+def add_server_timing_header(response=None, request=None):
+	"`after_request` hook, adds timings set by `StageTimer.set_response_header` to the response."
+	server_timing = getattr(frappe.local, "webshop_server_timing", None)
+	if server_timing and response is not None:
+		response.headers["Server-Timing"] = server_timing
+
+
+def get_listing_timer(debug=False):
+	"""
+	Get a timer for a listing request. It is enabled for debug requests of
+	System Managers and for a sample of requests, as per the
+	`webshop_listing_timing_sample_rate` site config (0 to 1).
+
+	Returns:
+	        StageTimer: Timer of the request
+	"""
+	debug = bool(debug) and "System Manager" in frappe.get_roles()
+	sample_rate = flt(frappe.conf.get("webshop_listing_timing_sample_rate"))
+	sampled = bool(sample_rate) and random.random() < sample_rate
+
+	return StageTimer(debug=debug, sampled=sampled)
+
+
+@frappe.whitelist()
+def get_listing_timings():
+	"""
+	Returns:
+	        dict: {stage: {"count", "avg_ms", "avg_queries", "buckets": {upper bound ms: count}}}
+	"""
+	frappe.only_for("System Manager")
+
+	cache = frappe.cache()
+	# plain redis hgetall, counters are not pickled like other cached values
+	histogram = Redis.hgetall(cache, cache.make_key(TIMING_HISTOGRAM_KEY)) or {}
+
+	stages = {}
+	for field, value in histogram.items():
+		name, metric = frappe.safe_decode(field).rsplit(":", 1)
+		stage = stages.setdefault(name, {"count": 0, "ms": 0.0, "queries": 0, "buckets": {}})
+		if metric in ("count", "queries"):
+			stage[metric] = cint(value)
+		elif metric == "ms":
+			stage["ms"] = flt(value)
+		else:
+			stage["buckets"][metric] = cint(value)
+
+	for stage in stages.values():
+		count = stage["count"] or 1
+		stage["avg_ms"] = round(stage.pop("ms") / count, 2)
+		stage["avg_queries"] = round(stage.pop("queries") / count, 2)
+
+	return stages
@@ -1,66 +1,200 @@
 # Copyright (c) 2021, Frappe Technologies Pvt. Ltd. and Contributors
 # License: GNU General Public License v3. See license.txt
 
-import frappe
-from frappe.utils import flt
+import base64
+import hashlib
+import json
+import re
 
-from webshop.webshop.doctype.item_review.item_review import get_customer
-from webshop.webshop.shopping_cart.product_info import get_product_info_for_website
-from webshop.webshop.utils.product import get_non_stock_item_status
+import frappe
+from frappe import _
+from frappe.utils import cint, flt
+from redis import Redis
+
+from webshop.webshop.product_data_engine.attribute_index import get_attribute_index
+from webshop.webshop.product_data_engine.hydration import ProductHydrator
+from webshop.webshop.product_data_engine.price_index import (
+	get_discount_range,
+	get_indexed_customer_group,
+)
+from webshop.webshop.product_data_engine.profiler import StageTimer
+
+COUNT_CACHE_PREFIX = "product_count:"
+# counter in the keys of cached counts, bumped to invalidate them all at once
+COUNT_CACHE_VERSION_KEY = "product_count_version"
+COUNT_CACHE_TTL = 300  # seconds
+APPROXIMATE_COUNT_LIMIT = 10000
+
+# sort key: (field, descending)
+SORT_OPTIONS = {
+	"price_asc": ("price_list_rate", False),
+	"price_desc": ("price_list_rate", True),
+	"name_asc": ("web_item_name", False),
+	"name_desc": ("web_item_name", True),
+	"new": ("creation", True),
+}
+DEFAULT_SORT = ("ranking", True)
+
+# FULLTEXT index searched in "Full Text" search mode, see `add_search_index`
+SEARCH_INDEX_NAME = "product_search"
+SEARCH_INDEX_FIELDS = ("web_item_name", "item_name", "item_code", "item_group", "web_long_description")
+SEARCH_INDEX_CACHE_KEY = "webshop_has_product_search_index"
+SEARCH_MIN_WORD_LENGTH = 3  # innodb_ft_min_token_size
+SEARCH_RELEVANCE_WEIGHT = 10  # ranking points per unit of relevance
+
+# Website Item fields selected and serialized per listing profile
+CARD_FIELDS = (
+	"name",
+	"item_code",
+	"item_name",
+	"web_item_name",
+	"website_image",
+	"route",
+	"has_variants",
+	"item_group",
+	"short_description",
+	"website_warehouse",
+	"on_backorder",
+)
+LIST_FIELDS = CARD_FIELDS + ("variant_of", "ranking", "brand", "website_image_alt")
+LISTING_PROFILES = {
+	"card": CARD_FIELDS,
+	"list": LIST_FIELDS,
+	"full": LIST_FIELDS + ("web_long_description",),
+}
+DEFAULT_PROFILE = "card"
+# item keys set by `add_display_details`, serialized in every profile
+DISPLAY_FIELDS = (
+	"stock_uom",
+	"sales_uom",
+	"formatted_mrp",
+	"formatted_price",
+	"price_list_rate",
+	"discount_percent",
+	"discount",
+	"in_stock",
+	"in_cart",
+	"qty",
+	"wished",
+)
+# Webshop Settings fields listings are rendered with, the "full" profile sends the whole doc
+LISTING_SETTINGS_FIELDS = (
+	"enabled",
+	"enable_checkout",
+	"enable_wishlist",
+	"show_price",
+	"show_stock_availability",
+	"allow_items_not_in_stock",
+	"products_per_page",
+)
 
 
 class ProductQuery:
 	"""Query engine for product listing
 
 	Attributes:
+	        profile (str): Key of `LISTING_PROFILES`, the fields listed items have
 	        fields (list): Fields to fetch in query
-	        conditions (string): Conditions for query building
-	        or_conditions (string): Search conditions
+	        filters (list): Field filters for query building
+	        or_filters (list): Search and item group filters
+	        joins (list): SQL joins on the filtered Website Items (aliased `wi`)
+	        conditions (list): SQL conditions on joined tables
 	        page_length (Int): Length of page for the query
+	        order_by (string): Sort order, see `set_sort`
+	        approximate_count (bool): Stop counting at `APPROXIMATE_COUNT_LIMIT` rows
 	        settings (Document): Webshop Settings DocType
+	        timer (StageTimer): Per stage timings, disabled unless set by the caller
+	        user_state (bool): Price for the session's party and add its cart & wishlist state,
+	                off for pages shared between users
 	"""
 
-	def __init__(self):
-		self.settings = frappe.get_doc("Webshop Settings")
+	def __init__(self, profile=None, settings=None, price_list=None, customer_group=None):
+		self.settings = settings or frappe.get_doc("Webshop Settings")
 		self.page_length = self.settings.products_per_page or 20
-		self.order_by = "ranking desc"  # Default sorting
+		self.sort_field, self.sort_reverse = DEFAULT_SORT
+		self.order_by = "`tabWebsite Item`.ranking desc, `tabWebsite Item`.name desc"  # Default sorting
+		self.seek_condition = None
+		self.search_relevance = False
+		self.timer = StageTimer()
+		self.user_state = True
+		self.approximate_count = bool(self.settings.approximate_product_count)
 
 		self.or_filters = []
 		self.filters = [["published", "=", 1]]
-		self.fields = [
-			"web_item_name",
-			"name",
-			"item_name",
-			"item_code",
-		"website_image",
-		"variant_of",
-		"has_variants",
-		"item_group",
-		"web_long_description",
-		"short_description",
-		"route",
-		"website_warehouse",
-		"ranking",
-			"on_backorder",
-		]
-
-	def query(self, attributes=None, fields=None, search_term=None, start=0, item_group=None):
+		self.joins = []
+		self.conditions = []
+		self._price_list = price_list
+		self._customer_group = customer_group
+		self.set_profile(profile)
+
+	def query(
+		self,
+		attributes=None,
+		fields=None,
+		search_term=None,
+		start=0,
+		item_group=None,
+		cursor=None,
+		price_min=None,
+		price_max=None,
+	):
 		"""
 		Args:
 		        attributes (dict, optional): Item Attribute filters
 		        fields (dict, optional): Field level filters
 		        search_term (str, optional): Search term to lookup
 		        start (int, optional): Page start
+		        cursor (str, optional): `next_cursor` of the previous page, seeks past it instead of `start`
+		        price_min (float, optional): Lowest price list rate, on the price index
+		        price_max (float, optional): Highest price list rate, on the price index
 
 		Returns:
-		        dict: Dict containing items, item count & discount range
+		        dict: Dict containing items, item count, discount range & cursor to the next page
 		"""
-		# track if discounts included in field filters
-		self.filter_with_discount = bool(fields.get("discount"))
-		result, discount_list, website_item_groups, cart_items, count = [], [], [], [], 0
+		result, discount_list, website_item_groups, count = [], [], [], 0
+
+		with self.timer.stage("filters"):
+			self.build_filters(
+				fields=fields,
+				search_term=search_term,
+				item_group=item_group,
+				price_min=price_min,
+				price_max=price_max,
+			)
+			if cursor:
+				self.build_seek_condition(cursor)
+				start = 0
+
+		# query results
+		if attributes:
+			result, count = self.query_items_with_attributes(attributes, start)
+		else:
+			result, count = self.query_items(start=start)
 
+		next_cursor = self.get_next_cursor(result)
+
+		result, discount_list = self.add_display_details(result, discount_list)
+
+		with self.timer.stage("discounts"):
+			discounts = self.get_discounts(discount_list)
+
+		return {
+			"items": result,
+			"items_count": count,
+			"items_count_approximate": self.is_count_approximate(count),
+			"discounts": discounts,
+			"next_cursor": next_cursor,
+		}
+
+	def build_filters(
+		self, fields=None, search_term=None, item_group=None, price_min=None, price_max=None
+	):
+		"Build field, discount, price, item group, search and settings filters."
 		if fields:
 			self.build_fields_filters(fields)
+			if fields.get("discount"):
+				self.build_discount_filters(fields["discount"])
+		self.build_price_filters(price_min, price_max)
 		if item_group:
 			self.build_item_group_filters(item_group)
 		if search_term:
@@ -68,89 +202,283 @@ class ProductQuery:
 		if self.settings.hide_variants:
 			self.filters.append(["variant_of", "is", "not set"])
 
-		# query results
-		if attributes:
-			result, count = self.query_items_with_attributes(attributes, start)
-		else:
-			result, count = self.query_items(start=start)
-
-		# sort combined results by ranking
-		result = sorted(result, key=lambda x: x.get("ranking"), reverse=True)
+	def query_items(self, start=0):
+		"""Build a query to fetch Website Items based on field filters."""
+		with self.timer.stage("count"):
+			count = self.get_items_count()
+
+		with self.timer.stage("items"):
+			if self.joins or self.conditions or self.seek_condition:
+				return self.query_joined_items(start=start), count
+
+			items = frappe.db.get_all(
+				"Website Item",
+				fields=self.get_query_fields(),
+				filters=self.filters,
+				or_filters=self.or_filters,
+				limit_page_length=self.page_length,
+				limit_start=start,
+				order_by=self.order_by,
+			)
 
-		if self.settings.enabled:
-			cart_items = self.get_cart_items()
+		return items, count
 
-		result, discount_list = self.add_display_details(result, discount_list, cart_items)
+	def query_joined_items(self, start=0):
+		"""Fetch a page of filtered Website Items narrowed down by `joins` and `conditions`."""
+		fields = ", ".join(f"wi.`{field}`" for field in self.get_query_fields())
+		sort_expression = self.get_sort_expression()
+		direction = "desc" if self.sort_reverse else "asc"
+		conditions = [self.seek_condition] if self.seek_condition else []
+
+		return frappe.db.sql(
+			f"""
+			select {fields}, {sort_expression} as _sort_value
+			from ({self.get_base_query(self.get_query_fields())}) wi
+			{self.get_join_clause(conditions)}
+			order by {sort_expression} {direction}, wi.`name` {direction}
+			limit {cint(start)}, {cint(self.page_length)}
+			""",  # nosemgrep
+			as_dict=True,
+		)
 
-		discounts = []
-		if discount_list:
-			discounts = [min(discount_list), max(discount_list)]
+	def get_base_query(self, fields=None):
+		"""
+		Get SQL for Website Items matching the field, item group and search filters.
+		The query is not executed, joins and conditions are applied on top of it.
 
-		result = self.filter_results_by_discount(fields, result)
+		Args:
+		        fields (list, optional): Website Item fields to select, `name` if not set, and
+		                `item_code` if a join is on it (see `join_item_codes`)
 
-		return {"items": result, "items_count": count, "discounts": discounts}
+		Returns:
+		        str: SQL query
+		"""
+		fields = list(fields or ["name"])
+		if "item_code" not in fields and any("wi.item_code" in join for join in self.joins):
+			fields.append("item_code")
 
-	def query_items(self, start=0):
-		"""Build a query to fetch Website Items based on field filters."""
-		# MySQL does not support offset without limit,
-		# frappe does not accept two parameters for limit
-		# https://dev.mysql.com/doc/refman/8.0/en/select.html#id4651989
-		count_items = frappe.db.get_all(
+		fields = [f"`tabWebsite Item`.`{field}`" for field in fields]
+		return frappe.get_all(
 			"Website Item",
+			fields=fields,
 			filters=self.filters,
 			or_filters=self.or_filters,
-			limit_page_length=184467440737095516,
-			limit_start=start,  # get all items from this offset for total count ahead
-			order_by="ranking desc",
+			distinct=self.has_child_table_filters(),
+			order_by="`tabWebsite Item`.`name`",
+			run=0,
 		)
-		count = len(count_items)
 
-		# If discounts included, return all rows.
-		# Slice after filtering rows with discount (See `filter_results_by_discount`).
-		# Slicing before hand will miss discounted items on the 3rd or 4th page.
-		# Discounts are fetched on computing Pricing Rules so we cannot query them directly.
-		page_length = 184467440737095516 if self.filter_with_discount else self.page_length
+	def get_query_fields(self):
+		"Fields to select, including the sort field."
+		if self.sort_field in self.fields or self.sort_field == "price_list_rate":
+			return self.fields
 
-		items = frappe.db.get_all(
-			"Website Item",
-			fields=self.fields,
-			filters=self.filters,
-			or_filters=self.or_filters,
-			limit_page_length=page_length,
-			limit_start=start,
-			order_by=self.order_by,
+		return self.fields + [self.sort_field]
+
+	def set_profile(self, profile=None):
+		"""
+		Select the fields of a listing profile, "card" (default), "list" or "full".
+
+		Args:
+		        profile (str, optional): Key of `LISTING_PROFILES`
+		"""
+		profile = profile or DEFAULT_PROFILE
+		if profile not in LISTING_PROFILES:
+			frappe.throw(_("Invalid listing profile: {0}").format(profile), title=_("Invalid Profile"))
+
+		self.profile = profile
+		self.fields = list(LISTING_PROFILES[profile])
+
+	def serialize_items(self, items):
+		"""
+		Returns:
+		        list: Items with the keys of the profile only, without sort and internal columns
+		"""
+		keys = set(self.fields) | set(DISPLAY_FIELDS)
+		return [frappe._dict({key: value for key, value in item.items() if key in keys}) for item in items]
+
+	def serialize_settings(self):
+		"""
+		Returns:
+		        dict: Webshop Settings listings are rendered with, the whole doc for the "full" profile
+		"""
+		if self.profile == "full":
+			return self.settings.as_dict()
+
+		return {field: self.settings.get(field) for field in LISTING_SETTINGS_FIELDS}
+
+	def get_join_clause(self, extra_conditions=None):
+		clause = " ".join(self.joins)
+		conditions = self.conditions + (extra_conditions or [])
+		if conditions:
+			clause += " where " + " and ".join(f"({condition})" for condition in conditions)
+
+		return clause
+
+	def set_sort(self, sort_by=None):
+		"""
+		Sort results by a `SORT_OPTIONS` key, or by ranking if not set.
+		Ties are broken by name, so that paging is stable.
+
+		Args:
+		        sort_by (str, optional): Key of `SORT_OPTIONS`
+		"""
+		self.sort_field, self.sort_reverse = SORT_OPTIONS.get(sort_by, DEFAULT_SORT)
+		direction = "desc" if self.sort_reverse else "asc"
+		self.order_by = (
+			f"`tabWebsite Item`.{self.sort_field} {direction}, `tabWebsite Item`.name {direction}"
 		)
 
-		return items, count
+		if self.sort_field == "price_list_rate":
+			# prices are sorted on the price index, unpriced items count as 0
+			self.join_price_index()
 
-	def query_items_with_attributes(self, attributes, start=0):
-		"""Build a query to fetch Website Items based on field & attribute filters."""
-		item_codes = []
-
-		for attribute, values in attributes.items():
-			if not isinstance(values, list):
-				values = [values]
-
-			# get items that have selected attribute & value
-			item_code_list = frappe.db.get_all(
-				"Item",
-				fields=["item_code"],
-				filters=[
-					["published_in_website", "=", 1],
-					["Item Variant Attribute", "attribute", "=", attribute],
-					["Item Variant Attribute", "attribute_value", "in", values],
-				],
+	def get_sort_expression(self):
+		"SQL expression sorted on in joined queries."
+		if self.sort_field == "price_list_rate":
+			return "ifnull(wip.price_list_rate, 0)"
+		if self.sort_field == "ranking" and self.search_relevance:
+			return f"ifnull(wi.`ranking`, 0) + search.relevance * {SEARCH_RELEVANCE_WEIGHT}"
+		if self.sort_field == "ranking":
+			return "ifnull(wi.`ranking`, 0)"
+
+		return f"ifnull(wi.`{self.sort_field}`, '')"
+
+	def build_seek_condition(self, cursor):
+		"""
+		Seek past the last row of the previous page instead of skipping rows with an offset.
+
+		Args:
+		        cursor (str): `next_cursor` of the previous page
+		"""
+		sort_field, sort_reverse, value, name = decode_cursor(cursor)
+		if sort_field != self.sort_field or sort_reverse != self.sort_reverse:
+			frappe.throw(_("Cursor does not match the sort order of the listing."), title=_("Invalid Cursor"))
+
+		operator = "<" if self.sort_reverse else ">"
+		expression = self.get_sort_expression()
+		value = frappe.db.escape(value) if isinstance(value, str) else flt(value)
+		name = frappe.db.escape(name)
+
+		self.seek_condition = (
+			f"{expression} {operator} {value}"
+			f" or ({expression} = {value} and wi.`name` {operator} {name})"
+		)
+
+	def get_next_cursor(self, items):
+		"""
+		Get a cursor pointing past the last item, if the page is full.
+
+		Returns:
+		        str: Opaque cursor, or None if there is no next page
+		"""
+		sort_values = [item.pop("_sort_value", item.get(self.sort_field)) for item in items]
+		if not items or len(items) < cint(self.page_length):
+			return None
+
+		value = sort_values[-1]
+		if self.sort_field in ("ranking", "price_list_rate"):
+			value = flt(value)
+		elif value is None:
+			value = ""
+
+		return encode_cursor(self.sort_field, self.sort_reverse, value, items[-1].name)
+
+	def get_items_count(self):
+		"""
+		Count Website Items matching the current filters in a single query.
+		The count does not depend on the page, so it is cached per filter signature.
+
+		Returns:
+		        int: Total number of matching items (capped in approximate mode)
+		"""
+		cache_key = self.get_count_cache_key()
+		count = frappe.cache().get_value(cache_key)
+		if count is not None:
+			return cint(count)
+
+		if self.joins or self.conditions:
+			limit = f"limit {APPROXIMATE_COUNT_LIMIT}" if self.approximate_count else ""
+			count = frappe.db.sql(
+				f"""
+				select count(*) from (
+					select wi.name from ({self.get_base_query()}) wi
+					{self.get_join_clause()}
+					{limit}
+				) p
+				"""  # nosemgrep
+			)[0][0]
+		elif self.approximate_count:
+			# count over a bounded subquery, the scan stops after the limit is reached
+			partial_query = frappe.get_all(
+				"Website Item",
+				fields=["`tabWebsite Item`.`name`"],
+				filters=self.filters,
+				or_filters=self.or_filters,
+				distinct=True,
+				limit_page_length=APPROXIMATE_COUNT_LIMIT,
+				order_by="`tabWebsite Item`.`name`",
+				run=0,
+			)
+			count = frappe.db.sql(f"select count(*) from ({partial_query}) p")[0][0]  # nosemgrep
+		else:
+			# child table filters are left joined and may repeat a Website Item
+			count_field = (
+				"count(distinct `tabWebsite Item`.`name`)" if self.has_child_table_filters() else "count(*)"
 			)
-			item_codes.append({x.item_code for x in item_code_list})
+			count = frappe.get_all(
+				"Website Item",
+				fields=[f"{count_field} as count"],
+				filters=self.filters,
+				or_filters=self.or_filters,
+			)[0].count
+
+		frappe.cache().set_value(cache_key, cint(count), expires_in_sec=COUNT_CACHE_TTL)
+		return cint(count)
+
+	def get_count_cache_key(self):
+		"""Return a cache key unique to the current filter state."""
+		signature = json.dumps(
+			[self.filters, self.or_filters, self.joins, self.conditions, self.approximate_count],
+			sort_keys=True,
+			default=str,
+		)
+		return get_count_cache_prefix() + hashlib.md5(signature.encode()).hexdigest()
 
-		if item_codes:
-			item_codes = list(set.intersection(*item_codes))
-			self.filters.append(["item_code", "in", item_codes])
+	def has_child_table_filters(self):
+		"""Check if any filter is applied on a child table of Website Item."""
+		return any(
+			len(f) == 4 and f[0] != "Website Item" for f in self.filters + self.or_filters
+		)
 
+	def is_count_approximate(self, count):
+		return self.approximate_count and count >= APPROXIMATE_COUNT_LIMIT
+
+	def query_items_with_attributes(self, attributes, start=0):
+		"""Build a query to fetch Website Items based on field & attribute filters."""
+		# items that have all selected attributes & values
+		with self.timer.stage("attributes"):
+			item_codes = get_attribute_index().get_item_codes(attributes)
+		if not item_codes:
+			return [], 0
+
+		self.join_item_codes(item_codes)
 		items, count = self.query_items(start=start)
 
 		return items, count
 
+	def join_item_codes(self, item_codes):
+		"""
+		Limit the listing to `item_codes` by joining them as a JSON table,
+		the list is sent as one value instead of an `in` list of literals.
+		"""
+		self.joins.append(
+			f"""inner join json_table(
+				{frappe.db.escape(json.dumps(item_codes))},
+				'$[*]' columns (item_code varchar(140) path '$')
+			) attribute_items on attribute_items.item_code = wi.item_code"""
+		)
+
 	def build_fields_filters(self, filters):
 		"""
 		Build filters for field values.
@@ -177,7 +505,7 @@ class ProductQuery:
 			
 			# Special handling for primary_supplier - filter by child table
 			if field == "primary_supplier":
-				self.filters.append(["Website Item Supplier", "supplier", "in", values])
+				self.build_supplier_filters(values)
 			# Handle different field types
 			elif df.fieldtype == "Table MultiSelect":
 				child_doctype = df.options
@@ -192,6 +520,108 @@ class ProductQuery:
 				# Single values use `=` (faster than `IN`)
 				self.filters.append([field, "=", values])
 
+	def build_supplier_filters(self, suppliers):
+		"""
+		Filter items supplied by any of `suppliers`, as per their Website Item Supplier rows.
+		A semi-join, so items are neither repeated nor listed by name in the query.
+		"""
+		if not isinstance(suppliers, list):
+			suppliers = [suppliers]
+
+		self.conditions.append(
+			f"""exists (
+				select 1 from `tabWebsite Item Supplier` wis
+				where wis.parent = wi.`name` and wis.parenttype = 'Website Item'
+					and wis.supplier in ({", ".join(frappe.db.escape(supplier) for supplier in suppliers)})
+			)"""
+		)
+
+	def build_discount_filters(self, discount):
+		"""
+		Filter items discounted up to `discount` percent.
+		Discounts are precomputed per price list in `Website Item Price`.
+
+		Args:
+		        discount (list|float): Maximum discount percent, e.g. [20]
+		"""
+		if isinstance(discount, list):
+			discount = discount[0] if discount else 0
+
+		self.join_price_index()
+		self.conditions.append(
+			f"wip.discount_percent > 0 and wip.discount_percent <= {flt(discount)}"
+		)
+
+	def build_price_filters(self, price_min=None, price_max=None):
+		"""
+		Filter items priced within bounds on the price index. Unpriced items are excluded.
+
+		Args:
+		        price_min (float, optional): Lowest price list rate
+		        price_max (float, optional): Highest price list rate
+		"""
+		if not (flt(price_min) or flt(price_max)):
+			return
+
+		self.join_price_index()
+		conditions = ["wip.price_list_rate > 0"]
+		if flt(price_min):
+			conditions.append(f"wip.price_list_rate >= {flt(price_min)}")
+		if flt(price_max):
+			conditions.append(f"wip.price_list_rate <= {flt(price_max)}")
+
+		self.conditions.append(" and ".join(conditions))
+
+	def join_price_index(self):
+		"Join indexed prices of the session's price list and customer group as `wip`."
+		join = (
+			"left join `tabWebsite Item Price` wip on wip.website_item = wi.name"
+			f" and wip.price_list = {frappe.db.escape(self.get_price_list() or '')}"
+			f" and wip.customer_group = {frappe.db.escape(self.get_customer_group() or '')}"
+		)
+		if join not in self.joins:
+			self.joins.append(join)
+
+	def get_price_list(self):
+		"Selling Price List the session user is priced with."
+		if self._price_list is None:
+			self._price_list = get_session_price_list(self.settings)
+
+		return self._price_list
+
+	def get_customer_group(self):
+		"""
+		Customer Group the session user's prices are indexed for, see `get_indexed_customer_group`.
+		Shared pages (without `user_state`) are priced for it too, they are cached per group.
+		"""
+		if self._customer_group is None:
+			self._customer_group = get_indexed_customer_group(
+				get_session_customer_group(self.settings)
+			)
+
+		return self._customer_group
+
+	def get_discounts(self, discount_list):
+		"""
+		Get the discount range of all matching items from the price index.
+		Falls back to the range on the current page if nothing is indexed.
+
+		Returns:
+		        list: [min, max] discount percent, or empty list
+		"""
+		discounts = []
+		if self.settings.enabled and self.settings.show_price and self.get_price_list():
+			discounts = get_discount_range(
+				self.get_price_list(),
+				self.get_customer_group(),
+				f"select wi.`name` from ({self.get_base_query()}) wi {self.get_join_clause()}",
+			)
+
+		if not discounts and discount_list:
+			discounts = [min(discount_list), max(discount_list)]
+
+		return discounts
+
 	def build_item_group_filters(self, item_group):
 		"Add filters for Item group page and include Website Item Groups."
 		from webshop.webshop.doctype.override_doctype.item_group import get_child_groups_for_website
@@ -219,6 +649,10 @@ class ProductQuery:
 		Args:
 		        search_term (str): Search candidate
 		"""
+		if self.settings.product_search_mode == "Full Text" and has_search_index():
+			if self.build_fulltext_search(search_term):
+				return
+
 		# Default fields to search from
 		default_fields = {"item_code", "item_name", "web_long_description", "item_group"}
 
@@ -236,29 +670,64 @@ class ProductQuery:
 		for field in search_fields:
 			self.or_filters.append([field, "like", search])
 
-	def add_display_details(self, result, discount_list, cart_items):
+	def build_fulltext_search(self, search_term):
+		"""
+		Match the search term on the FULLTEXT index, every word as a prefix.
+		Relevance is blended into ranking, see `get_sort_expression`.
+
+		Returns:
+		        bool: False if no word is long enough to be indexed
+		"""
+		words = [
+			word
+			for word in re.sub(r"[^\w]+", " ", search_term).split()
+			if len(word) >= SEARCH_MIN_WORD_LENGTH
+		]
+		if not words:
+			return False
+
+		against = frappe.db.escape(" ".join(f"+{word}*" for word in words))
+		match = f"match({', '.join(f'`{field}`' for field in SEARCH_INDEX_FIELDS)}) against ({against} in boolean mode)"
+		self.joins.append(
+			f"""inner join (
+				select name, {match} as relevance
+				from `tabWebsite Item`
+				where {match}
+			) search on search.name = wi.name"""
+		)
+		self.search_relevance = True
+		return True
+
+	def add_display_details(self, result, discount_list):
 		"""Add price, availability, and cart quantity details in result."""
-		for item in result:
-			product_info = get_product_info_for_website(item.item_code, skip_quotation_creation=True).get(
-				"product_info"
+		hydrator = ProductHydrator(result, self.settings)
+		with self.timer.stage("prices"):
+			prices = hydrator.get_prices(
+				price_list=self.get_price_list() if self.settings.show_price else None,
+				for_party=self.user_state,
+				customer_group=self.get_customer_group() if self.settings.show_price else None,
 			)
+		with self.timer.stage("stock"):
+			stock_availability = (
+				hydrator.get_stock_availability() if self.settings.show_stock_availability else {}
+			)
+
+		for item in result:
+			details = hydrator.item_details.get(item.item_code) or {}
+			item.stock_uom = details.get("stock_uom")
+			item.sales_uom = details.get("sales_uom")
 
-			if product_info and product_info["price"]:
+			price = prices.get(item.item_code)
+			if price:
 				# update/mutate item and discount_list objects
-				self.get_price_discount_info(item, product_info["price"], discount_list)
+				self.get_price_discount_info(item, price, discount_list)
 
 			if self.settings.show_stock_availability:
-				self.get_stock_availability(item)
+				item.in_stock = stock_availability.get(item.item_code, False)
 
-			# Sepet bilgilerini ekle (cart_items artık dict: {item_code: qty})
-			item.in_cart = item.item_code in cart_items
-			item.qty = cart_items.get(item.item_code, 0) if cart_items else 0
-
-			item.wished = False
-			if frappe.db.exists(
-				"Wishlist Item", {"item_code": item.item_code, "parent": frappe.session.user}
-			):
-				item.wished = True
+		if self.user_state:
+			with self.timer.stage("user_state"):
+				hydrator.apply_user_state(with_cart=self.settings.enabled)
 
 		return result, discount_list
 
@@ -277,71 +746,84 @@ class ProductQuery:
 				"formatted_discount_rate"
 			)
 
-	def get_stock_availability(self, item):
-		"""Modify item object and add stock details."""
-		from webshop.templates.pages.wishlist import (
-			get_stock_availability as get_stock_availability_from_template,
+
+def get_session_price_list(settings):
+	"Selling Price List the session user is priced with, resolved from their party."
+	from webshop.webshop.shopping_cart.cart import _set_price_list
+
+	if frappe.session.user == "Guest":
+		return settings.price_list
+
+	return _set_price_list(settings, None)
+
+
+def get_session_customer_group(settings):
+	"Customer Group the session user is priced with, the default one for guests and suppliers."
+	from webshop.webshop.shopping_cart.cart import get_party
+
+	if frappe.session.user == "Guest":
+		return settings.default_customer_group
+
+	party = get_party()
+	if party.doctype == "Customer" and party.customer_group:
+		return party.customer_group
+
+	return settings.default_customer_group
+
+
+def get_count_cache_prefix():
+	"Prefix of cached counts of the current version, see `clear_product_count_cache`."
+	cache = frappe.cache()
+	# plain redis get, the version is a counter, not a pickled value
+	version = Redis.get(cache, cache.make_key(COUNT_CACHE_VERSION_KEY))
+	return f"{COUNT_CACHE_PREFIX}{cint(version)}:"
+
+
+def clear_product_count_cache():
+	"""
+	Invalidate cached listing counts, e.g. after Website Items change. Bumps the
+	version in their keys instead of scanning for them, older entries expire.
+	"""
+	cache = frappe.cache()
+	Redis.incr(cache, cache.make_key(COUNT_CACHE_VERSION_KEY))
+
+
+def has_search_index():
+	"Check if the Website Item FULLTEXT search index exists."
+	return frappe.cache().get_value(
+		SEARCH_INDEX_CACHE_KEY,
+		generator=lambda: bool(frappe.db.has_index("tabWebsite Item", SEARCH_INDEX_NAME)),
+	)
+
+
+def add_search_index():
+	"Add the FULLTEXT index used by the \"Full Text\" product search mode."
+	if not frappe.db.has_index("tabWebsite Item", SEARCH_INDEX_NAME):
+		fields = ", ".join(f"`{field}`" for field in SEARCH_INDEX_FIELDS)
+		frappe.db.sql_ddl(
+			f"alter table `tabWebsite Item` add fulltext index `{SEARCH_INDEX_NAME}` ({fields})"
 		)
 
-		item.in_stock = False
-		warehouse = item.get("website_warehouse")
-		is_stock_item = frappe.get_cached_value("Item", item.item_code, "is_stock_item")
+	frappe.cache().delete_value(SEARCH_INDEX_CACHE_KEY)
 
-		if item.get("on_backorder"):
-			return
 
-		if not is_stock_item:
-			if warehouse:
-				# product bundle case
-				item.in_stock = get_non_stock_item_status(item.item_code, "website_warehouse")
-			else:
-				item.in_stock = True
-		elif warehouse:
-			# stock item and has warehouse
-			item.in_stock = get_stock_availability_from_template(item.item_code, warehouse)
-
-	def get_cart_items(self):
-		"""
-		Sepetteki ürünleri item_code ve qty bilgisiyle döndürür
-		Returns: dict - {item_code: qty, ...}
-		"""
-		customer = get_customer(silent=True)
-		if customer:
-			quotation = frappe.get_all(
-				"Quotation",
-				fields=["name"],
-				filters={
-					"party_name": customer,
-					"contact_email": frappe.session.user,
-					"order_type": "Shopping Cart",
-					"docstatus": 0,
-				},
-				order_by="modified desc",
-				limit_page_length=1,
-			)
-			if quotation:
-				items = frappe.get_all(
-					"Quotation Item", 
-					fields=["item_code", "qty"], 
-					filters={"parent": quotation[0].get("name")}
-				)
-				# Dict olarak döndür: {item_code: qty}
-				return {row.item_code: row.qty for row in items}
-
-		return {}
-
-	def filter_results_by_discount(self, fields, result):
-		if fields and fields.get("discount"):
-			discount_percent = frappe.utils.flt(fields["discount"][0])
-			result = [
-				row
-				for row in result
-				if row.get("discount_percent") and row.discount_percent <= discount_percent
-			]
-
-		if self.filter_with_discount:
-			# no limit was added to results while querying
-			# slice results manually
-			result[: self.page_length]
-
-		return result
+def encode_cursor(sort_field, sort_reverse, value, name):
+	"""Encode the sort position of a row as an opaque, url safe cursor."""
+	if not isinstance(value, (int, float, str)):
+		value = str(value)  # datetime
+
+	payload = json.dumps([sort_field, int(sort_reverse), value, name], separators=(",", ":"))
+	return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor):
+	"""
+	Returns:
+	        tuple: (sort field, descending, sort value, name) of the row the cursor points at
+	"""
+	try:
+		sort_field, sort_reverse, value, name = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+	except Exception:
+		frappe.throw(_("Cursor is not valid."), title=_("Invalid Cursor"))
+
+	return sort_field, bool(sort_reverse), value, name
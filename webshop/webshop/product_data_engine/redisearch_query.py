@@ -0,0 +1,508 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and Contributors
+# License: GNU General Public License v3. See license.txt
+
+"""
+Product listings answered from the RediSearch index of Website Items (see
+`redisearch_utils`), selected by the "Product Listing Backend" of Webshop
+Settings.
+
+Items are counted with FT.SEARCH and paged with FT.AGGREGATE, which sorts
+ties by name. Facets and the discount range are counted with FT.AGGREGATE. Listings the index cannot
+answer are queried with SQL (`ProductQuery`), results have the same shape
+either way.
+"""
+
+import hashlib
+import json
+import re
+
+import frappe
+from frappe.utils import cint, flt
+from redis.commands.search import reducers
+from redis.commands.search.aggregation import AggregateRequest, Asc, Desc
+from redis.commands.search.query import Query
+
+from webshop.webshop.product_data_engine.attribute_index import get_attribute_index
+from webshop.webshop.product_data_engine.facets import FACET_CACHE_PREFIX, ProductFacetCounter
+from webshop.webshop.product_data_engine.price_index import get_indexed_customer_group
+from webshop.webshop.product_data_engine.query import (
+	COUNT_CACHE_TTL,
+	ProductQuery,
+	get_count_cache_prefix,
+)
+from webshop.webshop.redisearch_utils import (
+	TAG_SEPARATOR,
+	WEBSITE_ITEM_INDEX,
+	escape_tag_value,
+	get_attribute_tag,
+	get_filter_tag_field,
+	get_indexed_fields,
+	get_tag_field,
+	has_sortable_fields,
+	is_redisearch_enabled,
+)
+from webshop.webshop.utils import cache_codec
+
+# `ProductQuery` sort field: sortable field of the index
+SORT_FIELDS = {
+	"ranking": "ranking",
+	"price_list_rate": "price",
+	"web_item_name": "web_item_name",
+	"creation": "creation",
+}
+# filter fields that are TAG fields of every index version
+ALWAYS_INDEXED_FIELDS = ("item_group", "brand", "primary_supplier")
+FACET_VALUES_LIMIT = 1000  # values counted per facet
+MIN_PREFIX_LENGTH = 2  # shortest search word matched as a prefix
+
+
+def get_product_query(profile=None, settings=None, price_list=None, customer_group=None):
+	"""
+	Returns:
+	        ProductQuery: Query engine of the listing backend selected in Webshop Settings
+	"""
+	settings = settings or frappe.get_doc("Webshop Settings")
+	if settings.get("product_listing_backend") == "RediSearch" and is_redisearch_enabled():
+		return RediSearchProductQuery(
+			profile=profile, settings=settings, price_list=price_list, customer_group=customer_group
+		)
+
+	return ProductQuery(
+		profile=profile, settings=settings, price_list=price_list, customer_group=customer_group
+	)
+
+
+def get_facet_counter(engine, **kwargs):
+	"""
+	Returns:
+	        ProductFacetCounter: Facet counter of the backend `engine` queries with, its
+	                candidates priced like the listing of `engine`
+	"""
+	if engine.settings.show_price:
+		# resolved for the cache key of the listing already
+		kwargs.update(price_list=engine.get_price_list(), customer_group=engine.get_customer_group())
+
+	if isinstance(engine, RediSearchProductQuery):
+		return RediSearchFacetCounter(engine, **kwargs)
+
+	return ProductFacetCounter(**kwargs)
+
+
+class RediSearchProductQuery(ProductQuery):
+	"""ProductQuery answered from the Website Item index.
+
+	Matching item names are searched, sorted and paged in RediSearch, their
+	rows are then read by name and hydrated like SQL results. Listings
+	filtered on what the index does not hold (discounts, cursors, prices of
+	another price list, fields the live index version lacks) and failed
+	searches are queried with SQL.
+	"""
+
+	def query(
+		self,
+		attributes=None,
+		fields=None,
+		search_term=None,
+		start=0,
+		item_group=None,
+		cursor=None,
+		price_min=None,
+		price_max=None,
+	):
+		kwargs = dict(
+			attributes=attributes,
+			fields=fields,
+			search_term=search_term,
+			start=start,
+			item_group=item_group,
+			cursor=cursor,
+			price_min=price_min,
+			price_max=price_max,
+		)
+		if not self.can_answer(fields, cursor, price_min, price_max):
+			return super().query(**kwargs)
+
+		try:
+			return self.search_items(**kwargs)
+		except Exception:
+			frappe.log_error("RediSearch Product Query Failed")
+			return super().query(**kwargs)
+
+	def can_answer(self, fields=None, cursor=None, price_min=None, price_max=None):
+		"Check if the index holds everything the listing is filtered and sorted on."
+		indexed = get_indexed_fields()
+		if not indexed or not has_sortable_fields(indexed) or cursor:
+			return False
+
+		for field, values in (fields or {}).items():
+			if not values or field.startswith("_"):
+				continue
+			if field == "discount":
+				return False
+			if field not in ALWAYS_INDEXED_FIELDS and field not in indexed["filter_fields"]:
+				return False
+
+		uses_price = flt(price_min) or flt(price_max) or self.sort_field == "price_list_rate"
+		if uses_price and not self.has_indexed_prices():
+			return False
+
+		return True
+
+	def has_indexed_prices(self):
+		"Check if the session is priced like the index, with the default price list and customer group."
+		return self.get_price_list() == self.settings.price_list and (
+			self.get_customer_group() == get_indexed_customer_group(self.settings.default_customer_group)
+		)
+
+	def search_items(
+		self, attributes=None, fields=None, search_term=None, start=0, item_group=None, **kwargs
+	):
+		with self.timer.stage("filters"):
+			clauses = self.build_search_clauses(
+				fields=fields,
+				search_term=search_term,
+				item_group=item_group,
+				price_min=kwargs.get("price_min"),
+				price_max=kwargs.get("price_max"),
+			)
+			attribute_clauses = self.build_attribute_clauses(attributes)
+
+		if attribute_clauses is None:
+			return get_empty_result()
+
+		clauses += attribute_clauses
+		with self.timer.stage("items"):
+			query_string = join_clauses(clauses)
+			total = get_index().search(Query(query_string).no_content().paging(0, 0)).total
+
+			# FT.SEARCH sorts on one field, ties are broken by name as in SQL for stable pages
+			sort_field = SORT_FIELDS.get(self.sort_field, "ranking")
+			order = Desc if self.sort_reverse else Asc
+			start, page_length = cint(start), cint(self.page_length)
+			request = (
+				AggregateRequest(query_string)
+				.load(f"@{sort_field}", "@name")
+				.sort_by(order(f"@{sort_field}"), order("@name"), max=start + page_length)
+				.limit(start, page_length)
+			)
+			rows = get_index().aggregate(request).rows
+			items = self.get_items_by_name([parse_row(row).get("name") for row in rows])
+
+		result, discount_list = self.add_display_details(items, [])
+
+		with self.timer.stage("discounts"):
+			discounts = self.get_indexed_discounts(clauses)
+			if not discounts and discount_list:
+				discounts = [min(discount_list), max(discount_list)]
+
+		return {
+			"items": result,
+			"items_count": cint(total),
+			"items_count_approximate": False,
+			"discounts": discounts,
+			"next_cursor": None,  # cursors seek in SQL, pages are addressed by `start`
+		}
+
+	def build_search_clauses(
+		self, fields=None, search_term=None, item_group=None, price_min=None, price_max=None
+	):
+		"""
+		Counterpart of `build_filters`.
+
+		Returns:
+		        list: Query clauses of field, price, item group, search and settings filters
+		"""
+		# hashes of unpublished items may linger until they are deleted
+		clauses = ["@published:[1 1]"]
+		for field, values in (fields or {}).items():
+			if not values or field == "discount" or field.startswith("_"):
+				continue
+			clauses.append(get_tag_clause(get_filter_tag_field(field), values))
+
+		if flt(price_min) or flt(price_max):
+			# unpriced items are excluded, as in SQL
+			low = flt(price_min) if flt(price_min) else "(0"
+			high = flt(price_max) if flt(price_max) else "+inf"
+			clauses.append(f"@price:[{low} {high}]")
+
+		if item_group:
+			clauses.append(self.get_item_group_clause(item_group))
+
+		if search_term:
+			words = re.sub(r"[^\w]+", " ", search_term).split()
+			if words:
+				clauses.append(
+					" ".join(f"{word}*" if len(word) >= MIN_PREFIX_LENGTH else word for word in words)
+				)
+
+		if self.settings.hide_variants:
+			clauses.append("@is_variant:[0 0]")
+
+		return clauses
+
+	def get_item_group_clause(self, item_group):
+		"Items of the group (and its descendants if it includes them), or listed under it."
+		from webshop.webshop.doctype.override_doctype.item_group import get_child_groups_for_website
+
+		item_groups = [item_group]
+		if frappe.db.get_value("Item Group", item_group, "include_descendants"):
+			item_groups = [
+				group.name for group in get_child_groups_for_website(item_group, include_self=True)
+			]
+
+		return (
+			f"({get_tag_clause(get_tag_field('item_group'), item_groups)}"
+			f" | {get_tag_clause(get_tag_field('website_item_groups'), [item_group])})"
+		)
+
+	def build_attribute_clauses(self, attributes):
+		"""
+		Returns:
+		        list: Query clauses of attribute filters, None if an attribute matches no value
+		"""
+		clauses = []
+		for attribute, values in (attributes or {}).items():
+			values = get_attribute_index().get_values(attribute, values)
+			if not values:
+				return None
+
+			tags = [get_attribute_tag(attribute, value) for value in values]
+			clauses.append(get_tag_clause(get_tag_field("attributes"), tags))
+
+		return clauses
+
+	def get_items_by_name(self, names):
+		"Rows of the listed fields of `names`, in their order."
+		if not names:
+			return []
+
+		rows = frappe.get_all(
+			"Website Item",
+			fields=self.get_query_fields(),
+			filters={"name": ["in", names], "published": 1},
+		)
+		rows_by_name = {row.name: row for row in rows}
+		return [rows_by_name[name] for name in names if name in rows_by_name]
+
+	def get_indexed_discounts(self, clauses):
+		"""
+		Returns:
+		        list: [min, max] discount percent of all matching items, empty if none is
+		                discounted or the session is priced otherwise than the index
+		"""
+		if not (self.settings.enabled and self.settings.show_price):
+			return []
+		if not self.has_indexed_prices():
+			return []
+
+		request = AggregateRequest(join_clauses(clauses + ["@discount_percent:[(0 +inf]"])).group_by(
+			[],
+			reducers.min("@discount_percent").alias("min"),
+			reducers.max("@discount_percent").alias("max"),
+		)
+		rows = get_index().aggregate(request).rows
+		row = parse_row(rows[0]) if rows else {}
+		if row.get("min") in (None, "", "nan"):
+			return []
+
+		return [flt(row["min"]), flt(row["max"])]
+
+
+class RediSearchFacetCounter(ProductFacetCounter):
+	"""ProductFacetCounter answered with FT.AGGREGATE.
+
+	A facet is counted over the items matching every filter but its own
+	selection, grouped by the values of its TAG field. Attribute facets
+	without a selection share one aggregation.
+	"""
+
+	def __init__(self, engine, **kwargs):
+		super().__init__(**kwargs)
+		self.engine = engine
+
+	def get_facet_counts(self):
+		counts = {"fields": {}, "attributes": {}}
+		if not (self.facet_fields or self.facet_attributes):
+			return counts
+
+		if not self.can_answer():
+			return super().get_facet_counts()
+
+		try:
+			return self.get_indexed_facet_counts()
+		except Exception:
+			frappe.log_error("RediSearch Facet Count Failed")
+			return super().get_facet_counts()
+
+	def can_answer(self):
+		indexed = get_indexed_fields()
+		if not indexed:
+			return False
+
+		for df in self.facet_fields:
+			if df.fieldname not in ALWAYS_INDEXED_FIELDS and df.fieldname not in indexed["filter_fields"]:
+				return False
+
+		return self.engine.can_answer(self.field_filters, None, self.price_min, self.price_max)
+
+	def get_indexed_facet_counts(self):
+		counts = {"fields": {}, "attributes": {}}
+
+		facet_fieldnames = {df.fieldname for df in self.facet_fields}
+		other_fields = {
+			field: values for field, values in self.field_filters.items() if field not in facet_fieldnames
+		}
+		other_attributes = {
+			attribute: values
+			for attribute, values in self.attribute_filters.items()
+			if attribute not in self.facet_attributes and values
+		}
+
+		clauses = self.engine.build_search_clauses(
+			fields=other_fields,
+			search_term=self.search_term,
+			item_group=self.item_group,
+			price_min=self.price_min,
+			price_max=self.price_max,
+		)
+		attribute_clauses = self.engine.build_attribute_clauses(other_attributes)
+		if attribute_clauses is None:
+			return counts
+		clauses += attribute_clauses
+
+		selection_clauses = self.get_selection_clauses()
+		# ranges without values select no items, facets filtered by them count nothing
+		empty_selections = {facet for facet, clause in selection_clauses.items() if clause is None}
+		cache_key = self.get_indexed_cache_key(clauses, selection_clauses)
+		cached_counts = cache_codec.get_value(cache_key)
+		if cached_counts is not None:
+			return cached_counts
+
+		for df in self.facet_fields:
+			facet = self.get_facet_key("fields", df.fieldname)
+			if empty_selections - {facet}:
+				continue
+
+			hash_field = "supplier" if df.fieldname == "primary_supplier" else df.fieldname
+			other_selections = self.get_other_selections(selection_clauses, facet)
+			values = self.aggregate(clauses + other_selections, hash_field)
+			if values:
+				counts["fields"][df.fieldname] = values
+
+		attribute_values = {}
+		for attribute in self.facet_attributes:
+			facet = self.get_facet_key("attributes", attribute)
+			# facets without a selection are counted over the same items
+			group = facet if facet in selection_clauses else None
+			if empty_selections - {group}:
+				continue
+
+			if group not in attribute_values:
+				attribute_values[group] = self.aggregate(
+					clauses + self.get_other_selections(selection_clauses, group), "attributes"
+				)
+
+			prefix = get_attribute_tag(attribute, "")
+			values = {
+				value[len(prefix) :]: count
+				for value, count in attribute_values[group].items()
+				if value.startswith(prefix)
+			}
+			if values:
+				counts["attributes"][attribute] = values
+
+		cache_codec.set_value(cache_key, counts, expires_in_sec=COUNT_CACHE_TTL)
+		return counts
+
+	def get_selection_clauses(self):
+		"""
+		Returns:
+		        dict: {facet key: query clause of its selection, None if nothing is selected}
+		"""
+		selection_clauses = {}
+		for facet, values in self.get_selection().items():
+			group, name = facet.split(":", 1)
+			if group == "attributes":
+				tag_field = get_tag_field("attributes")
+				values = [get_attribute_tag(name, value) for value in values]
+			else:
+				tag_field = get_filter_tag_field(name)
+
+			selection_clauses[facet] = get_tag_clause(tag_field, values) if values else None
+
+		return selection_clauses
+
+	@staticmethod
+	def get_other_selections(selection_clauses, facet):
+		return [
+			clause for other_facet, clause in selection_clauses.items() if other_facet != facet and clause
+		]
+
+	def get_indexed_cache_key(self, clauses, selection_clauses):
+		signature = json.dumps(
+			[
+				"redisearch",
+				clauses,
+				selection_clauses,
+				[df.fieldname for df in self.facet_fields],
+				self.facet_attributes,
+			],
+			sort_keys=True,
+			default=str,
+		)
+		return get_count_cache_prefix() + FACET_CACHE_PREFIX + hashlib.md5(signature.encode()).hexdigest()
+
+	def aggregate(self, clauses, hash_field):
+		"""
+		Returns:
+		        dict: {value: number of matching items} of a TAG field
+		"""
+		request = (
+			AggregateRequest(join_clauses(clauses))
+			.load(f"@{hash_field}")
+			.apply(value=f'split(@{hash_field}, "{TAG_SEPARATOR}")')
+			.group_by("@value", reducers.count().alias("count"))
+			.limit(0, FACET_VALUES_LIMIT)
+		)
+
+		counts = {}
+		for row in get_index().aggregate(request).rows:
+			row = parse_row(row)
+			if row.get("value"):
+				counts[row["value"]] = cint(row.get("count"))
+
+		return counts
+
+
+def get_index():
+	# alias of the live index version
+	return frappe.cache().ft(WEBSITE_ITEM_INDEX)
+
+
+def get_tag_clause(tag_field, values):
+	if not isinstance(values, list):
+		values = [values]
+
+	return f"@{tag_field}:{{{' | '.join(escape_tag_value(value) for value in values)}}}"
+
+
+def join_clauses(clauses):
+	"Intersection of `clauses`, all documents if there are none."
+	return " ".join(clauses) or "*"
+
+
+def parse_row(row):
+	"{property: value} of a flat FT.AGGREGATE result row."
+	return {
+		frappe.safe_decode(row[i]): frappe.safe_decode(row[i + 1]) for i in range(0, len(row) - 1, 2)
+	}
+
+
+def get_empty_result():
+	return {
+		"items": [],
+		"items_count": 0,
+		"items_count_approximate": False,
+		"discounts": [],
+		"next_cursor": None,
+	}
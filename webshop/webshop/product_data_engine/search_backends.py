@@ -0,0 +1,440 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and Contributors
+# License: GNU General Public License v3. See license.txt
+
+"""
+Backends `product_search` searches published Website Items with (see
+`get_search_backend`):
+
+- RediSearch, when it is enabled
+- the local index otherwise, an in-process BM25 index (see `local_search`)
+  of the same fields RediSearch indexes, kept up to date per Website Item
+- SQL (LIKE), when a backend fails or until the local index is first built
+
+Apps can plug in another backend with the `webshop_search_backend` hook, the
+path of a `SearchBackend` subclass.
+"""
+
+from functools import partial
+
+import frappe
+from frappe.utils import cint, cstr, flt
+from redis.commands.search.query import NumericFilter, Query
+
+from webshop.webshop.product_data_engine.local_search import LocalSearchIndex
+from webshop.webshop.redisearch_utils import (
+	TAG_FIELDS,
+	WEBSITE_ITEM_INDEX,
+	WEBSITE_ITEM_NAME_AUTOCOMPLETE,
+	escape_tag_value,
+	get_fields_indexed,
+	get_indexed_fields,
+	get_tag_field,
+	get_web_items_chunk,
+	has_sortable_fields,
+	is_redisearch_enabled,
+	make_key,
+)
+
+# sort_by: (sortable field, ascending)
+SEARCH_SORT_OPTIONS = {
+	"ranking": ("ranking", False),
+	"price_asc": ("price", True),
+	"price_desc": ("price", False),
+	"name": ("web_item_name", True),
+}
+
+# {"version": snapshot version, "change": last change in the snapshot}
+LOCAL_SEARCH_VERSION_KEY = "webshop_local_search_version"
+# stream of Website Items saved or deleted, see `record_local_search_change`
+LOCAL_SEARCH_CHANGES_KEY = "webshop_local_search_changes"
+LOCAL_SEARCH_MAX_CHANGES = 5000  # replayed changes a new snapshot is built after
+LOCAL_SEARCH_SNAPSHOT = "webshop_local_search.json"
+# indexed fields that are returned with results, but not searched
+LOCAL_SEARCH_STORED_FIELDS = ("name", "route", "thumbnail", "website_image", "ranking")
+LOCAL_SEARCH_FILTER_FIELDS = ("item_group", "brand")
+# relevance of a match per field, other fields weigh 1
+LOCAL_SEARCH_FIELD_WEIGHTS = {"web_item_name": 3.0, "item_name": 2.0, "brand": 1.5, "item_group": 1.5}
+# sort_by: key of stored fields, results are sorted by relevance by default
+LOCAL_SEARCH_SORT_KEYS = {
+	"ranking": lambda doc: -cint(doc.get("ranking")),
+	"name": lambda doc: cstr(doc.get("web_item_name")).lower(),
+}
+
+# site -> LocalSearchReplica, kept for the lifetime of the worker process
+_local_search_replicas = {}
+
+
+class SearchBackend:
+	"Searches published Website Items for `product_search`."
+
+	name = None
+
+	def search(self, query, start=0, limit=8, sort_by=None, filters=None, fuzzy_search=True):
+		"""
+		Args:
+		        query (str): Search term
+		        sort_by (str, optional): Key of `SEARCH_SORT_OPTIONS`, the backend's own order if not set
+		        filters (dict, optional): See `product_search`
+
+		Returns:
+		        dict: {"results": list of Website Item dicts, "total": number of matches, if known}
+		"""
+		raise NotImplementedError
+
+	def suggest(self, prefix, limit=8):
+		"""
+		Returns:
+		        list: Names of Website Items starting with `prefix`
+		"""
+		raise NotImplementedError
+
+
+class RediSearchBackend(SearchBackend):
+	name = "redisearch"
+
+	def search(self, query, start=0, limit=8, sort_by=None, filters=None, fuzzy_search=True):
+		redis = frappe.cache()
+		cleaned_query = clean_up_query(query)
+
+		# alias, keeps serving the live index version while a new one is built
+		redisearch = redis.ft(WEBSITE_ITEM_INDEX)
+		suggestions = redisearch.sugget(
+			WEBSITE_ITEM_NAME_AUTOCOMPLETE,
+			cleaned_query,
+			num=limit,
+			fuzzy=fuzzy_search and len(query) > 3,
+		)
+
+		query_string = cleaned_query
+		for s in suggestions:
+			query_string += f"|('{clean_up_query(s.string)}')"
+
+		q = build_search_query(query_string, filters or {}, sort_by).paging(start, limit)
+		results = redisearch.search(q)
+
+		return {"results": list(map(convert_to_dict, results.docs)), "total": results.total}
+
+	def suggest(self, prefix, limit=8):
+		redisearch = frappe.cache().ft(WEBSITE_ITEM_INDEX)
+		suggestions = redisearch.sugget(WEBSITE_ITEM_NAME_AUTOCOMPLETE, prefix, num=limit)
+		return [s.string for s in suggestions]
+
+
+class LocalSearchBackend(SearchBackend):
+	"""
+	Ranked search without RediSearch. Only the item_group and brand filters and
+	sorting by ranking or name apply, like the SQL fallback ignores the others.
+	"""
+
+	name = "local"
+
+	def __init__(self, index=None):
+		self.index = index
+
+	def get_index(self):
+		return self.index or get_local_search_index()
+
+	def search(self, query, start=0, limit=8, sort_by=None, filters=None, fuzzy_search=True):
+		index = self.get_index()
+		filters = filters or {}
+		total, matches = index.search(
+			query,
+			start=start,
+			limit=limit,
+			filters={field: filters[field] for field in LOCAL_SEARCH_FILTER_FIELDS if filters.get(field)},
+			sort=LOCAL_SEARCH_SORT_KEYS.get(sort_by),
+		)
+
+		return {
+			"results": [set_thumbnail_url(dict(index.documents[doc_id])) for doc_id, _score in matches],
+			"total": total,
+		}
+
+	def suggest(self, prefix, limit=8):
+		index = self.get_index()
+		return [index.documents[doc_id].get("web_item_name") for doc_id in index.complete(prefix, limit)]
+
+
+class SQLSearchBackend(SearchBackend):
+	"Unranked LIKE search, without filters and completion."
+
+	name = "sql"
+
+	def search(self, query, start=0, limit=8, sort_by=None, filters=None, fuzzy_search=True):
+		return {"results": get_product_data(query, start, limit)}
+
+	def suggest(self, prefix, limit=8):
+		return frappe.get_all(
+			"Website Item",
+			filters={"published": 1, "web_item_name": ["like", f"{prefix}%"]},
+			order_by="ranking desc",
+			limit=limit,
+			pluck="web_item_name",
+		)
+
+
+def get_search_backend():
+	"""
+	Returns:
+	        SearchBackend: Of the last `webshop_search_backend` hook if apps set one,
+	                RediSearch if it is enabled, the local index otherwise (SQL until its
+	                first snapshot is built)
+	"""
+	backend = frappe.get_hooks("webshop_search_backend")
+	if backend:
+		return frappe.get_attr(backend[-1])()
+
+	if is_redisearch_enabled():
+		return RediSearchBackend()
+
+	index = get_local_search_index()
+	if index is None:
+		return SQLSearchBackend()
+
+	return LocalSearchBackend(index)
+
+
+class LocalSearchReplica:
+	"""The local search index of a site in this worker process.
+
+	It is loaded from the snapshot the rebuild job writes (see
+	`rebuild_local_search_index`), then kept up to date by replaying the Website
+	Items changed since, which saves and deletions add to a Redis stream (see
+	`record_local_search_change`). Requests never rebuild the whole index.
+	"""
+
+	def __init__(self):
+		self.stamp = None
+		self.index = None
+		self.last_change = None
+
+	def ensure_fresh(self):
+		"""
+		Returns:
+		        LocalSearchIndex: Up to date index, None if no snapshot is built for the
+		                current version and indexed fields yet
+		"""
+		fields = get_fields_indexed()
+		version = frappe.cache().get_value(LOCAL_SEARCH_VERSION_KEY) or {}
+		stamp = get_local_search_stamp(version.get("version"), fields)
+
+		if stamp != self.stamp:
+			index = version and LocalSearchIndex.load(get_local_search_snapshot_path(), stamp)
+			if not index:
+				enqueue_local_search_rebuild()
+				return None
+
+			self.stamp, self.index, self.last_change = stamp, index, version["change"]
+
+		self.apply_changes(fields)
+		return self.index
+
+	def apply_changes(self, fields):
+		"Index the Website Items changed after `last_change` again, or drop them."
+		entries = frappe.cache().xrange(make_key(LOCAL_SEARCH_CHANGES_KEY), min=self.last_change)
+		# the range includes the last applied change
+		entries = [(frappe.safe_decode(entry_id), data) for entry_id, data in entries]
+		entries = [entry for entry in entries if entry[0] != self.last_change]
+		if not entries:
+			return
+
+		names = list({frappe.safe_decode(data[b"name"]) for entry_id, data in entries})
+		items = frappe.get_all(
+			"Website Item",
+			filters={"name": ["in", names], "published": 1},
+			fields=get_local_search_stored_fields(fields),
+		)
+
+		published = set()
+		for item in items:
+			add_to_local_search_index(self.index, item)
+			published.add(item.name)
+
+		for name in names:
+			if name not in published:
+				self.index.remove(name)
+
+		self.last_change = entries[-1][0]
+		if len(entries) > LOCAL_SEARCH_MAX_CHANGES:
+			# fresh workers would replay as many, start them from a new snapshot
+			enqueue_local_search_rebuild()
+
+
+def get_local_search_index():
+	"Get the up to date local search index of the current site, None if it is not built yet."
+	replica = _local_search_replicas.setdefault(frappe.local.site, LocalSearchReplica())
+	return replica.ensure_fresh()
+
+
+def rebuild_local_search_index():
+	"""
+	Build the local search index from the database and save its snapshot, for the
+	current indexed fields. Workers load it on their next search and replay the
+	changes recorded after it was started, older changes are trimmed.
+	"""
+	cache = frappe.cache()
+	changes_key = make_key(LOCAL_SEARCH_CHANGES_KEY)
+	# changes recorded while the index is built are replayed on top, which is idempotent
+	last_entry = cache.xrevrange(changes_key, count=1)
+	last_change = frappe.safe_decode(last_entry[0][0]) if last_entry else "0-0"
+
+	fields = get_fields_indexed()
+	index = build_local_search_index(fields)
+
+	version = frappe.generate_hash(length=10)
+	index.save(get_local_search_snapshot_path(), get_local_search_stamp(version, fields))
+	cache.set_value(LOCAL_SEARCH_VERSION_KEY, {"version": version, "change": last_change})
+
+	if last_entry:
+		cache.xtrim(changes_key, minid=last_change)
+
+
+def enqueue_local_search_rebuild():
+	frappe.enqueue(
+		"webshop.webshop.product_data_engine.search_backends.rebuild_local_search_index",
+		queue="long",
+		job_id=f"webshop_local_search_rebuild_{frappe.local.site}",
+		deduplicate=True,
+		now=frappe.flags.in_test,
+	)
+
+
+def build_local_search_index(fields):
+	"""
+	Index published Website Items in chunks. `fields` are returned with results,
+	all but `LOCAL_SEARCH_STORED_FIELDS` are searched.
+	"""
+	index = LocalSearchIndex(
+		{
+			field: LOCAL_SEARCH_FIELD_WEIGHTS.get(field, 1.0)
+			for field in fields
+			if field not in LOCAL_SEARCH_STORED_FIELDS
+		}
+	)
+	stored_fields = get_local_search_stored_fields(fields)
+
+	last_name = ""
+	while True:
+		items = get_web_items_chunk(stored_fields, last_name)
+		if not items:
+			break
+
+		for item in items:
+			add_to_local_search_index(index, item)
+		last_name = items[-1].name
+
+	return index
+
+
+def add_to_local_search_index(index, item):
+	index.add(item.name, item, stored=dict(item), title=item.web_item_name, boost=cint(item.ranking))
+
+
+def get_local_search_stored_fields(fields):
+	return list(dict.fromkeys(fields + list(LOCAL_SEARCH_FILTER_FIELDS)))
+
+
+def get_local_search_stamp(version, fields):
+	return f"{version}:{','.join(fields)}"
+
+
+def get_local_search_snapshot_path():
+	return frappe.get_site_path("private", LOCAL_SEARCH_SNAPSHOT)
+
+
+def record_local_search_change(name):
+	"Replay the Website Item `name` into the local search indexes of all workers once it is committed."
+	frappe.db.after_commit.add(partial(add_local_search_change, name))
+
+
+def add_local_search_change(name):
+	frappe.cache().xadd(make_key(LOCAL_SEARCH_CHANGES_KEY), {"name": name})
+
+
+def get_product_data(search=None, start=0, limit=12):
+	"""Fetch product data with thumbnail fallback"""
+	query = """
+		SELECT
+			web_item_name, item_name, item_code, brand, route,
+			website_image, thumbnail, item_group,
+			description, web_long_description as website_description,
+			website_warehouse, ranking
+		FROM `tabWebsite Item`
+		WHERE published = 1
+		"""
+
+	if search:
+		query += """ and (item_name like %(search)s
+				or web_item_name like %(search)s
+				or brand like %(search)s
+				or web_long_description like %(search)s)"""
+		search = "%" + cstr(search) + "%"
+
+	query += """ ORDER BY ranking desc, modified desc limit %s offset %s""" % (
+		cint(limit),
+		cint(start),
+	)
+
+	results = frappe.db.sql(query, {"search": search}, as_dict=1)  # nosemgrep
+
+	for item in results:
+		set_thumbnail_url(item)
+
+	return results
+
+
+def build_search_query(query_string, filters, sort_by=None):
+	"Full text query narrowed down by tag and numeric `filters`, sorted by `sort_by`."
+	clauses = [f"({query_string})"]
+	for field in TAG_FIELDS:
+		values = filters.get(field)
+		if not values:
+			continue
+
+		if not isinstance(values, list):
+			values = [values]
+		tags = " | ".join(escape_tag_value(value) for value in values)
+		clauses.append(f"@{get_tag_field(field)}:{{{tags}}}")
+
+	q = Query(" ".join(clauses))
+
+	if has_sortable_fields(get_indexed_fields() or {}):
+		# hashes of unpublished items may linger until they are deleted
+		q.add_filter(NumericFilter("published", 1, 1))
+
+	if cint(filters.get("in_stock")):
+		q.add_filter(NumericFilter("in_stock", 1, 1))
+
+	price_min, price_max = filters.get("price_min"), filters.get("price_max")
+	if price_min not in (None, "") or price_max not in (None, ""):
+		q.add_filter(
+			NumericFilter(
+				"price",
+				flt(price_min) if price_min not in (None, "") else NumericFilter.NEG_INF,
+				flt(price_max) if price_max not in (None, "") else NumericFilter.INF,
+			)
+		)
+
+	sort_field, ascending = SEARCH_SORT_OPTIONS.get(sort_by) or SEARCH_SORT_OPTIONS["ranking"]
+	return q.sort_by(sort_field, asc=ascending)
+
+
+def clean_up_query(query):
+	return "".join(c for c in query if c.isalnum() or c.isspace())
+
+
+def convert_to_dict(redis_search_doc):
+	"""Convert Redis result to dict with thumbnail URL normalization"""
+	return set_thumbnail_url(redis_search_doc.__dict__)
+
+
+def set_thumbnail_url(item):
+	"Fall back to the website image as thumbnail, with an absolute URL."
+	if not item.get("thumbnail") and item.get("website_image"):
+		item["thumbnail"] = item["website_image"]
+
+	thumbnail = item.get("thumbnail")
+	if thumbnail and not thumbnail.startswith("http"):
+		item["thumbnail"] = frappe.utils.get_url(thumbnail)
+
+	return item
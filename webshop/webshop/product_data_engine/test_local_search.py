@@ -0,0 +1,96 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and contributors
+# For license information, please see license.txt
+
+import os
+import tempfile
+import unittest
+
+from webshop.webshop.product_data_engine.local_search import LocalSearchIndex, tokenize
+
+
+class TestLocalSearch(unittest.TestCase):
+	"Test the local search index, it needs no site."
+
+	def setUp(self):
+		self.index = LocalSearchIndex({"web_item_name": 3.0, "description": 1.0})
+		items = [
+			("WEB-1", "Gaming Laptop", "Fast laptop with a large screen", 1),
+			("WEB-2", "Office Laptop", "Light laptop for the office", 5),
+			("WEB-3", "Laptop Bag", "Bag for laptops and tablets", 2),
+			("WEB-4", "Desk Lamp", "Bright lamp for the office desk", 3),
+			("WEB-5", "Çay Bardağı", "Tea glass", 0),
+		]
+		for name, web_item_name, description, ranking in items:
+			self.index.add(
+				name,
+				{"web_item_name": web_item_name, "description": description},
+				stored={"name": name, "web_item_name": web_item_name, "ranking": ranking},
+				title=web_item_name,
+				boost=ranking,
+			)
+
+	def get_names(self, query, **kwargs):
+		return [name for name, _score in self.index.search(query, **kwargs)[1]]
+
+	def test_tokenize(self):
+		self.assertEqual(tokenize("Çay-Bardağı, 2 pcs"), ["cay", "bardagi", "2", "pcs"])
+		self.assertEqual(tokenize(None), [])
+
+	def test_search_ranking(self):
+		"Matches in weighted fields rank higher, equally relevant items by boost."
+		self.assertEqual(self.get_names("office"), ["WEB-2", "WEB-4"])
+		self.assertEqual(self.get_names("lamp"), ["WEB-4"])
+		self.assertEqual(self.get_names("cay bardagi")[0], "WEB-5")
+
+		# every word must match
+		self.assertEqual(self.get_names("office lamp"), ["WEB-4"])
+		self.assertEqual(self.get_names("gaming lamp"), [])
+
+	def test_search_prefix_and_paging(self):
+		"The last word also matches as a prefix, results are paged with the total."
+		self.assertEqual(set(self.get_names("lapto")), {"WEB-1", "WEB-2", "WEB-3"})
+		self.assertEqual(self.get_names("lap desk"), [])
+
+		total, page = self.index.search("laptop", start=1, limit=1)
+		self.assertEqual(total, 3)
+		self.assertEqual(len(page), 1)
+
+	def test_search_filters_and_sort(self):
+		ranking = lambda doc: -doc["ranking"]  # noqa: E731
+		self.assertEqual(self.get_names("laptop", sort=ranking), ["WEB-2", "WEB-3", "WEB-1"])
+		self.assertEqual(set(self.get_names("laptop", filters={"ranking": [1, 2]})), {"WEB-1", "WEB-3"})
+		self.assertEqual(self.get_names("laptop", filters={"ranking": 5}), ["WEB-2"])
+
+	def test_update_and_remove(self):
+		self.index.add("WEB-4", {"web_item_name": "Desk Chair"}, title="Desk Chair")
+		self.assertEqual(self.get_names("lamp"), [])
+		self.assertEqual(self.get_names("chair"), ["WEB-4"])
+
+		self.index.remove("WEB-4")
+		self.assertEqual(self.get_names("chair"), [])
+		self.assertNotIn("chair", self.index.postings)
+		self.assertEqual(self.index.complete("desk"), [])
+		self.assertEqual(len(self.index), 4)
+
+	def test_complete(self):
+		"Titles starting with the prefix, by boost."
+		self.assertEqual(self.index.complete("lap"), ["WEB-3"])
+		self.assertEqual(self.index.complete("ÇAY"), ["WEB-5"])
+		self.assertEqual(self.index.complete("x"), [])
+
+	def test_snapshot(self):
+		with tempfile.TemporaryDirectory() as directory:
+			path = os.path.join(directory, "index.json")
+			self.index.save(path, stamp="v1")
+
+			self.assertIsNone(LocalSearchIndex.load(path, stamp="v2"))
+			self.assertIsNone(LocalSearchIndex.load(os.path.join(directory, "missing.json")))
+
+			loaded = LocalSearchIndex.load(path, stamp="v1")
+			self.assertEqual(loaded.search("office"), self.index.search("office"))
+			self.assertEqual(loaded.complete("lap"), ["WEB-3"])
+
+			# a loaded index can be updated
+			loaded.remove("WEB-2")
+			self.assertEqual(self.get_names("office"), ["WEB-2", "WEB-4"])
+			self.assertEqual([name for name, _score in loaded.search("office")[1]], ["WEB-4"])
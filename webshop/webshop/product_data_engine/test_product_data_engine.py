@@ -80,6 +80,55 @@ class TestProductDataEngine(unittest.TestCase):
 		self.assertEqual(items[1].get("item_code"), "Test 12I Laptop")
 		self.assertEqual(items[2].get("item_code"), "Test 11I Laptop")
 
+	def test_product_list_count_across_pages(self):
+		"Test if item count is the total count on every page."
+		engine = ProductQuery()
+		first_page = engine.query(attributes={}, fields={}, search_term=None, start=0, item_group=None)
+
+		engine = ProductQuery()
+		next_page = engine.query(attributes={}, fields={}, search_term=None, start=4, item_group=None)
+
+		self.assertGreaterEqual(first_page.get("items_count"), 7)
+		self.assertEqual(first_page.get("items_count"), next_page.get("items_count"))
+		self.assertFalse(first_page.get("items_count_approximate"))
+
+	def test_product_count_cache_invalidation(self):
+		"Test if clearing the count cache moves counts to new keys instead of deleting them."
+		from webshop.webshop.product_data_engine.query import clear_product_count_cache
+
+		engine = ProductQuery()
+		engine.query(fields={})
+		cache_key = engine.get_count_cache_key()
+		self.assertIsNotNone(frappe.cache().get_value(cache_key))
+
+		clear_product_count_cache()
+		self.assertNotEqual(engine.get_count_cache_key(), cache_key)
+		self.assertIsNone(frappe.cache().get_value(engine.get_count_cache_key()))
+
+	def test_product_list_cursor_paging(self):
+		"Test if seeking with a cursor returns the same page as an offset."
+		for sort_by in (None, "name_asc", "new"):
+			engine = ProductQuery()
+			engine.set_sort(sort_by)
+			first_page = engine.query(attributes={}, fields={}, search_term=None, start=0)
+			self.assertTrue(first_page.get("next_cursor"))
+
+			engine = ProductQuery()
+			engine.set_sort(sort_by)
+			seek_page = engine.query(
+				attributes={}, fields={}, search_term=None, cursor=first_page["next_cursor"]
+			)
+
+			engine = ProductQuery()
+			engine.set_sort(sort_by)
+			offset_page = engine.query(attributes={}, fields={}, search_term=None, start=4)
+
+			self.assertEqual(
+				[item.item_code for item in seek_page["items"]],
+				[item.item_code for item in offset_page["items"]],
+			)
+			self.assertEqual(seek_page["items_count"], first_page["items_count"])
+
 	def test_change_product_ranking(self):
 		"Test if item on second page appear on first if ranking is changed."
 		item_code = "Test 12I Laptop"
@@ -131,6 +180,60 @@ class TestProductDataEngine(unittest.TestCase):
 		self.assertIn("Products", valid_item_groups)
 		self.assertIn("Raw Material", valid_item_groups)
 
+	def test_item_group_tree(self):
+		"Test if the cached Item Group tree answers like the nested set queries."
+		from unittest.mock import patch
+
+		from frappe.utils.nestedset import get_ancestors_of, get_descendants_of
+
+		from webshop.webshop.product_data_engine.item_group_tree import (
+			bump_item_group_tree_version,
+			get_item_group_tree,
+		)
+
+		bump_item_group_tree_version()
+		tree = get_item_group_tree()
+		root = next(name for name, group in tree.groups.items() if not group.parent_item_group)
+
+		self.assertEqual(
+			{group.name for group in tree.get_descendants(root)},
+			set(get_descendants_of("Item Group", root)),
+		)
+		self.assertEqual(
+			{group.name for group in tree.get_ancestors("Raw Material")},
+			set(get_ancestors_of("Item Group", "Raw Material")),
+		)
+		self.assertIn("Raw Material", [group.name for group in tree.get_children(root)])
+
+		# unknown groups are looked up once per tree version, without reloading the tree
+		with patch.object(tree, "build") as build:
+			self.assertIs(get_item_group_tree("Unknown Item Group"), tree)
+			self.assertIs(get_item_group_tree("Unknown Item Group"), tree)
+		build.assert_not_called()
+		self.assertIn("Unknown Item Group", tree.missing)
+
+	def test_product_list_field_filter_cache(self):
+		"Test if field filter values are cached until Website Items in scope change."
+		from webshop.webshop.product_data_engine.listing_cache import CATALOG_TAG, bump_tags
+
+		filter_engine = ProductFiltersBuilder()
+		fields = [frappe.get_meta("Website Item").get_field("item_group")]
+		web_item = frappe.db.get_value("Website Item", {"item_code": "Test 17I Laptop"})
+
+		bump_tags([CATALOG_TAG])
+		self.assertNotIn("_Test Item Group", filter_engine.get_scoped_field_values(fields)["item_group"])
+
+		# set_value runs no hooks, the cached values are served
+		frappe.db.set_value("Website Item", web_item, "item_group", "_Test Item Group")
+		self.assertNotIn("_Test Item Group", filter_engine.get_scoped_field_values(fields)["item_group"])
+
+		bump_tags([CATALOG_TAG])
+		self.assertIn("_Test Item Group", filter_engine.get_scoped_field_values(fields)["item_group"])
+
+		# tear down
+		frappe.db.set_value("Website Item", web_item, "item_group", "Products")
+		bump_tags([CATALOG_TAG])
+
 	def test_product_list_with_field_filter(self):
 		"Test if field filters are applied correctly."
 		field_filters = {"item_group": "Raw Material"}
@@ -146,6 +249,47 @@ class TestProductDataEngine(unittest.TestCase):
 		self.assertEqual(items[0].get("item_code"), "Test 16I Laptop")
 		self.assertEqual(items[1].get("item_code"), "Test 15I Laptop")
 
+	def test_product_list_facet_counts(self):
+		"Test if facet counts match filtered listing counts and ignore their own facet's selection."
+		from webshop.webshop.product_data_engine.facets import ProductFacetCounter
+
+		raw_material_count = ProductQuery().query(fields={"item_group": "Raw Material"})["items_count"]
+		products_count = ProductQuery().query(fields={"item_group": "Products"})["items_count"]
+
+		counts = ProductFacetCounter(field_filters={"item_group": "Raw Material"}).get_facet_counts()
+		item_group_counts = counts["fields"]["item_group"]
+
+		self.assertEqual(item_group_counts["Raw Material"], raw_material_count)
+		self.assertEqual(item_group_counts["Products"], products_count)
+
+	def test_facet_counts_priced_like_listing(self):
+		"Test if facet candidates use the listing's price list and customer group, not the user's."
+		from webshop.webshop.product_data_engine.redisearch_query import get_facet_counter
+
+		setup_webshop_settings({"show_price": 1})
+		engine = ProductQuery(price_list="_Test Price List India", customer_group="_Test Customer Group 1")
+		candidates = get_facet_counter(engine, field_filters={}).get_candidate_engine()
+
+		self.assertFalse(candidates.user_state)
+		self.assertEqual(candidates.get_price_list(), "_Test Price List India")
+		self.assertEqual(candidates.get_customer_group(), "_Test Customer Group 1")
+
+	def test_facet_counts_of_large_candidate_sets(self):
+		"Test if facet values of thousands of candidates are counted disjunctively."
+		from webshop.webshop.product_data_engine.facets import ProductFacetCounter
+
+		rows = []
+		for i in range(4000):
+			rows.append((f"WEB-{i}", "fields:item_group", f"Group {i % 4}"))
+			rows.append((f"WEB-{i}", "attributes:Test Size", f"Size {i % 5}"))
+
+		counter = ProductFacetCounter(field_filters={"item_group": "Group 0"})
+		counts = counter.count(rows)
+
+		# the item group selection does not narrow down its own facet
+		self.assertEqual(counts["fields"]["item_group"], {f"Group {i}": 1000 for i in range(4)})
+		self.assertEqual(counts["attributes"]["Test Size"], {f"Size {i}": 200 for i in range(5)})
+
 	# def test_product_list_with_field_filter_table_multiselect(self):
 	# 	TODO
 	# 	pass
@@ -162,6 +306,22 @@ class TestProductDataEngine(unittest.TestCase):
 		self.assertGreater(len(attribute_values), 0)
 		self.assertIn("Large", attribute_values)
 
+	def test_attribute_filter_ranges(self):
+		"Test if numeric attributes are filtered on ranges of their values."
+		from webshop.webshop.product_data_engine.attribute_index import ItemAttributeIndex
+
+		index = ItemAttributeIndex()
+		index.item_codes = ["Test Width 10", "Test Width 20", "Test Width 30"]
+		index.postings = {("Test Width", "10"): 1, ("Test Width", "20"): 2, ("Test Width", "30"): 4}
+		index.attribute_values = {"Test Width": ["10", "20", "30"]}
+
+		self.assertEqual(
+			index.get_item_codes({"Test Width": {"min": 15, "max": 30}}),
+			["Test Width 20", "Test Width 30"],
+		)
+		self.assertEqual(index.get_item_codes({"Test Width": {"max": 10}}), ["Test Width 10"])
+		self.assertEqual(index.get_item_codes({"Test Width": ["20"]}), ["Test Width 20"])
+
 	def test_product_list_with_attribute_filter(self):
 		"Test if attribute filters are applied correctly."
 		create_variant_web_item()
@@ -177,6 +337,59 @@ class TestProductDataEngine(unittest.TestCase):
 		self.assertEqual(len(items), 1)
 		self.assertEqual(items[0].get("item_code"), "Test Web Item-L")
 
+	def test_attribute_index(self):
+		"Test if the attribute index matches items on all attributes and follows version bumps."
+		from webshop.webshop.product_data_engine.attribute_index import (
+			bump_attribute_index_version,
+			get_attribute_index,
+			make_bitset,
+		)
+
+		create_variant_web_item()
+		index = get_attribute_index()
+
+		self.assertEqual(index.get_item_codes({"Test Size": "Large"}), ["Test Web Item-L"])
+		self.assertEqual(index.get_item_codes({"Test Size": ["Large", "Unknown Size"]}), ["Test Web Item-L"])
+		self.assertEqual(index.get_item_codes({"Test Size": "Large", "Unknown Attribute": "X"}), [])
+
+		version = index.version
+		bump_attribute_index_version()
+		self.assertNotEqual(get_attribute_index().version, version)
+
+		# Item saves without attribute or publishing changes keep the index
+		version = get_attribute_index().version
+		item = frappe.get_doc("Item", "Test Web Item-L")
+		item.description = "Large Test Web Item"
+		item.save()
+		self.assertEqual(get_attribute_index().version, version)
+
+		self.assertEqual(make_bitset([0, 3, 9, 3]), 0b1000001001)
+		self.assertEqual(make_bitset([]), 0)
+
+		result = ProductQuery().query(attributes={"Test Size": ["Unknown Size"]}, fields={})
+		self.assertEqual(result["items"], [])
+		self.assertEqual(result["items_count"], 0)
+
+	def test_attribute_filtered_listing_counts(self):
+		"Test if attribute filtered listings are counted and served on the joined item codes."
+		from webshop.webshop.api import get_product_filter_data
+
+		create_variant_web_item()
+		setup_webshop_settings({"show_price": 1})
+		frappe.local.shopping_cart_settings = None
+
+		# counted and discounted over the base query, which must select the joined item code
+		result = ProductQuery().query(attributes={"Test Size": ["Large"]}, fields={})
+		self.assertEqual([item.item_code for item in result["items"]], ["Test Web Item-L"])
+		self.assertEqual(result["items_count"], 1)
+
+		result = get_product_filter_data(
+			query_args={"attribute_filters": {"Test Size": ["Large"]}, "start": 0}
+		)
+		self.assertNotIn("exc", result)
+		self.assertEqual([item.get("item_code") for item in result["items"]], ["Test Web Item-L"])
+		self.assertEqual(result["items_count"], 1)
+
 	def test_product_list_discount_filter_builder(self):
 		"Test if discount filters are fetched correctly."
 		from webshop.webshop.doctype.website_item.test_website_item import (
@@ -202,6 +415,28 @@ class TestProductDataEngine(unittest.TestCase):
 		self.assertEqual(discount_filters[0][0], 10)
 		self.assertEqual(discount_filters[0][1], "10% and below")
 
+	def test_product_list_display_details(self):
+		"Test if bulk resolved prices match the per item price lookup."
+		from erpnext.utilities.product import get_price
+
+		from webshop.webshop.doctype.website_item.test_website_item import make_web_item_price
+
+		make_web_item_price(item_code="Test 14I Laptop", price_list_rate=500)
+
+		setup_webshop_settings({"show_price": 1})
+		frappe.local.shopping_cart_settings = None
+
+		engine = ProductQuery()
+		result = engine.query(attributes={}, fields={}, search_term=None, start=0, item_group=None)
+		item = next(row for row in result.get("items") if row.item_code == "Test 14I Laptop")
+		price = get_price(
+			"Test 14I Laptop", "_Test Price List India", "_Test Customer Group", "_Test Company"
+		)
+
+		self.assertEqual(item.price_list_rate, price.price_list_rate)
+		self.assertEqual(item.formatted_price, price.formatted_price)
+		self.assertFalse(item.wished)
+
 	def test_product_list_with_discount_filters(self):
 		"Test if discount filters are applied correctly."
 		from webshop.webshop.doctype.website_item.test_website_item import (
@@ -237,6 +472,155 @@ class TestProductDataEngine(unittest.TestCase):
 		# check if only product with 10% and below discount are fetched
 		self.assertEqual(len(items), 1)
 		self.assertEqual(items[0].get("item_code"), "Test 12I Laptop")
+		self.assertEqual(result.get("items_count"), 1)
+
+	def test_product_list_with_price_filters(self):
+		"Test if price bounds and price sorting apply across pages with correct counts."
+		from webshop.webshop.doctype.website_item.test_website_item import make_web_item_price
+
+		for item_code, rate in (
+			("Test 11I Laptop", 100),
+			("Test 14I Laptop", 500),
+			("Test 15I Laptop", 200),
+			("Test 16I Laptop", 300),
+			("Test 17I Laptop", 400),
+		):
+			make_web_item_price(item_code=item_code, price_list_rate=rate)
+
+		setup_webshop_settings({"show_price": 1, "products_per_page": 2})
+		frappe.local.shopping_cart_settings = None
+
+		engine = ProductQuery()
+		engine.set_sort("price_desc")
+		first_page = engine.query(fields={}, price_min=150, price_max=450)
+
+		engine = ProductQuery()
+		engine.set_sort("price_desc")
+		second_page = engine.query(fields={}, price_min=150, price_max=450, start=2)
+
+		setup_webshop_settings({"products_per_page": 4})
+
+		# 400, 300 | 200: filtered and sorted over all items, not within a page
+		self.assertEqual(first_page["items_count"], 3)
+		self.assertEqual(
+			[item.item_code for item in first_page["items"]], ["Test 17I Laptop", "Test 16I Laptop"]
+		)
+		self.assertEqual([item.item_code for item in second_page["items"]], ["Test 15I Laptop"])
+
+	def test_price_index_customer_groups(self):
+		"Test if prices are indexed for customer groups with pricing rules and joined per session group."
+		from webshop.webshop.api import get_product_filter_data
+		from webshop.webshop.doctype.website_item.test_website_item import (
+			create_user_and_customer_if_not_exists,
+			make_web_item_price,
+			make_web_pricing_rule,
+		)
+		from webshop.webshop.product_data_engine.price_index import (
+			get_indexed_customer_group,
+			get_price_index_customer_groups,
+		)
+
+		make_web_item_price(item_code="Test 11I Laptop")
+		make_web_pricing_rule(
+			title="Test Customer Group Pricing Rule for Test 11I Laptop",  # 20% discount
+			item_code="Test 11I Laptop",
+			discount_percentage=20,
+			applicable_for="Customer Group",
+			customer_group="_Test Customer Group 1",
+			selling=1,
+		)
+
+		self.assertIn("_Test Customer Group 1", get_price_index_customer_groups())
+		self.assertEqual(get_indexed_customer_group("_Test Customer Group 1"), "_Test Customer Group 1")
+		self.assertNotEqual(get_indexed_customer_group("_Test Customer Group"), "_Test Customer Group 1")
+
+		setup_webshop_settings({"show_price": 1})
+		frappe.local.shopping_cart_settings = None
+
+		# shared pages of the API are priced for the session customer's group
+		email = "test_customer_group_pricing@example.com"
+		create_user_and_customer_if_not_exists(email)
+		frappe.db.set_value("Customer", "_Test Customer", "customer_group", "_Test Customer Group 1")
+
+		query_args = {"field_filters": {"discount": [20]}, "start": 0}
+		frappe.set_user(email)
+		try:
+			result = get_product_filter_data(query_args=query_args)
+		finally:
+			frappe.set_user("Administrator")
+		self.assertEqual([item["item_code"] for item in result["items"]], ["Test 11I Laptop"])
+
+		# the rule does not apply to the default customer group of guests
+		frappe.set_user("Guest")
+		try:
+			result = get_product_filter_data(query_args=query_args)
+		finally:
+			frappe.set_user("Administrator")
+		self.assertNotIn("Test 11I Laptop", [item["item_code"] for item in result["items"]])
+
+	def test_price_index_upsert(self):
+		"Test if price index updates change rows in place and drop rows of unpublished items."
+		from webshop.webshop.doctype.website_item.test_website_item import make_web_item_price
+		from webshop.webshop.product_data_engine.price_index import update_price_index
+
+		item_code = "Test 15I Laptop"
+		item_price = make_web_item_price(item_code=item_code, price_list_rate=200)
+		update_price_index(item_codes=[item_code])
+
+		filters = {"item_code": item_code, "price_list": item_price.price_list}
+		names = frappe.get_all("Website Item Price", filters=filters, pluck="name")
+		self.assertTrue(names)
+
+		frappe.db.set_value("Item Price", item_price.name, "price_list_rate", 250)
+		update_price_index(item_codes=[item_code])
+
+		rows = frappe.get_all("Website Item Price", filters=filters, fields=["name", "price_list_rate"])
+		self.assertEqual(sorted(row.name for row in rows), sorted(names))
+		self.assertEqual({row.price_list_rate for row in rows}, {250})
+
+		frappe.db.set_value("Website Item", {"item_code": item_code}, "published", 0)
+		update_price_index(item_codes=[item_code])
+		self.assertFalse(frappe.db.exists("Website Item Price", filters))
+
+		frappe.db.set_value("Website Item", {"item_code": item_code}, "published", 1)
+		frappe.db.set_value("Item Price", item_price.name, "price_list_rate", 200)
+		update_price_index(item_codes=[item_code])
+
+	def test_product_list_full_text_search_fallback(self):
+		"Test if Full Text search falls back to LIKE for words too short to be indexed."
+		like_result = ProductQuery().query(fields={}, search_term="7I")
+
+		setup_webshop_settings({"product_search_mode": "Full Text"})
+		engine = ProductQuery()
+		full_text_result = engine.query(fields={}, search_term="7I")
+		setup_webshop_settings({"product_search_mode": "Like"})
+
+		self.assertFalse(engine.search_relevance)
+		self.assertEqual(
+			[item.item_code for item in full_text_result["items"]],
+			[item.item_code for item in like_result["items"]],
+		)
+		self.assertIn("Test 17I Laptop", [item.item_code for item in like_result["items"]])
+
+	def test_product_list_full_text_search_condition(self):
+		"Test if Full Text search matches every indexable word as a prefix, blended into ranking."
+		from webshop.webshop.product_data_engine.query import SEARCH_INDEX_FIELDS
+
+		engine = ProductQuery()
+		self.assertTrue(engine.build_fulltext_search("Gaming lap-top 7I"))
+		self.assertTrue(engine.search_relevance)
+
+		fields = ", ".join(f"`{field}`" for field in SEARCH_INDEX_FIELDS)
+		match = f"match({fields}) against ('+Gaming* +lap* +top*' in boolean mode)"
+		self.assertEqual(len(engine.joins), 1)
+		self.assertIn(f"select name, {match} as relevance", engine.joins[0])
+		self.assertIn(f"where {match}", engine.joins[0])
+		self.assertIn("search.relevance", engine.get_sort_expression())
+
+		# no word long enough to be indexed
+		engine = ProductQuery()
+		self.assertFalse(engine.build_fulltext_search("7I a"))
+		self.assertEqual(engine.joins, [])
 
 	def test_product_list_with_api(self):
 		"Test products listing using API."
@@ -257,6 +641,290 @@ class TestProductDataEngine(unittest.TestCase):
 		self.assertEqual(len(items), 1)
 		self.assertEqual(items[0].get("item_code"), "Test Web Item-L")
 
+	def test_product_list_cache_key(self):
+		"Test if equal listing selections share the catalog cache key."
+		from webshop.webshop.api import _generate_cache_key
+
+		engine = ProductQuery()
+		key = _generate_cache_key(
+			{"field_filters": {"item_group": ["Raw Material", "Products"]}, "start": 0}, engine
+		)
+
+		self.assertEqual(
+			key,
+			_generate_cache_key(
+				{
+					"field_filters": {"item_group": ["Products", "Raw Material"], "brand": []},
+					"attribute_filters": {},
+					"search": "",
+					"from_filters": 1,
+					"start": 4,
+				},
+				engine,
+			),
+		)
+		self.assertNotEqual(
+			key, _generate_cache_key({"field_filters": {"item_group": ["Products"]}}, engine)
+		)
+
+		# shared pages are priced per indexed customer group
+		setup_webshop_settings({"show_price": 1})
+		query_args = {"start": 0}
+		self.assertNotEqual(
+			_generate_cache_key(query_args, ProductQuery(customer_group="_Test Customer Group")),
+			_generate_cache_key(query_args, ProductQuery(customer_group="_Test Customer Group 1")),
+		)
+
+	def test_listing_cache_tag_invalidation(self):
+		"Test if bumping a tag invalidates only the cached listings carrying it."
+		from webshop.webshop.product_data_engine.listing_cache import (
+			bump_tags,
+			get_cached_listing,
+			get_listing_tags,
+			set_cached_listing,
+		)
+
+		products_key, raw_material_key = "product_filter:test-products", "product_filter:test-raw"
+		set_cached_listing(products_key, {"items": []}, get_listing_tags(item_group="Products"))
+		set_cached_listing(raw_material_key, {"items": []}, get_listing_tags(item_group="Raw Material"))
+
+		bump_tags(["item_group:Products"])
+
+		self.assertEqual(get_cached_listing(products_key), (None, False))
+		self.assertEqual(get_cached_listing(raw_material_key), ({"items": []}, False))
+
+	def test_listing_cache_stock_invalidation(self):
+		"Test if stock changes invalidate the item's group listings only when availability flips."
+		from redis import Redis
+
+		from webshop.webshop.product_data_engine.listing_cache import (
+			CATALOG_TAG,
+			STOCK_STATE_KEY,
+			get_tag_versions,
+			on_bin_change,
+		)
+
+		setup_webshop_settings({"show_stock_availability": 1})
+		cache = frappe.cache()
+		Redis.delete(cache, cache.make_key(STOCK_STATE_KEY))
+		bin_doc = frappe._dict(item_code="Test 14I Laptop")
+		tags = ["item_group:Raw Material", CATALOG_TAG]
+
+		versions = get_tag_versions(tags)
+		on_bin_change(bin_doc)  # availability not seen before
+		bumped = get_tag_versions(tags)
+		self.assertEqual(bumped["item_group:Raw Material"], versions["item_group:Raw Material"] + 1)
+		self.assertEqual(bumped[CATALOG_TAG], versions[CATALOG_TAG])
+
+		on_bin_change(bin_doc)  # same availability
+		self.assertEqual(get_tag_versions(tags), bumped)
+		setup_webshop_settings({"show_stock_availability": 0})
+
+	def test_listing_cache_stale_while_revalidate(self):
+		"Test if stale listings are served while a single refresh is triggered."
+		from unittest.mock import patch
+
+		from webshop.webshop.product_data_engine import listing_cache
+
+		key, refreshes = "product_filter:test-stale", []
+		with patch.object(listing_cache, "LISTING_CACHE_SOFT_TTL", -1):
+			listing_cache.set_cached_listing(key, {"items": []}, listing_cache.get_listing_tags())
+
+		def build():
+			raise AssertionError("stale listings must not be built in the request")
+
+		for _ in range(2):
+			response = listing_cache.get_or_build_listing(
+				key, build=build, refresh=lambda: refreshes.append(key)
+			)
+			self.assertEqual(response, {"items": []})
+
+		listing_cache.release_lock(key)
+		self.assertEqual(refreshes, [key])
+
+	def test_cache_codec(self):
+		"Test if cached values round trip through the codec, compressed when large."
+		import pickle
+		from unittest.mock import patch
+
+		from webshop.webshop.utils import cache_codec
+
+		value = frappe._dict(
+			{
+				("Test Size", "Large"): ["Test Web Item-L"],
+				"optional": {"Test Colour"},
+				"rows": [("Test Web Item-L", "Test Size", "Large")],
+				"description": "Laptop " * 500,
+			}
+		)
+		payload = cache_codec.encode(value)
+
+		self.assertEqual(payload[0], cache_codec.CODEC_VERSION)
+		self.assertTrue(payload[1] & 0xF0)  # compressed
+		self.assertLess(len(payload), len(value.description))
+		self.assertEqual(cache_codec.decode(payload), value)
+
+		# the encoder reports the size before compression, for the saved bytes metric
+		payload, encoded_size = cache_codec._encode_with_size(value)
+		self.assertGreater(encoded_size, len(value.description))
+		self.assertEqual(cache_codec.decode(payload), value)
+
+		# values cached before the codec are misses, not errors
+		self.assertIsNone(cache_codec.decode(pickle.dumps(value)))
+
+		# pickle and zlib, without the optional msgpack and lz4
+		with patch.object(cache_codec, "msgpack", None), patch.object(cache_codec, "lz4", None):
+			payload = cache_codec.encode(value)
+			self.assertEqual(payload[1], cache_codec.ENCODING_PICKLE | cache_codec.COMPRESSION_ZLIB)
+			self.assertEqual(cache_codec.decode(payload), value)
+
+	def test_product_list_user_state_not_cached(self):
+		"Test if cart and wishlist state is overlaid per user, not shared via the cache."
+		from webshop.webshop.api import _get_catalog_page, get_product_filter_data
+		from webshop.webshop.product_data_engine.profiler import StageTimer
+
+		result = get_product_filter_data(query_args={"start": 0})
+		self.assertTrue(all("wished" in item and "in_cart" in item for item in result["items"]))
+
+		engine = ProductQuery()
+		engine.user_state = False
+		page = _get_catalog_page(frappe._dict(start=0), engine, StageTimer())
+		self.assertTrue(page["items"])
+		self.assertFalse(any("wished" in item or "in_cart" in item for item in page["items"]))
+
+	def test_product_list_batch(self):
+		"Test if batched listing queries return the pages of single queries, in order."
+		from webshop.webshop.api import get_product_filter_data, get_product_filter_data_batch
+
+		queries = [{"item_group": "Raw Material"}, {"start": 0, "items_per_page": 2}]
+		responses = get_product_filter_data_batch(queries=frappe.as_json(queries))
+
+		self.assertEqual(len(responses), 2)
+		for query_args, response in zip(queries, responses):
+			single = get_product_filter_data(query_args=dict(query_args))
+			self.assertEqual(
+				[item.item_code for item in response["items"]],
+				[item.item_code for item in single["items"]],
+			)
+			self.assertTrue(all("wished" in item for item in response["items"]))
+
+		self.assertRaises(frappe.ValidationError, get_product_filter_data_batch, queries=[{}] * 11)
+
+	def test_product_list_profiles(self):
+		"Test if listing profiles select and serialize only their fields."
+		from webshop.webshop.api import _get_catalog_page
+		from webshop.webshop.product_data_engine.profiler import StageTimer
+
+		card = _get_catalog_page(frappe._dict(start=0), ProductQuery(), StageTimer())
+		self.assertTrue(card["items"])
+		self.assertNotIn("web_long_description", card["items"][0])
+		self.assertNotIn("ranking", card["items"][0])  # sort column
+		self.assertNotIn("filter_fields", card["settings"])
+		self.assertIn("products_per_page", card["settings"])
+
+		full = _get_catalog_page(frappe._dict(start=0), ProductQuery(profile="full"), StageTimer())
+		self.assertIn("web_long_description", full["items"][0])
+		self.assertIn("filter_fields", full["settings"])
+
+		self.assertRaises(frappe.ValidationError, ProductQuery, profile="everything")
+
+	def test_product_listing_backend_fallback(self):
+		"Test if the RediSearch backend falls back to SQL for listings the index cannot answer."
+		from webshop.webshop.product_data_engine.redisearch_query import (
+			RediSearchProductQuery,
+			get_product_query,
+		)
+
+		setup_webshop_settings({"product_listing_backend": "RediSearch"})
+		settings = frappe.get_doc("Webshop Settings")
+		self.assertEqual(type(get_product_query(settings=settings)), ProductQuery)  # not enabled
+
+		engine = RediSearchProductQuery(settings=settings)
+		self.assertFalse(engine.can_answer(fields={"discount": [10]}))
+
+		fields = {"item_group": "Raw Material"}
+		result = engine.query(fields=fields)
+		setup_webshop_settings({"product_listing_backend": "SQL"})
+
+		self.assertEqual(
+			[item.item_code for item in result["items"]],
+			[item.item_code for item in ProductQuery().query(fields=fields)["items"]],
+		)
+		self.assertEqual(result["items_count"], 3)
+
+	def test_product_search_local_backend(self):
+		"Test if product search is ranked by the local index without RediSearch."
+		from webshop.templates.pages.product_search import product_search
+		from webshop.webshop.product_data_engine.search_backends import (
+			add_local_search_change,
+			rebuild_local_search_index,
+		)
+
+		rebuild_local_search_index()
+		result = product_search("13I lapt")
+		self.assertEqual(result["backend"], "local")
+		self.assertEqual(result["results"][0]["web_item_name"], "Test 13I Laptop")
+
+		result = product_search(
+			"laptop", limit=2, sort_by="ranking", filters={"item_group": "Raw Material"}
+		)
+		self.assertEqual(result["total"], 3)
+		self.assertEqual(
+			[item["web_item_name"] for item in result["results"]],
+			["Test 16I Laptop", "Test 15I Laptop"],
+		)
+
+		# changes are replayed into the index, without rebuilding it
+		web_item = frappe.get_doc("Website Item", {"item_code": "Test 13I Laptop"})
+		web_item.db_set("web_item_name", "Test 13I Notebook")
+		add_local_search_change(web_item.name)
+
+		self.assertEqual(product_search("13I lapt")["total"], 0)
+		self.assertEqual(product_search("13I note")["results"][0]["name"], web_item.name)
+		web_item.db_set("web_item_name", "Test 13I Laptop")
+
+	def test_product_search_backend_unavailable(self):
+		"Test if product search falls back to SQL when its backend cannot be resolved."
+		from unittest.mock import patch
+
+		from webshop.templates.pages import product_search
+
+		with patch.object(product_search, "get_search_backend", side_effect=ConnectionError):
+			result = product_search.product_search("13I Laptop")
+			suggestions = product_search.get_product_suggestions("13I")
+
+		self.assertEqual(result["backend"], "sql")
+		self.assertEqual(result["results"][0]["web_item_name"], "Test 13I Laptop")
+		self.assertEqual(suggestions, [])
+
+	def test_product_list_timings(self):
+		"Test if debug listing requests return per stage timings."
+		from werkzeug.wrappers import Response
+
+		from webshop.webshop.api import get_product_filter_data
+		from webshop.webshop.product_data_engine.profiler import (
+			StageTimer,
+			add_server_timing_header,
+		)
+
+		result = get_product_filter_data(query_args={"start": 0, "debug": 1})
+		timings = result.get("timings")
+
+		for stage in ("total", "count", "items", "prices"):
+			self.assertIn(stage, timings)
+		self.assertGreater(timings["count"]["queries"], 0)
+
+		# sent as a header by the after_request hook
+		response = Response()
+		add_server_timing_header(response=response)
+		self.assertIn("total;dur=", response.headers["Server-Timing"])
+		del frappe.local.webshop_server_timing
+
+		timer = StageTimer()
+		with timer.stage("count"):
+			pass
+		self.assertEqual(timer.stages, {})
+
 	def test_product_list_with_variants(self):
 		"Test if variants are hideen on hiding variants in settings."
 		create_variant_web_item()
@@ -277,6 +945,28 @@ class TestProductDataEngine(unittest.TestCase):
 		# tear down
 		setup_webshop_settings({"enable_attribute_filters": 1, "hide_variants": 0})
 
+	def test_product_list_with_supplier_filter(self):
+		"Test if supplier filters match items by any of their suppliers, without repeating items."
+		web_item = frappe.db.get_value("Website Item", {"item_code": "Test 11I Laptop"})
+		for supplier in ("_Test Supplier", "_Test Supplier 1"):
+			frappe.get_doc(
+				{
+					"doctype": "Website Item Supplier",
+					"parent": web_item,
+					"parenttype": "Website Item",
+					"parentfield": "supplier_items",
+					"supplier": supplier,
+				}
+			).db_insert()
+
+		engine = ProductQuery()
+		engine.build_supplier_filters(["_Test Supplier", "_Test Supplier 1"])
+		result = engine.query(attributes={}, fields={}, search_term=None, start=0)
+
+		self.assertFalse(engine.has_child_table_filters())
+		self.assertEqual([item.item_code for item in result["items"]], ["Test 11I Laptop"])
+		self.assertEqual(result["items_count"], 1)
+
 	def test_custom_field_as_filter(self):
 		"Test if custom field functions as filter correctly."
 		from frappe.custom.doctype.custom_field.custom_field import create_custom_field
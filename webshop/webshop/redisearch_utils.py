@@ -2,25 +2,72 @@
 # License: GNU General Public License v3. See license.txt
 
 import json
+import time
 
 import frappe
 from frappe import _
+from frappe.utils import cint, cstr, get_datetime
 from frappe.utils.redis_wrapper import RedisWrapper
 from redis import ResponseError
-from redis.commands.search.field import TagField, TextField
+from redis.commands.search.field import NumericField, TagField, TextField
 from redis.commands.search.suggestion import Suggestion
 
+from webshop.webshop.product_data_engine.hydration import ProductHydrator
+
 try:
 	from redis.commands.search.index_definition import IndexDefinition
 except ImportError:
 	from redis.commands.search.indexDefinition import IndexDefinition
 
 
+# alias of the live index version
 WEBSITE_ITEM_INDEX = "website_items_index"
 WEBSITE_ITEM_KEY_PREFIX = "website_item:"
 WEBSITE_ITEM_NAME_AUTOCOMPLETE = "website_items_name_dict"
 WEBSITE_ITEM_CATEGORY_AUTOCOMPLETE = "website_items_category_dict"
 
+AUTOCOMPLETE_SHADOW_SUFFIX = ":rebuild"
+AUTOCOMPLETE_CHUNK_SIZE = 1000
+
+# filtered and sorted on within RediSearch, besides the searched fields
+SORTABLE_FIELDS = (
+	"ranking",
+	"price",
+	"discount_percent",
+	"in_stock",
+	"is_variant",
+	"creation",
+	"published",
+)
+TAG_FIELDS = ("item_group", "website_item_groups", "brand", "supplier", "attributes")
+TAG_SEPARATOR = "|"
+# Website Item fields that sortable and tag fields are computed from, besides filter fields
+SEARCH_ATTRIBUTE_SOURCE_FIELDS = [
+	"name",
+	"item_code",
+	"item_group",
+	"brand",
+	"ranking",
+	"published",
+	"website_warehouse",
+	"on_backorder",
+	"variant_of",
+	"creation",
+]
+FILTER_FIELD_TYPES = ("Link", "Select", "Check", "Table MultiSelect")
+# {"filter_fields", "sortable_fields"} of the live index version
+INDEX_FIELDS_KEY = "website_items_index_fields"
+
+REINDEX_CHUNK_SIZE = 1000
+# {partition: last indexed Website Item name}
+REINDEX_CHECKPOINT_KEY = "website_items_reindex_checkpoint"
+# {"total", "indexed", "partitions", "index"}
+REINDEX_PROGRESS_KEY = "website_items_reindex_progress"
+# set of finished partitions
+REINDEX_FINISHED_KEY = "website_items_reindex_finished"
+INDEX_BUILD_TIMEOUT = 30 * 60  # seconds, waited for a new index version to index existing hashes
+INDEX_BUILD_CHECK_INTERVAL = 5  # seconds between checks of a new index version's progress
+
 
 def get_indexable_web_fields():
 	"Return valid fields from Website Item that can be searched for."
@@ -67,19 +114,17 @@ def make_key(key):
 
 @if_redisearch_enabled
 def create_website_items_index():
-	"Creates Index Definition."
+	"""
+	Creates Index Definition.
 
-	redis = frappe.cache()
-	index = redis.ft(WEBSITE_ITEM_INDEX)
+	Searches go through the `WEBSITE_ITEM_INDEX` alias. A new index version is
+	created next to the live one and filled in the background, the alias is
+	swapped to it once it is complete (see `promote_website_items_index`).
+	"""
 
-	try:
-		index.dropindex()  # drop if already exists
-	except ResponseError:
-		# will most likely raise a ResponseError if index does not exist
-		# ignore and create index
-		pass
-	except Exception:
-		raise_redisearch_error()
+	redis = frappe.cache()
+	index_name = f"{WEBSITE_ITEM_INDEX}_{frappe.generate_hash(length=8)}"
+	index = redis.ft(index_name)
 
 	idx_def = IndexDefinition([make_key(WEBSITE_ITEM_KEY_PREFIX)])
 
@@ -91,15 +136,103 @@ def create_website_items_index():
 		idx_fields.remove("web_item_name")
 
 	idx_fields = [to_search_field(f) for f in idx_fields]
+	filter_fields = get_filter_fields()
 
-	# TODO: sortable?
 	index.create_index(
-		[TextField("web_item_name", sortable=True)] + idx_fields,
+		[TextField("web_item_name", sortable=True)]
+		+ idx_fields
+		+ get_sort_and_tag_fields(filter_fields),
 		definition=idx_def,
 	)
 
-	reindex_all_web_items()
-	define_autocomplete_dictionary()
+	# hashes are (re)written by background jobs, the index picks them up as they land
+	reindex_all_web_items(index_name=index_name, filter_fields=filter_fields)
+	enqueue_autocomplete_rebuild()
+
+
+@if_redisearch_enabled
+def ensure_filter_fields_indexed(doc=None, method=None, *args, **kwargs):
+	"Build a new index version if fields are filtered on that the live (or pending) one lacks."
+	filter_fields = set(get_filter_fields())
+	indexed = get_indexed_fields()
+	if indexed and filter_fields.issubset(indexed["filter_fields"]) and has_sortable_fields(indexed):
+		return
+
+	pending = read_reindex_progress()
+	if pending.get("index") and filter_fields.issubset(json.loads(pending.get("filter_fields") or "[]")):
+		return
+
+	create_website_items_index()
+
+
+def get_indexed_fields():
+	"""
+	Returns:
+	        dict: {"filter_fields", "sortable_fields"} of the live index version, None if it
+	                was built before filter fields were indexed
+	"""
+	return frappe.cache().get_value(INDEX_FIELDS_KEY)
+
+
+def has_sortable_fields(indexed):
+	"Check if the index version of `indexed` (see `get_indexed_fields`) has all `SORTABLE_FIELDS`."
+	return set(SORTABLE_FIELDS).issubset(indexed.get("sortable_fields") or [])
+
+
+def promote_website_items_index(index_name, filter_fields=None, started=None):
+	"""
+	Point the `WEBSITE_ITEM_INDEX` alias to `index_name` once it has indexed all
+	hashes, then drop the other index versions. Documents are shared by all
+	versions and are kept.
+
+	While `index_name` is still indexing, a short job checks it again (see
+	`enqueue_index_promotion`), until `INDEX_BUILD_TIMEOUT` after `started`.
+	"""
+	redis = frappe.cache()
+	started = started or time.time()
+	if cint(redis.ft(index_name).info().get("indexing")):
+		if time.time() - started > INDEX_BUILD_TIMEOUT:
+			frappe.log_error(f"{index_name} did not finish indexing", "Redisearch Error")
+		else:
+			enqueue_index_promotion(index_name, filter_fields, started)
+		return
+
+	alias = make_key(WEBSITE_ITEM_INDEX)
+	if make_key(WEBSITE_ITEM_INDEX) in list_indexes():
+		# index of before versioning, by the name of the alias
+		redis.ft(WEBSITE_ITEM_INDEX).dropindex()
+
+	redis.ft(index_name).aliasupdate(alias)
+	frappe.cache().set_value(
+		INDEX_FIELDS_KEY,
+		{"filter_fields": filter_fields or [], "sortable_fields": list(SORTABLE_FIELDS)},
+	)
+
+	versions_prefix = make_key(f"{WEBSITE_ITEM_INDEX}_")
+	for name in list_indexes():
+		if name.startswith(versions_prefix) and name != make_key(index_name):
+			try:
+				# dropped by its full name, `ft()` would prefix it again
+				redis.execute_command("FT.DROPINDEX", name)
+			except ResponseError:
+				pass  # dropped by a concurrent promotion
+
+
+def enqueue_index_promotion(index_name, filter_fields, started):
+	# jobs cannot be enqueued for later, a short pause keeps the checks from spinning
+	time.sleep(INDEX_BUILD_CHECK_INTERVAL)
+	frappe.enqueue(
+		"webshop.webshop.redisearch_utils.promote_website_items_index",
+		index_name=index_name,
+		filter_fields=filter_fields,
+		started=started,
+		queue="short",
+		now=frappe.flags.in_test,
+	)
+
+
+def list_indexes():
+	return [frappe.safe_decode(name) for name in frappe.cache().execute_command("FT._LIST")]
 
 
 def to_search_field(field):
@@ -109,17 +242,205 @@ def to_search_field(field):
 	return TextField(field)
 
 
+def get_sort_and_tag_fields(filter_fields=None):
+	"""
+	Returns:
+	        list: Sortable NUMERIC fields, and TAG fields queried as `@<field>_tag:{value}`, so
+	                that they do not clash with searched text fields of the same name
+	"""
+	return [NumericField(field, sortable=True) for field in SORTABLE_FIELDS] + [
+		TagField(field, separator=TAG_SEPARATOR, as_name=get_tag_field(field))
+		for field in list(TAG_FIELDS) + list(filter_fields or [])
+	]
+
+
+def get_tag_field(field):
+	return f"{field}_tag"
+
+
+def get_filter_fields():
+	"""
+	Returns:
+	        list: Website Item fields filtered on in Webshop Settings or any Item Group, indexed
+	                as TAG fields besides `TAG_FIELDS`
+	"""
+	fieldnames = frappe.get_all(
+		"Website Filter Field",
+		filters={"parenttype": ["in", ["Webshop Settings", "Item Group"]]},
+		pluck="fieldname",
+		distinct=True,
+	)
+
+	meta = frappe.get_meta("Website Item", cached=True)
+	filter_fields = []
+	for fieldname in set(fieldnames):
+		df = meta.get_field(fieldname)
+		if not df or df.fieldtype not in FILTER_FIELD_TYPES:
+			continue
+		if fieldname in TAG_FIELDS or fieldname == "primary_supplier":
+			continue
+		filter_fields.append(fieldname)
+
+	return sorted(filter_fields)
+
+
+def get_filter_tag_field(fieldname):
+	"TAG field a Website Item filter field is queried on, suppliers are filtered on all of an item's."
+	if fieldname == "primary_supplier":
+		return get_tag_field("supplier")
+
+	return get_tag_field(fieldname)
+
+
+def get_attribute_tag(attribute, value):
+	return f"{attribute}={value}"
+
+
+def get_search_source_fields(filter_fields):
+	"Website Item columns `get_search_attributes` needs."
+	meta = frappe.get_meta("Website Item", cached=True)
+	return SEARCH_ATTRIBUTE_SOURCE_FIELDS + [
+		field for field in filter_fields if meta.get_field(field).fieldtype != "Table MultiSelect"
+	]
+
+
+def escape_tag_value(value):
+	"Escape punctuation and spaces of a TAG query value."
+	return "".join(c if c.isalnum() or c == "_" else f"\\{c}" for c in str(value))
+
+
+def get_search_attributes(items, filter_fields=None):
+	"""
+	Args:
+	        items (list): Website Items with `get_search_source_fields`
+	        filter_fields (list, optional): Filter fields to be indexed, see `get_filter_fields`
+
+	Returns:
+	        dict: {website item: {sortable & tag field: value}}, price and discount are None if
+	                the item has no price in the default price list
+	"""
+	from webshop.webshop.product_data_engine.price_index import get_indexed_customer_group
+
+	settings = frappe.get_cached_doc("Webshop Settings")
+	names = [item.name for item in items]
+	if not names:
+		return {}
+
+	if filter_fields is None:
+		filter_fields = get_filter_fields()
+
+	prices = {}
+	if settings.price_list:
+		for row in frappe.get_all(
+			"Website Item Price",
+			filters={
+				"website_item": ["in", names],
+				"price_list": settings.price_list,
+				"customer_group": get_indexed_customer_group(settings.default_customer_group),
+			},
+			fields=["website_item", "price_list_rate", "discount_percent"],
+		):
+			prices[row.website_item] = row
+
+	suppliers = get_child_values("Website Item Supplier", "supplier", names)
+	item_groups = get_child_values("Website Item Group", "item_group", names, "website_item_groups")
+
+	item_attributes = {}
+	for row in frappe.get_all(
+		"Item Variant Attribute",
+		filters={"parent": ["in", [item.item_code for item in items]], "attribute_value": ["is", "set"]},
+		fields=["parent", "attribute", "attribute_value"],
+	):
+		item_attributes.setdefault(row.parent, []).append(
+			get_attribute_tag(row.attribute, row.attribute_value)
+		)
+
+	meta = frappe.get_meta("Website Item", cached=True)
+	table_values = {}
+	for field in filter_fields:
+		df = meta.get_field(field)
+		if df.fieldtype == "Table MultiSelect":
+			child_fields = frappe.get_meta(df.options, cached=True).get("fields")
+			if child_fields:
+				table_values[field] = get_child_values(df.options, child_fields[0].fieldname, names, field)
+
+	stock = ProductHydrator(items, settings).get_stock_availability()
+
+	attributes = {}
+	for item in items:
+		price = prices.get(item.name) or {}
+		attributes[item.name] = {
+			"ranking": cint(item.get("ranking")),
+			"published": cint(item.get("published")),
+			"price": price.get("price_list_rate"),
+			"discount_percent": price.get("discount_percent"),
+			"in_stock": cint(stock.get(item.item_code)),
+			"is_variant": cint(bool(item.get("variant_of"))),
+			"creation": get_datetime(item.get("creation")).timestamp() if item.get("creation") else None,
+			"item_group": item.get("item_group") or "",
+			"website_item_groups": TAG_SEPARATOR.join(item_groups.get(item.name, [])),
+			"brand": item.get("brand") or "",
+			"supplier": TAG_SEPARATOR.join(suppliers.get(item.name, [])),
+			"attributes": TAG_SEPARATOR.join(item_attributes.get(item.item_code, [])),
+		}
+
+		for field in filter_fields:
+			if field in table_values:
+				value = TAG_SEPARATOR.join(table_values[field].get(item.name, []))
+			elif meta.get_field(field).fieldtype == "Check":
+				value = cstr(cint(item.get(field)))
+			else:
+				value = cstr(item.get(field))
+			attributes[item.name][field] = value
+
+	return attributes
+
+
+def get_child_values(doctype, fieldname, parents, parentfield=None):
+	"""
+	Returns:
+	        dict: {Website Item: values of `fieldname` in its `doctype` rows}
+	"""
+	filters = {"parent": ["in", parents], "parenttype": "Website Item"}
+	if parentfield:
+		filters["parentfield"] = parentfield
+
+	values = {}
+	for row in frappe.get_all(doctype, filters=filters, fields=["parent", fieldname], order_by="idx"):
+		if row.get(fieldname):
+			values.setdefault(row.parent, []).append(row.get(fieldname))
+
+	return values
+
+
+def set_search_document(pipeline, name, web_item):
+	"""
+	Write the hash of a Website Item. None values (e.g. the price of an unpriced item)
+	and missing sortable fields are removed, redis rejects None and empty ones fail indexing.
+	"""
+	key = make_key(get_cache_key(name))
+	mapping = {field: value for field, value in web_item.items() if value is not None}
+	if mapping:
+		pipeline.hset(key, mapping=mapping)
+
+	missing = [field for field, value in web_item.items() if value is None]
+	missing += [field for field in SORTABLE_FIELDS if field not in web_item]
+	if missing:
+		pipeline.hdel(key, *missing)
+
+
 @if_redisearch_enabled
 def insert_item_to_index(website_item_doc):
 	# Insert item to index
-	key = get_cache_key(website_item_doc.name)
-	cache = frappe.cache()
-	web_item = create_web_item_map(website_item_doc)
+	attributes = get_search_attributes([website_item_doc])
+	web_item = create_web_item_map(website_item_doc, attributes=attributes[website_item_doc.name])
 
-	for field, value in web_item.items():
-		super(RedisWrapper, cache).hset(make_key(key), field, value)
+	pipeline = frappe.cache().pipeline()
+	set_search_document(pipeline, website_item_doc.name, web_item)
+	pipeline.execute()
 
-	insert_to_name_ac(website_item_doc.web_item_name, website_item_doc.name)
+	if website_item_doc.published:
+		insert_to_name_ac(website_item_doc.web_item_name, website_item_doc.name)
 
 
 @if_redisearch_enabled
@@ -128,27 +449,73 @@ def insert_to_name_ac(web_name, doc_name):
 	ac.sugadd(WEBSITE_ITEM_NAME_AUTOCOMPLETE, Suggestion(web_name, payload=doc_name))
 
 
-def create_web_item_map(website_item_doc):
-	fields_to_index = get_fields_indexed()
+def create_web_item_map(website_item_doc, fields_to_index=None, attributes=None):
+	fields_to_index = fields_to_index or get_fields_indexed()
 	web_item = {}
 
 	for field in fields_to_index:
 		web_item[field] = website_item_doc.get(field) or ""
 
+	for field, value in (attributes or {}).items():
+		if value is not None:
+			web_item[field] = value
+
 	return web_item
 
 
+@if_redisearch_enabled
+def update_search_attributes(web_items):
+	"Refresh sortable and tag fields of published `web_items` (names), e.g. after price or stock changes."
+	filter_fields = get_filter_fields()
+	items = frappe.get_all(
+		"Website Item",
+		fields=get_search_source_fields(filter_fields),
+		filters={"name": ["in", web_items], "published": 1},
+	)
+	if not items:
+		return
+
+	pipeline = frappe.cache().pipeline()
+	for name, attributes in get_search_attributes(items, filter_fields).items():
+		set_search_document(pipeline, name, attributes)
+	pipeline.execute()
+
+
+def on_bin_change(doc, method=None):
+	"Stock availability is a sortable field of the item."
+	if not is_redisearch_enabled():
+		return
+
+	web_items = frappe.get_all("Website Item", filters={"item_code": doc.item_code}, pluck="name")
+	if web_items:
+		update_search_attributes(web_items)
+
+
 @if_redisearch_enabled
 def update_index_for_item(website_item_doc):
-	# Reinsert to Cache
-	insert_item_to_index(website_item_doc)
-	define_autocomplete_dictionary()
+	# Reinsert to Cache, only published items are searched and listed
+	if website_item_doc.published:
+		insert_item_to_index(website_item_doc)
+	else:
+		frappe.cache().delete(make_key(get_cache_key(website_item_doc.name)))
+	update_name_ac(website_item_doc)
+
+
+@if_redisearch_enabled
+def update_name_ac(website_item_doc):
+	"Drop the previous name of a renamed or unpublished item from the autocomplete dictionary."
+	before = website_item_doc.get_doc_before_save()
+	old_name = before.web_item_name if before and before.published else None
+	new_name = website_item_doc.web_item_name if website_item_doc.published else None
+
+	if old_name and old_name != new_name:
+		delete_name_from_ac(old_name, website_item_doc.name)
 
 
 @if_redisearch_enabled
 def delete_item_from_index(website_item_doc):
 	cache = frappe.cache()
-	key = get_cache_key(website_item_doc.name)
+	key = make_key(get_cache_key(website_item_doc.name))
 
 	try:
 		cache.delete(key)
@@ -162,8 +529,49 @@ def delete_item_from_index(website_item_doc):
 @if_redisearch_enabled
 def delete_from_ac_dict(website_item_doc):
 	"""Removes this items's name from autocomplete dictionary"""
+	delete_name_from_ac(website_item_doc.web_item_name, website_item_doc.name)
+
+
+def delete_name_from_ac(web_name, doc_name):
+	"Remove `web_name` from the autocomplete dictionary, unless another published item has it."
+	if not web_name:
+		return
+
+	if frappe.db.exists(
+		"Website Item", {"web_item_name": web_name, "published": 1, "name": ("!=", doc_name)}
+	):
+		return
+
 	ac = frappe.cache().ft()
-	ac.sugdel(website_item_doc.web_item_name)
+	ac.sugdel(WEBSITE_ITEM_NAME_AUTOCOMPLETE, web_name)
+
+
+@if_redisearch_enabled
+def update_item_group_ac(doc, method=None, *args, **kwargs):
+	"Keep the category autocomplete dictionary in step with a changed Item Group."
+	ac = frappe.cache().ft()
+
+	if method == "after_rename":
+		old_name = args[0] if args else None
+		if old_name:
+			ac.sugdel(WEBSITE_ITEM_CATEGORY_AUTOCOMPLETE, old_name)
+	elif method == "on_trash" or not doc.show_in_website:
+		ac.sugdel(WEBSITE_ITEM_CATEGORY_AUTOCOMPLETE, doc.name)
+		return
+
+	if doc.show_in_website:
+		ac.sugadd(WEBSITE_ITEM_CATEGORY_AUTOCOMPLETE, get_item_group_suggestion(doc))
+
+
+def enqueue_autocomplete_rebuild():
+	frappe.enqueue(
+		"webshop.webshop.redisearch_utils.define_autocomplete_dictionary",
+		queue="long",
+		job_id=f"website_items_autocomplete_rebuild_{frappe.local.site}",
+		deduplicate=True,
+		enqueue_after_commit=True,
+		now=frappe.flags.in_test,
+	)
 
 
 @if_redisearch_enabled
@@ -171,31 +579,27 @@ def define_autocomplete_dictionary():
 	"""
 	Defines/Redefines an autocomplete search dictionary for Website Item Name.
 	Also creats autocomplete dictionary for Published Item Groups.
-	"""
 
-	cache = frappe.cache()
-
-	# Delete both autocomplete dicts
+	Maintenance job, items and item groups are kept up to date on save. Each
+	dictionary is built under a shadow key and renamed over the live one, so
+	suggestions are served throughout the rebuild.
+	"""
 	try:
-		cache.delete(make_key(WEBSITE_ITEM_NAME_AUTOCOMPLETE))
-		cache.delete(make_key(WEBSITE_ITEM_CATEGORY_AUTOCOMPLETE))
+		create_items_autocomplete_dict()
+		create_item_groups_autocomplete_dict()
 	except Exception:
 		raise_redisearch_error()
 
-	create_items_autocomplete_dict()
-	create_item_groups_autocomplete_dict()
-
 
 @if_redisearch_enabled
 def create_items_autocomplete_dict():
 	"Add items as suggestions in Autocompleter."
 
-	ac = frappe.cache().ft()
-	items = frappe.get_all(
-		"Website Item", fields=["web_item_name", "item_group"], filters={"published": 1}
-	)
-	for item in items:
-		ac.sugadd(WEBSITE_ITEM_NAME_AUTOCOMPLETE, Suggestion(item.web_item_name))
+	items = frappe.get_all("Website Item", fields=["name", "web_item_name"], filters={"published": 1})
+	suggestions = [
+		Suggestion(item.web_item_name, payload=item.name) for item in items if item.web_item_name
+	]
+	swap_autocomplete_dict(WEBSITE_ITEM_NAME_AUTOCOMPLETE, suggestions)
 
 
 @if_redisearch_enabled
@@ -205,34 +609,169 @@ def create_item_groups_autocomplete_dict():
 	published_item_groups = frappe.get_all(
 		"Item Group", fields=["name", "route", "weightage"], filters={"show_in_website": 1}
 	)
-	if not published_item_groups:
-		return
+	suggestions = [get_item_group_suggestion(item_group) for item_group in published_item_groups]
+	swap_autocomplete_dict(WEBSITE_ITEM_CATEGORY_AUTOCOMPLETE, suggestions)
 
-	ac = frappe.cache().ft()
 
-	for item_group in published_item_groups:
-		payload = json.dumps({"name": item_group.name, "route": item_group.route})
-		ac.sugadd(
-			WEBSITE_ITEM_CATEGORY_AUTOCOMPLETE,
-			Suggestion(
-				string=item_group.name,
-				score=frappe.utils.flt(item_group.weightage) or 1.0,
-				payload=payload,  # additional info that can be retrieved later
-			),
-		)
+def get_item_group_suggestion(item_group):
+	payload = json.dumps({"name": item_group.name, "route": item_group.route})
+	return Suggestion(
+		string=item_group.name,
+		score=frappe.utils.flt(item_group.weightage) or 1.0,
+		payload=payload,  # additional info that can be retrieved later
+	)
+
+
+def swap_autocomplete_dict(name, suggestions):
+	"Build the dictionary `name` under a shadow key and rename it over the live one."
+	cache = frappe.cache()
+	ac = cache.ft()
+	shadow = f"{name}{AUTOCOMPLETE_SHADOW_SUFFIX}"
+
+	cache.delete(make_key(shadow))
+	for i in range(0, len(suggestions), AUTOCOMPLETE_CHUNK_SIZE):
+		# sugadd pipelines the suggestions given to it
+		ac.sugadd(shadow, *suggestions[i : i + AUTOCOMPLETE_CHUNK_SIZE])
+
+	if suggestions:
+		super(RedisWrapper, cache).rename(make_key(shadow), make_key(name))
+	else:
+		cache.delete(make_key(name))
 
 
 @if_redisearch_enabled
-def reindex_all_web_items():
-	items = frappe.get_all("Website Item", fields=get_fields_indexed(), filters={"published": True})
+def reindex_all_web_items(resume=False, index_name=None, filter_fields=None):
+	"""
+	Reindex all published Website Items in background jobs, as many as the
+	`webshop_search_reindex_jobs` site config (default 1). Each job indexes a
+	partition of the items.
+
+	Args:
+	        resume (bool, optional): Continue an interrupted reindex from its checkpoints
+	        index_name (str, optional): Index version to be promoted once all partitions are done
+	        filter_fields (list, optional): Filter fields `index_name` has
+	"""
+	cache = frappe.cache()
+	progress = read_reindex_progress() if resume else {}
+	partitions = cint(progress.get("partitions")) or max(
+		cint(frappe.conf.get("webshop_search_reindex_jobs")), 1
+	)
+
+	if not progress:
+		progress = {
+			"total": frappe.db.count("Website Item", {"published": 1}),
+			"indexed": 0,
+			"partitions": partitions,
+		}
+		if index_name:
+			progress["index"] = index_name
+			progress["filter_fields"] = json.dumps(filter_fields or [])
+
+		pipeline = cache.pipeline()
+		pipeline.delete(
+			make_key(REINDEX_CHECKPOINT_KEY),
+			make_key(REINDEX_PROGRESS_KEY),
+			make_key(REINDEX_FINISHED_KEY),
+		)
+		pipeline.hset(make_key(REINDEX_PROGRESS_KEY), mapping=progress)
+		pipeline.execute()
+
+	for partition in range(partitions):
+		frappe.enqueue(
+			"webshop.webshop.redisearch_utils.reindex_web_items_partition",
+			partition=partition,
+			partitions=partitions,
+			queue="long",
+			job_id=f"website_items_reindex_{frappe.local.site}_{partition}",
+			deduplicate=True,
+			enqueue_after_commit=True,
+			now=frappe.flags.in_test,
+		)
+
 
+def reindex_web_items_partition(partition=0, partitions=1):
+	"""
+	Index a partition of published Website Items in chunks of `REINDEX_CHUNK_SIZE`.
+	Each chunk is written in one pipeline, along with the checkpoint (last indexed
+	name) of the partition, so a restarted job continues after it.
+	"""
 	cache = frappe.cache()
-	for item in items:
-		web_item = create_web_item_map(item)
-		key = make_key(get_cache_key(item.name))
+	fields = get_fields_indexed()
+	filter_fields = get_filter_fields()
+	source_fields = get_search_source_fields(filter_fields)
+	checkpoint_key = make_key(REINDEX_CHECKPOINT_KEY)
+	last_name = frappe.safe_decode(super(RedisWrapper, cache).hget(checkpoint_key, partition) or "")
+
+	while True:
+		items = get_web_items_chunk(fields + source_fields, last_name, partition, partitions)
+		if not items:
+			break
+
+		# one transaction: hashes are never indexed without the checkpoint moving past them
+		attributes = get_search_attributes(items, filter_fields)
+		pipeline = cache.pipeline()
+		for item in items:
+			web_item = create_web_item_map(item, fields, attributes[item.name])
+			set_search_document(pipeline, item.name, web_item)
+		pipeline.hset(checkpoint_key, partition, items[-1].name)
+		pipeline.hincrby(make_key(REINDEX_PROGRESS_KEY), "indexed", len(items))
+		pipeline.execute()
+
+		last_name = items[-1].name
+
+	redis = super(RedisWrapper, cache)
+	redis.sadd(make_key(REINDEX_FINISHED_KEY), partition)
+	if redis.scard(make_key(REINDEX_FINISHED_KEY)) < partitions:
+		return
+
+	# the last partition to finish promotes the index, if no other rebuild has started since
+	progress = read_reindex_progress()
+	if progress.get("index") and redis.hdel(make_key(REINDEX_PROGRESS_KEY), "index"):
+		promote_website_items_index(progress["index"], json.loads(progress.get("filter_fields") or "[]"))
+
+
+def get_web_items_chunk(fields, after, partition=0, partitions=1):
+	"""
+	Returns:
+	        list: Next `REINDEX_CHUNK_SIZE` published Website Items of the partition by name
+	"""
+	partition_condition = ""
+	if partitions > 1:
+		partition_condition = f"and mod(crc32(name), {cint(partitions)}) = {cint(partition)}"
+
+	return frappe.db.sql(
+		f"""
+		select {", ".join(f"`{field}`" for field in set(fields))}
+		from `tabWebsite Item`
+		where published = 1 and name > %(after)s {partition_condition}
+		order by name
+		limit {cint(REINDEX_CHUNK_SIZE)}
+		""",  # nosemgrep
+		{"after": after or ""},
+		as_dict=True,
+	)
+
+
+@frappe.whitelist()
+def get_reindex_progress():
+	"""
+	Returns:
+	        dict: {"total", "indexed", "partitions"} of the last reindex, empty if none ran,
+	                and the "index" version it builds until that is promoted
+	"""
+	frappe.only_for("System Manager")
+
+	return read_reindex_progress()
+
+
+def read_reindex_progress():
+	progress = super(RedisWrapper, frappe.cache()).hgetall(make_key(REINDEX_PROGRESS_KEY)) or {}
+	progress = {frappe.safe_decode(key): frappe.safe_decode(value) for key, value in progress.items()}
+	for key in ("total", "indexed", "partitions"):
+		if key in progress:
+			progress[key] = cint(progress[key])
 
-		for field, value in web_item.items():
-			super(RedisWrapper, cache).hset(key, field, value)
+	return progress
 
 
 def get_cache_key(name):
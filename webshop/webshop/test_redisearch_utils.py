@@ -0,0 +1,157 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and contributors
+# For license information, please see license.txt
+
+import unittest
+
+import frappe
+from frappe.utils.redis_wrapper import RedisWrapper
+
+from webshop.webshop.doctype.webshop_settings.test_webshop_settings import (
+	setup_webshop_settings,
+)
+from webshop.webshop.doctype.website_item.test_website_item import create_regular_web_item
+from webshop.webshop.redisearch_utils import (
+	REINDEX_CHECKPOINT_KEY,
+	REINDEX_FINISHED_KEY,
+	WEBSITE_ITEM_INDEX,
+	WEBSITE_ITEM_NAME_AUTOCOMPLETE,
+	create_website_items_index,
+	get_cache_key,
+	is_search_module_loaded,
+	list_indexes,
+	make_key,
+	read_reindex_progress,
+	reindex_all_web_items,
+)
+
+test_dependencies = ["Item", "Item Group"]
+
+
+class TestRediSearchUtils(unittest.TestCase):
+	"Test indexing of Website Items in RediSearch, needs the Redis search module."
+
+	@classmethod
+	def setUpClass(cls):
+		if not is_search_module_loaded():
+			raise unittest.SkipTest("RediSearch module is not loaded")
+
+		setup_webshop_settings({"is_redisearch_enabled": 1})
+
+	@classmethod
+	def tearDownClass(cls):
+		setup_webshop_settings({"is_redisearch_enabled": 0})
+		frappe.db.rollback()
+
+	def get_search_document(self, name):
+		return super(RedisWrapper, frappe.cache()).hgetall(make_key(get_cache_key(name)))
+
+	def get_suggestions(self, prefix):
+		suggestions = frappe.cache().ft().sugget(WEBSITE_ITEM_NAME_AUTOCOMPLETE, prefix, num=10)
+		return [suggestion.string for suggestion in suggestions]
+
+	def test_unpriced_item_attributes(self):
+		"Test if stock and price updates of an item without price keep its document valid."
+		from erpnext.stock.utils import get_or_make_bin
+
+		from webshop.webshop.product_data_engine.price_index import update_price_index
+
+		web_item = create_regular_web_item("Test Unpriced Laptop")
+
+		# Bin on_change refreshes the search attributes
+		bin_name = get_or_make_bin(web_item.item_code, "_Test Warehouse - _TC")
+		frappe.get_doc("Bin", bin_name).save()
+		update_price_index(item_codes=[web_item.item_code])
+
+		document = self.get_search_document(web_item.name)
+		self.assertIn(b"in_stock", document)
+		self.assertNotIn(b"price", document)
+		self.assertNotIn(b"discount_percent", document)
+
+	def test_listing_skips_unpublished_documents(self):
+		"Test if lingering documents of unpublished items are not counted, ties are paged by name."
+		from webshop.webshop.product_data_engine.query import ProductQuery
+		from webshop.webshop.product_data_engine.redisearch_query import RediSearchProductQuery
+
+		web_items = [
+			create_regular_web_item(item_code, web_args={"ranking": 5})
+			for item_code in ("Test Tied Laptop A", "Test Tied Laptop B", "Test Tied Laptop C")
+		]
+
+		settings = frappe.get_doc("Webshop Settings")
+		result = RediSearchProductQuery(settings=settings).query(fields={}, search_term="Tied")
+		self.assertEqual(result["items_count"], 3)
+		sql_result = ProductQuery().query(fields={}, search_term="Tied")
+		self.assertEqual(
+			[item.item_code for item in result["items"]],
+			[item.item_code for item in sql_result["items"]],
+		)
+
+		# as if deleting the document of an unpublished item had failed
+		key = make_key(get_cache_key(web_items[0].name))
+		super(RedisWrapper, frappe.cache()).hset(key, "published", 0)
+
+		result = RediSearchProductQuery(settings=settings).query(fields={}, search_term="Tied")
+		self.assertEqual(result["items_count"], 2)
+		self.assertNotIn(web_items[0].item_code, [item.item_code for item in result["items"]])
+
+	def test_reindex_resumes_from_checkpoint(self):
+		"Test if a resumed reindex indexes the items after the checkpoint of its partition only."
+		item_codes = ("Test Resumed Laptop A", "Test Resumed Laptop B")
+		web_items = sorted(
+			(create_regular_web_item(item_code) for item_code in item_codes),
+			key=lambda web_item: web_item.name,
+		)
+		reindex_all_web_items()
+
+		# interrupted after the first item was indexed
+		redis = super(RedisWrapper, frappe.cache())
+		for web_item in web_items:
+			redis.delete(make_key(get_cache_key(web_item.name)))
+		redis.hset(make_key(REINDEX_CHECKPOINT_KEY), 0, web_items[0].name)
+		redis.delete(make_key(REINDEX_FINISHED_KEY))
+		indexed = read_reindex_progress()["indexed"]
+
+		reindex_all_web_items(resume=True)
+
+		self.assertFalse(self.get_search_document(web_items[0].name))
+		self.assertTrue(self.get_search_document(web_items[1].name))
+		self.assertGreater(read_reindex_progress()["indexed"], indexed)
+		self.assertEqual(
+			frappe.safe_decode(redis.hget(make_key(REINDEX_CHECKPOINT_KEY), 0)),
+			frappe.db.get_value("Website Item", {"published": 1}, "name", order_by="name desc"),
+		)
+
+	def test_suggestion_removed_on_unpublish_and_trash(self):
+		"Test if an item's name is suggested only while it is published."
+		web_item = create_regular_web_item("Test Suggested Laptop")
+		web_item_name = web_item.web_item_name
+		self.assertIn(web_item_name, self.get_suggestions(web_item_name))
+
+		web_item.published = 0
+		web_item.save()
+		self.assertNotIn(web_item_name, self.get_suggestions(web_item_name))
+		self.assertFalse(self.get_search_document(web_item.name))
+
+		web_item.published = 1
+		web_item.save()
+		self.assertIn(web_item_name, self.get_suggestions(web_item_name))
+
+		web_item.delete()
+		self.assertNotIn(web_item_name, self.get_suggestions(web_item_name))
+		self.assertFalse(self.get_search_document(web_item.name))
+
+	def test_index_promotion(self):
+		"Test if a rebuilt index version is searched through the alias and older ones are dropped."
+		versions_prefix = make_key(f"{WEBSITE_ITEM_INDEX}_")
+		old_versions = [name for name in list_indexes() if name.startswith(versions_prefix)]
+		web_item = create_regular_web_item("Test Promoted Laptop")
+
+		create_website_items_index()
+
+		versions = [name for name in list_indexes() if name.startswith(versions_prefix)]
+		self.assertEqual(len(versions), 1)
+		self.assertNotIn(versions[0], old_versions)
+
+		index = frappe.cache().ft(WEBSITE_ITEM_INDEX)
+		self.assertEqual(frappe.safe_decode(index.info()["index_name"]), versions[0])
+		self.assertIn(web_item.name, [doc.name for doc in index.search("Promoted").docs])
@@ -0,0 +1,208 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and Contributors
+# License: GNU General Public License v3. See license.txt
+
+"""
+Codec for values webshop stores in Redis.
+
+A payload is a version byte, a flags byte and the encoded value. Values are
+pickled and compressed with zlib once larger than `COMPRESSION_THRESHOLD`.
+msgpack and lz4 are not dependencies of webshop: sites that install them get
+msgpack encoding and lz4 compression instead, the flags byte records which
+were used. Payloads a worker cannot decode, e.g. values pickled by
+`frappe.cache()` before a rollout or lz4 payloads on a worker without lz4,
+decode to None and read as a miss.
+"""
+
+import datetime
+import pickle
+import zlib
+from decimal import Decimal
+
+import frappe
+from frappe.utils import cint
+from redis import Redis
+
+try:
+	import msgpack
+except ImportError:
+	msgpack = None
+
+try:
+	import lz4.frame as lz4
+except ImportError:
+	lz4 = None
+
+CODEC_VERSION = 1
+COMPRESSION_THRESHOLD = 1024  # bytes
+METRICS_KEY = "webshop_cache_codec_metrics"
+
+# flags byte: low bits encoding, high bits compression
+ENCODING_MSGPACK, ENCODING_PICKLE = 1, 2
+COMPRESSION_ZLIB, COMPRESSION_LZ4 = 1 << 4, 2 << 4
+
+# msgpack extension types, for values json-like encodings lose
+EXT_TUPLE, EXT_SET, EXT_DATETIME, EXT_DATE, EXT_DECIMAL = range(1, 6)
+
+
+def _pack_default(value):
+	if isinstance(value, dict):
+		# frappe._dict, decoded as frappe._dict again
+		return dict(value)
+	if isinstance(value, list):
+		return list(value)
+	if isinstance(value, tuple):
+		return msgpack.ExtType(EXT_TUPLE, _packb(list(value)))
+	if isinstance(value, (set, frozenset)):
+		return msgpack.ExtType(EXT_SET, _packb(list(value)))
+	if isinstance(value, datetime.datetime):
+		return msgpack.ExtType(EXT_DATETIME, value.isoformat().encode())
+	if isinstance(value, datetime.date):
+		return msgpack.ExtType(EXT_DATE, value.isoformat().encode())
+	if isinstance(value, Decimal):
+		return msgpack.ExtType(EXT_DECIMAL, str(value).encode())
+	if isinstance(value, datetime.timedelta):
+		return value.total_seconds()
+
+	return str(value)
+
+
+def _ext_hook(code, data):
+	if code == EXT_TUPLE:
+		return tuple(_unpackb(data))
+	if code == EXT_SET:
+		return set(_unpackb(data))
+	if code == EXT_DATETIME:
+		return datetime.datetime.fromisoformat(data.decode())
+	if code == EXT_DATE:
+		return datetime.date.fromisoformat(data.decode())
+	if code == EXT_DECIMAL:
+		return Decimal(data.decode())
+
+	return msgpack.ExtType(code, data)
+
+
+def _packb(value):
+	# strict types, so that tuples and dict subclasses go through `_pack_default`
+	return msgpack.packb(value, default=_pack_default, strict_types=True, use_bin_type=True)
+
+
+def _unpackb(data):
+	return msgpack.unpackb(
+		data, ext_hook=_ext_hook, object_hook=frappe._dict, strict_map_key=False, raw=False
+	)
+
+
+def encode(value):
+	"""
+	Returns:
+	        bytes: Versioned, possibly compressed payload of `value`
+	"""
+	return _encode_with_size(value)[0]
+
+
+def _encode_with_size(value):
+	"""
+	Returns:
+	        tuple: (payload of `value`, size of the payload before compression), the size
+	                reports bytes saved by compression
+	"""
+	if msgpack:
+		flags, data = ENCODING_MSGPACK, _packb(value)
+	else:
+		flags, data = ENCODING_PICKLE, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+	header = bytes((CODEC_VERSION, flags))
+	encoded_size = len(header) + len(data)
+
+	if len(data) > COMPRESSION_THRESHOLD:
+		if lz4:
+			flags, data = flags | COMPRESSION_LZ4, lz4.compress(data)
+		else:
+			flags, data = flags | COMPRESSION_ZLIB, zlib.compress(data)
+		header = bytes((CODEC_VERSION, flags))
+
+	return header + data, encoded_size
+
+
+def decode(payload):
+	"""
+	Returns:
+	        Value of the payload, None if it is missing or not of the current codec version
+	"""
+	if not payload or len(payload) < 2 or payload[0] != CODEC_VERSION:
+		return None
+
+	flags, data = payload[1], payload[2:]
+	compression, encoding = flags & 0xF0, flags & 0x0F
+
+	if compression == COMPRESSION_LZ4:
+		if not lz4:
+			return None
+		data = lz4.decompress(data)
+	elif compression == COMPRESSION_ZLIB:
+		data = zlib.decompress(data)
+
+	if encoding == ENCODING_MSGPACK:
+		return _unpackb(data) if msgpack else None
+	if encoding == ENCODING_PICKLE:
+		return pickle.loads(data)
+
+	return None
+
+
+def _record_metrics(pipeline, cache, name, value_size, stored_size):
+	key = cache.make_key(METRICS_KEY)
+	pipeline.hincrby(key, f"{name}:writes", 1)
+	pipeline.hincrby(key, f"{name}:encoded_bytes", value_size)
+	pipeline.hincrby(key, f"{name}:stored_bytes", stored_size)
+
+
+def set_value(key, value, expires_in_sec=None):
+	cache = frappe.cache()
+	payload, encoded_size = _encode_with_size(value)
+
+	# plain redis commands, payloads are not pickled like `frappe.cache()` values
+	pipeline = cache.pipeline()
+	pipeline.set(cache.make_key(key), payload, ex=expires_in_sec)
+	_record_metrics(pipeline, cache, key.split(":", 1)[0], encoded_size, len(payload))
+	pipeline.execute()
+
+
+def get_value(key):
+	cache = frappe.cache()
+	return decode(Redis.get(cache, cache.make_key(key)))
+
+
+def hset(name, key, value):
+	cache = frappe.cache()
+	payload, encoded_size = _encode_with_size(value)
+
+	pipeline = cache.pipeline()
+	pipeline.hset(cache.make_key(name), key, payload)
+	_record_metrics(pipeline, cache, name, encoded_size, len(payload))
+	pipeline.execute()
+
+
+def hget(name, key):
+	cache = frappe.cache()
+	return decode(Redis.hget(cache, cache.make_key(name), key))
+
+
+@frappe.whitelist()
+def get_cache_codec_metrics():
+	"""
+	Returns:
+	        dict: {cache name: {"writes", "encoded_bytes", "stored_bytes", "saved_bytes"}}
+	"""
+	frappe.only_for("System Manager")
+
+	cache = frappe.cache()
+	metrics = {}
+	for field, value in (Redis.hgetall(cache, cache.make_key(METRICS_KEY)) or {}).items():
+		name, metric = frappe.safe_decode(field).rsplit(":", 1)
+		metrics.setdefault(name, {})[metric] = cint(value)
+
+	for values in metrics.values():
+		values["saved_bytes"] = values.get("encoded_bytes", 0) - values.get("stored_bytes", 0)
+
+	return metrics
@@ -1,44 +1,46 @@
 import frappe
 
+from webshop.webshop.utils import cache_codec
+
 
 class ItemVariantsCacheManager:
 	def __init__(self, item_code):
 		self.item_code = item_code
 
 	def get_item_variants_data(self):
-		val = frappe.cache().hget("item_variants_data", self.item_code)
+		val = cache_codec.hget("item_variants_data", self.item_code)
 
 		if not val:
 			self.build_cache()
 
-		return frappe.cache().hget("item_variants_data", self.item_code)
+		return cache_codec.hget("item_variants_data", self.item_code)
 
 	def get_attribute_value_item_map(self):
-		val = frappe.cache().hget("attribute_value_item_map", self.item_code)
+		val = cache_codec.hget("attribute_value_item_map", self.item_code)
 
 		if not val:
 			self.build_cache()
 
-		return frappe.cache().hget("attribute_value_item_map", self.item_code)
+		return cache_codec.hget("attribute_value_item_map", self.item_code)
 
 	def get_item_attribute_value_map(self):
-		val = frappe.cache().hget("item_attribute_value_map", self.item_code)
+		val = cache_codec.hget("item_attribute_value_map", self.item_code)
 
 		if not val:
 			self.build_cache()
 
-		return frappe.cache().hget("item_attribute_value_map", self.item_code)
+		return cache_codec.hget("item_attribute_value_map", self.item_code)
 
 	def get_optional_attributes(self):
-		val = frappe.cache().hget("optional_attributes", self.item_code)
+		val = cache_codec.hget("optional_attributes", self.item_code)
 
 		if not val:
 			self.build_cache()
 
-		return frappe.cache().hget("optional_attributes", self.item_code)
+		return cache_codec.hget("optional_attributes", self.item_code)
 
 	def get_ordered_attribute_values(self):
-		val = frappe.cache().get_value("ordered_attribute_values_map")
+		val = cache_codec.get_value("ordered_attribute_values_map")
 		if val:
 			return val
 
@@ -50,7 +52,7 @@ class ItemVariantsCacheManager:
 		for d in all_attribute_values:
 			ordered_attribute_values_map.setdefault(d.parent, []).append(d.attribute_value)
 
-		frappe.cache().set_value("ordered_attribute_values_map", ordered_attribute_values_map)
+		cache_codec.set_value("ordered_attribute_values_map", ordered_attribute_values_map)
 		return ordered_attribute_values_map
 
 	def build_cache(self):
@@ -92,10 +94,10 @@ class ItemVariantsCacheManager:
 				if attribute not in attr_dict:
 					optional_attributes.add(attribute)
 
-		frappe.cache().hset("attribute_value_item_map", parent_item_code, attribute_value_item_map)
-		frappe.cache().hset("item_attribute_value_map", parent_item_code, item_attribute_value_map)
-		frappe.cache().hset("item_variants_data", parent_item_code, item_variants_data)
-		frappe.cache().hset("optional_attributes", parent_item_code, optional_attributes)
+		cache_codec.hset("attribute_value_item_map", parent_item_code, attribute_value_item_map)
+		cache_codec.hset("item_attribute_value_map", parent_item_code, item_attribute_value_map)
+		cache_codec.hset("item_variants_data", parent_item_code, item_variants_data)
+		cache_codec.hset("optional_attributes", parent_item_code, optional_attributes)
 
 	def clear_cache(self):
 		keys = [